@@ -0,0 +1,62 @@
+#
+# Benchmarks JSON decoding of API list responses.
+#
+# Usage: python -m bench.bench_decoding [items per list] [repeats]
+#
+# Builds post, event and network lists shaped like the API's from the mock
+# data, then reports, for every installed decoder, how fast each list is
+# decoded, along with its raw and gzip-compressed sizes.
+#
+
+import copy
+import gzip
+import json
+import os
+import sys
+import timeit
+
+os.environ.setdefault('WTF_CSRF_SECRET_KEY', 'bench')
+os.environ.setdefault('CULTUREMESH_API_KEY', 'bench')
+os.environ.setdefault('CULTUREMESH_API_BASE_ENDPOINT', 'http://localhost')
+
+from culturemesh.client.decoding import DECODERS
+
+MOCK_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'mock')
+LISTS = [
+  ('posts', 'db_mock_posts.json'),
+  ('events', 'db_mock_events.json'),
+  ('networks', 'db_mock_networks.json'),
+]
+
+def make_list(filename, count):
+  """
+  Returns COUNT items cycled from the mock file, with distinct ids.
+  """
+  with open(os.path.join(MOCK_DIR, filename)) as f:
+    samples = json.load(f)
+  items = []
+  for i in range(count):
+    item = copy.deepcopy(samples[i % len(samples)])
+    item['id'] = count - i
+    items.append(item)
+  return items
+
+def main(count=1000, repeats=50):
+  print("%d items per list, best of 3 x %d decodes\n" % (count, repeats))
+  print("%-9s %9s %9s  %-7s %10s %10s" % (
+    'list', 'bytes', 'gzipped', 'decoder', 'ms/list', 'MB/s'
+  ))
+  for name, filename in LISTS:
+    data = json.dumps(make_list(filename, count)).encode('utf-8')
+    gzipped = len(gzip.compress(data))
+    for decoder, loads in DECODERS:
+      secs = min(timeit.repeat(
+        lambda: loads(data), number=repeats, repeat=3
+      )) / repeats
+      print("%-9s %9d %9d  %-7s %10.3f %10.1f" % (
+        name, len(data), gzipped, decoder, secs * 1000,
+        len(data) / secs / 1e6
+      ))
+
+if __name__ == '__main__':
+  main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,87 @@
+#
+# Benchmarks the API client against recorded API traffic.
+#
+# Usage: python -m bench.bench_replay CASSETTE [repeats] [--latency]
+#
+# Record a cassette by serving some pages with API_CASSETTE_MODE = 'record'
+# in config.py.  This replays the GETs of every recorded page, in order and
+# inside a request context of that page, so memoization, caches and
+# deadlines apply as they did live.  It then reports how long each page
+# spends in the client and how many calls reach the (replayed) API.  With
+# --latency, each answer is delayed by the latency recorded for it.
+#
+
+import os
+import sys
+import time
+
+os.environ.setdefault('WTF_CSRF_SECRET_KEY', 'bench')
+os.environ.setdefault('CULTUREMESH_API_KEY', 'bench')
+os.environ.setdefault('CULTUREMESH_API_BASE_ENDPOINT', 'http://localhost')
+
+import config
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlparse
+from culturemesh import app
+from culturemesh.client import Client, Request
+from culturemesh.client import ledger
+from culturemesh.client.cassette import Cassette
+from culturemesh.client.scope import current_scope
+from culturemesh.client.transport import reset_session
+
+def page_flows(path):
+  """
+  Returns an ordered dict mapping each recorded page to the (path,
+  query params) of the GETs it made.
+  """
+  flows = OrderedDict()
+  for interaction in Cassette(path).interactions():
+    if interaction['method'] != 'GET':
+      continue
+    url = urlparse(interaction['url'])
+    flows.setdefault(interaction.get('page') or '', []).append(
+      (url.path, dict(parse_qsl(url.query)) or None)
+    )
+  return flows
+
+def replay(page, calls):
+  """
+  Makes CALLS as PAGE would. Returns the seconds taken and the number
+  of calls that reached the API.
+  """
+  with app.test_request_context(page or '/'):
+    c = Client(mock=False, queries_per_second=None)
+    started = time.monotonic()
+    for url, query_params in calls:
+      c._request(url, Request.GET, query_params=query_params)
+    elapsed = time.monotonic() - started
+    sources = current_scope().ledger.summary()['sources']
+    upstream = sources.get(ledger.UPSTREAM, 0) + \
+      sources.get(ledger.NOT_MODIFIED, 0)
+  return elapsed, upstream
+
+def main(path, repeats=5, latency=False):
+  config.API_CASSETTE_MODE = 'replay'
+  config.API_CASSETTE_FILE = path
+  config.API_CASSETTE_REPLAY_LATENCY = latency
+  reset_session()
+
+  flows = page_flows(path)
+  print("%d pages, best of %d replays%s\n" % (
+    len(flows), repeats, ', recorded latencies' if latency else ''
+  ))
+  print("%-40s %6s %9s %10s" % ('page', 'calls', 'upstream', 'ms'))
+  for page, calls in flows.items():
+    results = [replay(page, calls) for _ in range(repeats)]
+    elapsed, upstream = min(results)
+    print("%-40s %6d %9d %10.2f" % (
+      page[:40], len(calls), upstream, elapsed * 1000
+    ))
+
+if __name__ == '__main__':
+  args = [arg for arg in sys.argv[1:] if arg != '--latency']
+  if not args:
+    sys.exit("Usage: python -m bench.bench_replay CASSETTE [repeats] "
+             "[--latency]")
+  main(args[0], *[int(arg) for arg in args[1:2]],
+       latency='--latency' in sys.argv)
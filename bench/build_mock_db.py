@@ -0,0 +1,36 @@
+#
+# Builds the SQLite mock database served with API_MOCK_BACKEND = 'sqlite'.
+#
+# Usage: python -m bench.build_mock_db [path] [scale]
+#
+# Tables and indexes follow data/tables.txt, and are filled from the JSON
+# files in data/mock/.  Posts, post replies and events are copied SCALE
+# times (default 1), so that mock pages can be timed against tables of
+# realistic size.  PATH defaults to config.API_MOCK_SQLITE_FILE.
+#
+
+import os
+import sys
+import time
+
+os.environ.setdefault('WTF_CSRF_SECRET_KEY', 'bench')
+os.environ.setdefault('CULTUREMESH_API_KEY', 'bench')
+os.environ.setdefault('CULTUREMESH_API_BASE_ENDPOINT', 'http://localhost')
+
+import config
+from culturemesh.client.client import MOCK_DATA_LOCS, TABLES_LOC
+from culturemesh.client.mock_store import build_database, parse_schema
+
+def main(path=None, scale=1):
+  path = path or config.API_MOCK_SQLITE_FILE
+  started = time.monotonic()
+  build_database(path, MOCK_DATA_LOCS, parse_schema(TABLES_LOC), scale)
+  print("Built %s (scale %d) in %.1fs, %d bytes" % (
+    path, scale, time.monotonic() - started, os.path.getsize(path)
+  ))
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  if len(args) > 2:
+    sys.exit("Usage: python -m bench.build_mock_db [path] [scale]")
+  main(*args[:1], *[int(arg) for arg in args[1:2]])
@@ -0,0 +1,52 @@
+#
+# Serves the stand-in CultureMesh API (culturemesh/client/standin.py).
+#
+# Usage: python -m bench.standin_server [port] [--latency=S] [--jitter=S]
+#                                       [--error-rate=R] [--error-status=N]
+#
+# Point the app at it with CULTUREMESH_API_BASE_ENDPOINT=http://127.0.0.1:PORT
+# to load-test the real client path on one machine.  Every answer is delayed
+# by S seconds plus up to the jitter, and a share R of them fail with status
+# N (503 by default).  The stand-in accepts any API key.
+#
+
+import os
+import sys
+
+os.environ.setdefault('WTF_CSRF_SECRET_KEY', 'bench')
+os.environ.setdefault('CULTUREMESH_API_KEY', 'bench')
+os.environ.setdefault('CULTUREMESH_API_BASE_ENDPOINT', 'http://localhost')
+
+from werkzeug.serving import make_server
+from culturemesh.client.standin import Faults, StandInAPI
+
+OPTIONS = {
+  '--latency': ('latency', float),
+  '--jitter': ('jitter', float),
+  '--error-rate': ('error_rate', float),
+  '--error-status': ('error_status', int),
+}
+
+def main(port=5001, **faults):
+  server = make_server(
+    '127.0.0.1', port, StandInAPI(faults=Faults(**faults)), threaded=True
+  )
+  print("Stand-in API at http://127.0.0.1:%d %s" % (server.port, faults))
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+
+if __name__ == '__main__':
+  args = []
+  faults = {}
+  for arg in sys.argv[1:]:
+    name, _, value = arg.partition('=')
+    if name in OPTIONS:
+      field, type_ = OPTIONS[name]
+      faults[field] = type_(value)
+    elif arg.startswith('-'):
+      sys.exit("Unknown option %s" % arg)
+    else:
+      args.append(int(arg))
+  main(*args[:1], **faults)
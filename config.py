@@ -11,3 +11,134 @@ DEBUG_PORT=8080
 DEBUG_ADDR='127.0.0.1'
 DATETIME_FMT_STR = "%Y-%m-%d %H:%M:%S"
 PERMANENT_SESSION_LIFETIME = datetime.timedelta(minutes=30)
+
+# CultureMesh API client: connection pooling.  All clients in a process
+# share one keep-alive session.
+API_POOL_CONNECTIONS = 4  # Number of per-host connection pools to keep.
+API_POOL_MAXSIZE = 16     # Keep-alive connections kept per host.
+
+# CultureMesh API client: rate limiting.  Clients share a token bucket per
+# queries_per_second budget.  Use the 'file' backend to share the budget
+# between all gunicorn workers on one host.
+API_RATE_LIMIT_BACKEND = 'process'  # 'process' or 'file'
+API_RATE_LIMIT_FILE = '/tmp/culturemesh-api-ratelimit'
+API_RATE_LIMIT_BURST = None         # Defaults to queries_per_second.
+API_RATE_LIMIT_MAX_WAIT_SECS = 5    # Longest a request may queue.
+
+# CultureMesh API client: retries.  Idempotent requests that fail with a
+# connection error or a 429/5xx are retried with exponential backoff and
+# full jitter, for at most the client's retry_timeout.
+API_RETRY_BASE_DELAY_SECS = 0.1
+API_RETRY_MAX_DELAY_SECS = 2
+API_RETRY_MAX_ATTEMPTS = 5
+
+# CultureMesh API client: reference data cache.  Locations and languages
+# almost never change, so they are cached per process.
+API_REFERENCE_CACHE_SIZE = 5000  # Entries, shared by all endpoints below.
+API_REFERENCE_CACHE_TTLS = {     # Seconds, per endpoint.
+    'city': 24 * 60 * 60,
+    'region': 24 * 60 * 60,
+    'country': 24 * 60 * 60,
+    'language': 24 * 60 * 60,
+}
+
+# CultureMesh API client: concurrency.  Client.gather() runs independent
+# calls on a process-wide thread pool of this size.
+API_GATHER_MAX_WORKERS = 8
+
+# CultureMesh API client: AsyncClient connection pooling.
+API_ASYNC_CONNECTOR_LIMIT = 100          # Open connections in total.
+API_ASYNC_CONNECTOR_LIMIT_PER_HOST = 50  # Open connections per host.
+
+# CultureMesh API client: conditional GETs.  Responses with an ETag or
+# Last-Modified header are kept so that repeat GETs can be revalidated
+# with If-None-Match / If-Modified-Since and answered by a 304.
+API_CONDITIONAL_REQUESTS = True
+API_CONDITIONAL_STORE_MAX_BYTES = 32 * 1024 * 1024  # Raw body bytes kept.
+
+# CultureMesh API client: timeouts.  Every upstream call gets these
+# connect and read timeouts, and every call made while serving one page
+# draws from a single deadline budget.  Calls that cannot start before
+# the deadline fail fast with DeadlineExceeded.
+API_CONNECT_TIMEOUT_SECS = 3.05
+API_READ_TIMEOUT_SECS = 10
+API_REQUEST_DEADLINE_SECS = 20  # None for no per-request deadline.
+
+# CultureMesh API client: circuit breakers, one per endpoint family
+# (e.g. 'event/<id>/reg_count').  A breaker opens after this many
+# consecutive failures, fails calls fast while open, and lets a few probe
+# calls through once the reset timeout has passed.
+API_BREAKER_FAILURE_THRESHOLD = 5
+API_BREAKER_RESET_TIMEOUT_SECS = 30
+API_BREAKER_HALF_OPEN_MAX_CALLS = 1
+
+# CultureMesh API client: streamed list responses are read in chunks of
+# this many bytes.
+API_STREAM_CHUNK_BYTES = 16 * 1024
+
+# CultureMesh API client: pagination.  List endpoints asked for more than
+# this many items are read page by page, following their cursors.
+API_MAX_PAGE_SIZE = 100
+
+# CultureMesh API client: metrics.  Per-endpoint latency, status, byte,
+# retry and timeout metrics are served in Prometheus text format at
+# /metrics/ when this is set, to clients at API_METRICS_ALLOWED_ADDRS only;
+# everyone else gets the not-found page.  Metrics are kept per worker process.
+API_METRICS_ENDPOINT = False
+API_METRICS_ALLOWED_ADDRS = ('127.0.0.1', '::1')
+
+# CultureMesh API client: per-request call ledger.  A warning summarizing
+# a request's client calls is logged when it makes more than
+# API_LEDGER_MAX_CALLS calls, has the API answer more than
+# API_LEDGER_MAX_DUPLICATES repeated GETs (those answered by the request
+# memo, the cache or an identical call in flight do not count), or calls
+# one endpoint template API_LEDGER_REPEAT_THRESHOLD times or more (a
+# likely N+1 loop).  The summary is also sent in an
+# X-CultureMesh-API-Calls response header when API_LEDGER_DEBUG_HEADER is set.
+API_LEDGER_MAX_CALLS = 25
+API_LEDGER_MAX_DUPLICATES = 0
+API_LEDGER_REPEAT_THRESHOLD = 10
+API_LEDGER_DEBUG_HEADER = False
+
+# CultureMesh API client: single-flight.  Identical GETs made at the same
+# time by different threads of a process share one upstream request.
+API_SINGLE_FLIGHT = True
+
+# CultureMesh API client: JSON decoding.  'auto' uses the fastest decoder
+# installed (orjson, then ujson, then the standard library).
+API_JSON_DECODER = 'auto'
+
+# CultureMesh API client: aggregate count cache.  Counts are fresh for
+# their TTL; after that they are served stale, for at most MAX_STALE more
+# seconds, while a background call refreshes them.
+API_COUNT_CACHE_SIZE = 10000  # Entries, shared by all endpoints below.
+API_COUNT_CACHE_TTLS = {      # (TTL, MAX_STALE) in seconds, per endpoint.
+    'network_user_count': (5, 60),
+    'network_post_count': (5, 60),
+    'event_reg_count': (5, 60),
+    'post_reply_count': (5, 60),
+}
+
+# CultureMesh API client: cache backend.  'process' keeps the caches above
+# in each gunicorn worker; 'sqlite' keeps them in API_CACHE_FILE, shared by
+# every worker on the host.  A worker filling an entry holds a lease on it
+# for at most API_CACHE_LEASE_SECS, while the others wait for its value.
+API_CACHE_BACKEND = 'process'  # 'process' or 'sqlite'
+API_CACHE_FILE = '/tmp/culturemesh-api-cache.sqlite3'
+API_CACHE_LEASE_SECS = 10
+
+# CultureMesh API client: record/replay.  'record' appends every upstream
+# request and its response to the cassette API_CASSETTE_FILE (without the
+# API key or credentials); 'replay' answers requests from it instead of the
+# API, at full speed unless API_CASSETTE_REPLAY_LATENCY is set.  Takes
+# effect when the shared session is created (see transport.reset_session).
+API_CASSETTE_MODE = None  # None, 'record' or 'replay'
+API_CASSETTE_FILE = 'api-cassette.jsonl'
+API_CASSETTE_REPLAY_LATENCY = False
+
+# CultureMesh API client: mock data.  Client(mock=True) serves the JSON
+# files in data/mock/ ('json'), or a SQLite database of them whose tables
+# and indexes follow data/tables.txt ('sqlite').  The database is built on
+# first use if missing; bench/build_mock_db.py builds larger ones.
+API_MOCK_BACKEND = 'json'  # 'json' or 'sqlite'
+API_MOCK_SQLITE_FILE = '/tmp/culturemesh-mock.sqlite3'
@@ -8,7 +8,7 @@ from flask_login import current_user
 from culturemesh.client import Client
 from culturemesh.utils import get_network_title
 from culturemesh.utils import get_upcoming_events_by_network
-from culturemesh.utils import get_time_ago
+from culturemesh.utils import enhance_post_info
 from utils import parse_date
 
 from culturemesh.blueprints.networks.forms.network_forms import NetworkJoinForm
@@ -89,9 +89,12 @@ def network_events() :
   else :
     event_index = events[-1]['id']
 
-  for event in events:
+  reg_counts = c.gather(
+    *[(c.get_event_reg_count, event['id']) for event in events]
+  )
+  for event, reg_count in zip(events, reg_counts):
     utils.enhance_event_date_info(event)
-    event['num_registered'] = c.get_event_reg_count(event['id'])['reg_count']
+    event['num_registered'] = reg_count['reg_count']
 
   id_user = current_user.id
   user_networks = c.get_user_networks(id_user, count=100)
@@ -153,10 +156,7 @@ def network_posts() :
       return render_template('404.html')
     posts = c.get_network_posts(id_network, 10, old_index - 1)
 
-  for post in posts:
-    post['username'] = c.get_user(post['id_user'])['username']
-    post['reply_count'] = c.get_post_reply_count(post['id'])['reply_count']
-    post['time_ago'] = get_time_ago(post['post_date'])
+  enhance_post_info(c, posts)
 
   # TODO: Add better handling for when there's no events left.
 
@@ -339,16 +339,14 @@ def leave():
         #
 
         # Delete all events this user is hosting in this network.
-        events_hosting = c.get_user_events_hosting(
-          user_id, 1000
-        )
+        events_hosting = c.iter_user_events_hosting(user_id)
         for event in events_hosting:
           if str(event['id_network']) == str(network['id']):
             c.delete_event(current_user, str(event['id']))
 
         # Unregister from all events this user is attending in this network.
-        events_attending = c.get_events_attending_in_network(
-          current_user, network['id'], 1000
+        events_attending = c.iter_events_attending_in_network(
+          current_user, network['id']
         )
         for event in events_attending:
           c.leave_event(current_user, event['id'])
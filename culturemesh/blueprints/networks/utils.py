@@ -3,22 +3,25 @@
 import utils
 
 from culturemesh.utils import get_network_title
-from culturemesh.utils import get_time_ago
+from culturemesh.utils import enhance_post_info
 
 def gather_network_info(id_network, id_user, client, scenario="normal"):
 
-  network = client.get_network(id_network)
-  recent_posts = client.get_network_posts(id_network, 3)
-  recent_events = client.get_network_events(id_network, 3)
+  network, recent_posts, recent_events, user_networks, user_count, \
+    post_count = client.gather(
+      (client.get_network, id_network),
+      (client.get_network_posts, id_network, 3),
+      (client.get_network_events, id_network, 3),
+      (client.get_user_networks, id_user, 100),
+      (client.get_network_user_count, id_network),
+      (client.get_network_post_count, id_network)
+    )
+
   for event in recent_events:
     utils.enhance_event_date_info(event)
 
-  for post in recent_posts:
-    post['username'] = client.get_user(post['id_user'])['username']
-    post['reply_count'] = client.get_post_reply_count(post['id'])['reply_count']
-    post['time_ago'] = get_time_ago(post['post_date'])
+  enhance_post_info(client, recent_posts)
 
-  user_networks = client.get_user_networks(id_user, count=100)
   user_is_member = False
   for network_ in user_networks:
     if int(id_network) == int(network_['id']):
@@ -45,9 +48,6 @@ def gather_network_info(id_network, id_user, client, scenario="normal"):
   elif not user_is_member and scenario == 'leave':
     network_info['greeting'] = 'You just left this network. Bye bye!'
 
-  num_users = client.get_network_user_count(id_network)['user_count']
-  num_posts = client.get_network_post_count(id_network)['post_count']
-
-  network_info['num_users'] = num_users
-  network_info['num_posts'] = num_posts
+  network_info['num_users'] = user_count['user_count']
+  network_info['num_posts'] = post_count['post_count']
   return network_info
@@ -35,8 +35,9 @@ def render_post():
 
   error_msg = None
 
-  for reply in replies:
-      reply['username'] = c.get_user(reply["id_user"])["username"]
+  authors = c.gather(*[(c.get_user, reply["id_user"]) for reply in replies])
+  for reply, author in zip(replies, authors):
+      reply['username'] = author["username"]
       reply['time_ago'] = get_time_ago(reply['reply_date'])
 
   if request.method == 'GET':
@@ -1,6 +0,0 @@
-#
-# Search-related constants.
-#
-
-GO_TO_NETWORK_MAX_RETRIES = 4
-GO_TO_NETWORK_WAIT_SECS = 0.2
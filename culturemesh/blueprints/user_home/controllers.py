@@ -13,7 +13,7 @@ from culturemesh.client import Client
 from culturemesh.utils import get_network_title
 from culturemesh.utils import get_user_image_url
 from culturemesh.utils import get_short_network_join_date
-from culturemesh.utils import get_time_ago
+from culturemesh.utils import enhance_post_info
 
 from culturemesh.utils import get_upcoming_events_by_user
 from culturemesh.utils import get_upcoming_events_by_user_hosting
@@ -53,17 +53,20 @@ def render_user_home():
 
   # Some latest posts in the user's networks.
   latest_posts = c.get_user_posts(user.id, NUM_LATEST_POSTS_TO_DISPLAY)
-  for post in latest_posts:
-    post['username'] = c.get_user(post['id_user'])['username']
-    post['reply_count'] = c.get_post_reply_count(post['id'])['reply_count']
-    post['time_ago'] = get_time_ago(post['post_date'])
-
-    try:
-      post['network'] = c.get_network(post['id_network'])
-      post['network_title'] = get_network_title(post['network'])
-    except HTTPException as e:
+  enhance_post_info(c, latest_posts)
+  post_networks = c.gather(
+    *[(c.get_network, post['id_network']) for post in latest_posts],
+    return_exceptions=True
+  )
+  for post, network in zip(latest_posts, post_networks):
+    if isinstance(network, HTTPException):
       post['network'] = None
       post['network_title'] = "Unknown"
+    elif isinstance(network, Exception):
+      raise network
+    else:
+      post['network'] = network
+      post['network_title'] = get_network_title(network)
 
 
   return render_template(
@@ -167,13 +170,16 @@ def render_user_home_networks():
     user_id, count=MAX_NETWORKS_TO_LOAD
   )
 
+  user_counts = c.gather(
+    *[(c.get_network_user_count, network['id']) for network in user_networks]
+  )
+
   networks = []
-  for network in user_networks:
+  for network, user_count in zip(user_networks, user_counts):
     network_ = {'id': network['id']}
     network_['title'] = get_network_title(network)
     network_['join_date'] = get_short_network_join_date(network)
-    num_users = c.get_network_user_count(network['id'])['user_count']
-    network_['user_count'] = num_users
+    network_['user_count'] = user_count['user_count']
     networks.append(network_)
 
   return render_template('networks.html', user=user.as_dict, networks=networks)
@@ -24,13 +24,16 @@ def user_profile(user_id):
   user['img_url'] = get_user_image_url(user)
   user_networks = c.get_user_networks(user_id, MAX_NETWORKS_TO_LOAD)
 
+  user_counts = c.gather(
+    *[(c.get_network_user_count, network['id']) for network in user_networks]
+  )
+
   networks = []
-  for network in user_networks:
+  for network, user_count in zip(user_networks, user_counts):
     network_ = {'id': network['id']}
     network_['title'] = get_network_title(network)
     network_['join_date'] = get_short_network_join_date(network)
-    num_users = c.get_network_user_count(network['id'])['user_count']
-    network_['user_count'] = num_users
+    network_['user_count'] = user_count['user_count']
     networks.append(network_)
 
   return render_template('profile.html', user=user, networks=networks)
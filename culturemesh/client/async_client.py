@@ -0,0 +1,374 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Asynchronous variant of the CultureMesh API client, built on aiohttp.
+
+AsyncClient offers Client's endpoint methods as awaitables, except for
+the iter_* pagination methods, which raise TypeError.  Counts above
+API_MAX_PAGE_SIZE are passed upstream as is rather than read page by
+page.  The endpoint functions in users.py, networks.py, etc. just return
+the result of client._request(), so with a coroutine _request every
+endpoint method returns an awaitable:
+
+    async with AsyncClient(mock=False) as c:
+        network, posts = await c.gather(
+            (c.get_network, 1), (c.get_network_posts, 1, 10)
+        )
+
+Rate limiting, retries, caches, circuit breakers, metrics and, inside a
+Flask request, the request's deadline and call ledger are shared with the
+synchronous client.  The rest is not:
+
+- the Flask request memo, which relies on flask.g
+- conditional GETs (conditional.VALIDATOR_STORE): every GET is sent in full
+- single-flight (singleflight.IN_FLIGHT), whose leaders block their thread
+  while followers wait; identical GETs in flight at once each go upstream
+"""
+
+import asyncio
+import base64
+import time
+import aiohttp
+import config
+
+from flask import abort
+from culturemesh.client import ledger
+from culturemesh.client import metrics
+from culturemesh.client.client import Client
+from culturemesh.client.client import Request
+from culturemesh.client.breaker import get_breaker
+from culturemesh.client.cache import get_cached_endpoint
+from culturemesh.client.decoding import accept_encoding
+from culturemesh.client.decoding import loads
+from culturemesh.client.exceptions import RefreshDropped
+from culturemesh.client.ratelimit import get_limiter
+from culturemesh.client.retry import RetryPolicy
+from culturemesh.client.retry import RETRY_STATUSES
+from culturemesh.client.retry import parse_retry_after
+from culturemesh.client.scope import current_scope
+from culturemesh.client.urls import canonical_key
+from culturemesh.client.urls import endpoint_template
+
+class AsyncClient(Client):
+    """Talks to the CultureMesh API without blocking.
+    """
+
+    def __init__(self, key=None, client_id=None, client_secret=None,
+                 timeout=None, connect_timeout=None, read_timeout=None,
+                 retry_timeout=60, queries_per_second=10,
+                 channel=None, mock=True, connector_limit=None,
+                 connector_limit_per_host=None):
+        """
+        :param connector_limit: the most connections open at once
+        :param connector_limit_per_host: the most connections open at once
+                                         to a single host
+        """
+        self.mock = mock
+        self.limiter = get_limiter(queries_per_second)
+        self.retry_policy = RetryPolicy(retry_timeout)
+        self.timeout = aiohttp.ClientTimeout(
+            total=timeout,
+            connect=connect_timeout or config.API_CONNECT_TIMEOUT_SECS,
+            sock_read=read_timeout or config.API_READ_TIMEOUT_SECS
+        )
+        if connector_limit is None:
+            connector_limit = config.API_ASYNC_CONNECTOR_LIMIT
+        if connector_limit_per_host is None:
+            connector_limit_per_host = config.API_ASYNC_CONNECTOR_LIMIT_PER_HOST
+        self.connector_limit = connector_limit
+        self.connector_limit_per_host = connector_limit_per_host
+        self.max_page_size = None
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self):
+        """
+        Returns this client's pooled aiohttp session. It is created on
+        first use since it must belong to the running event loop.
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connector_limit,
+                limit_per_host=self.connector_limit_per_host
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout,
+                headers={'Accept-Encoding': accept_encoding()}
+            )
+        return self.session
+
+    async def close(self):
+        """
+        Closes the pooled connections of this client.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def gather(self, *calls, return_exceptions=False):
+        """
+        :param calls: (method, arg, ...) tuples, e.g. (c.get_network, 5)
+        :param return_exceptions: if True, failed calls yield their exception
+                                  in place of a result instead of raising
+
+        Awaits independent client calls concurrently and returns their
+        results in order.
+        """
+        return await asyncio.gather(
+            *[call[0](*call[1:]) for call in calls],
+            return_exceptions=return_exceptions
+        )
+
+    async def _request(self,
+                       url,
+                       request_method,
+                       query_params=None,
+                       body_data=None,
+                       json=None,
+                       body_extractor=None,
+                       basic_auth=None,
+                       retry=None,
+                       cache=None,
+                       stream=False):
+        """
+        Carries out HTTP requests. Same as Client._request, but awaitable.
+
+        STREAM is accepted for compatibility: the list is decoded in full
+        and an iterator over it is returned.
+
+        Returns body as JSON.
+        """
+        if self.mock:
+            body = self._mock_request(url, query_params, body_data)
+            return iter(body) if stream else body
+
+        scope = current_scope()
+        key = canonical_key(url, query_params, basic_auth)
+        endpoint = endpoint_template(url)
+        args = (
+            key, endpoint, url, request_method, query_params, body_data, json,
+            basic_auth, retry, cache
+        )
+        if scope is None:
+            body = (await self._fetch_async(*args))[1]
+            return iter(body) if stream else body
+
+        started = time.monotonic()
+        source = ledger.ERROR
+        try:
+            source, body = await self._fetch_async(*args)
+            return iter(body) if stream else body
+        finally:
+            scope.ledger.record(
+                endpoint, request_method.name, key, source,
+                time.monotonic() - started
+            )
+
+    async def _fetch_async(self, key, endpoint, url, request_method,
+                           query_params, body_data, json, basic_auth, retry,
+                           cache):
+        """
+        Carries out _request for a call named KEY, once the mock and the
+        ledger are out of the way.
+
+        Returns a (source, body) pair, where source names what answered
+        the call (see ledger.py).
+        """
+        url = self._build_url(url, query_params)
+
+        # GET requests never carry a body.
+        if request_method == Request.GET:
+            json = body_data = None
+
+        if retry is None:
+            retry = request_method == Request.GET
+
+        headers = {}
+        if basic_auth is not None:
+            credentials = ':'.join(str(part) for part in basic_auth)
+            headers['Authorization'] = 'Basic ' + base64.b64encode(
+                credentials.encode('utf-8')
+            ).decode('ascii')
+
+        def fetch():
+            return self._send(
+                request_method, url, json, body_data, headers, retry, endpoint
+            )
+
+        cached_endpoint = None
+        if cache is not None and request_method == Request.GET:
+            cached_endpoint = get_cached_endpoint(cache)
+            loop = asyncio.get_event_loop()
+            found, body = cached_endpoint.get(
+                key, lambda: self._run_in_loop(loop, fetch)
+            )
+            if found:
+                return ledger.CACHE, body
+            generation = cached_endpoint.generation()
+
+        body = await fetch()
+        if cached_endpoint is not None:
+            # Dropped if a mutation invalidated the entry meanwhile.
+            cached_endpoint.set(key, body, generation)
+        return ledger.UPSTREAM, body
+
+    def _run_in_loop(self, loop, fetch):
+        """
+        Runs the coroutine FETCH() on LOOP, from another thread, and
+        returns its result.  Stale cache entries are refreshed this way,
+        from the pool the cache runs refreshes on.
+
+        Raises RefreshDropped if LOOP has closed meanwhile.
+        """
+        if loop.is_closed():
+            raise RefreshDropped()
+        coroutine = fetch()
+        try:
+            future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        except RuntimeError:
+            # Closed since the check above.
+            coroutine.close()
+            if loop.is_closed():
+                raise RefreshDropped()
+            raise
+        # Retries may run until retry_timeout, and the last attempt may
+        # then take its full connect and read timeouts.
+        budget = self.retry_policy.retry_timeout + \
+            (self.timeout.connect or 0) + (self.timeout.sock_read or 0)
+        try:
+            return future.result(budget)
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def _send(self, request_method, url, json, body_data, headers,
+                    retry, endpoint):
+        """
+        Sends a request through ENDPOINT's circuit breaker, retrying with
+        backoff if RETRY is set.  No attempt outlives the current Flask
+        request's deadline.  Every attempt is recorded in ENDPOINT's
+        metrics.
+
+        Returns the decoded body of the final response.
+        """
+        breaker = get_breaker(endpoint)
+        probe = breaker.before_call()
+        try:
+            status, body = await self._send_attempts(
+                request_method, url, json, body_data, headers, retry, endpoint
+            )
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            breaker.after_call(probe, False)
+            raise
+        except BaseException:
+            breaker.after_call(probe, None)
+            raise
+        breaker.after_call(probe, status < 500)
+        if status != 200:
+            abort(status)
+        return body
+
+    async def _send_attempts(self, request_method, url, json, body_data,
+                             headers, retry, endpoint):
+        """
+        Carries out the attempts of _send.
+
+        Returns the status of the final response, and its decoded body
+        if the status is 200.
+        """
+        labels = (endpoint, request_method.name)
+        session = self._get_session()
+        scope = current_scope()
+        deadline = scope.deadline if scope is not None else None
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = self._remaining(scope)
+            if self.limiter is not None:
+                # Queue no longer than the deadline allows.
+                max_wait = self.limiter.max_wait
+                if remaining is not None:
+                    max_wait = remaining if max_wait is None \
+                        else min(max_wait, remaining)
+                await asyncio.sleep(self.limiter.reserve(max_wait))
+                remaining = self._remaining(scope)
+            timeout = self.timeout
+            if remaining is not None:
+                timeout = aiohttp.ClientTimeout(
+                    total=remaining, connect=self.timeout.connect,
+                    sock_read=self.timeout.sock_read
+                )
+            sent = time.monotonic()
+            try:
+                async with session.request(
+                    request_method.name, url, json=json, data=body_data,
+                    headers=headers, timeout=timeout
+                ) as response:
+                    elapsed = time.monotonic() - sent
+                    delay = None
+                    if retry and response.status in RETRY_STATUSES:
+                        delay = self.retry_policy.next_delay(
+                            attempt, started, parse_retry_after(response),
+                            deadline
+                        )
+                    body = None
+                    # Bodies of other responses are not read.
+                    size = response.content_length or 0
+                    if delay is None and response.status == 200:
+                        body = await self._get_body(response)
+                        size = len(await response.read())
+                    metrics.record_response(
+                        labels, response.status, elapsed, size
+                    )
+                    if delay is None:
+                        return response.status, body
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                metrics.record_error(
+                    labels, isinstance(e, asyncio.TimeoutError)
+                )
+                if not retry:
+                    raise
+                delay = self.retry_policy.next_delay(
+                    attempt, started, deadline=deadline
+                )
+                if delay is None:
+                    raise
+            metrics.RETRIES.inc(labels)
+            await asyncio.sleep(delay)
+
+    async def _get_body(self, response):
+        """
+        Gets the JSON body of a response.
+
+        Raises HTTPError exceptions.
+        """
+        if response.status != 200:
+            abort(response.status)
+        data = await response.read()
+        try:
+            return loads(data)
+        except ValueError:
+            return data.decode(response.get_encoding())
+
+
+def _unsupported(name):
+    def method(self, *args, **kwargs):
+        raise TypeError(
+            "AsyncClient does not support %s(); await pages with an "
+            "explicit max_id or max_register_date instead" % name
+        )
+    method.__name__ = name
+    return method
+
+# The iter_* methods page synchronously through _request.
+for _name in dir(Client):
+    if _name.startswith('iter_'):
+        setattr(AsyncClient, _name, _unsupported(_name))
@@ -0,0 +1,184 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Circuit breakers for calls to the CultureMesh API.
+
+Each endpoint family (see urls.endpoint_template) has its own breaker.
+After API_BREAKER_FAILURE_THRESHOLD consecutive upstream failures the
+breaker opens and calls fail at once with CircuitOpenError.  Once
+API_BREAKER_RESET_TIMEOUT_SECS have passed it lets a few probe calls
+through (half-open); a success closes it again, a failure reopens it.
+"""
+
+import collections
+import logging
+import threading
+import time
+import requests
+import config
+
+from culturemesh.client.exceptions import CircuitOpenError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+logger = logging.getLogger(__name__)
+
+def is_failure(response):
+    """
+    Returns whether RESPONSE counts against its endpoint's health.
+    Client errors (404, 401, ...) are the caller's problem, not upstream's.
+    """
+    return response.status_code >= 500
+
+class CircuitBreaker(object):
+    """
+    Three-state breaker guarding one endpoint family.
+    """
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None,
+                 half_open_max_calls=None):
+        """
+        :param name: the endpoint family guarded, e.g. 'event/<id>/reg_count'
+        :param failure_threshold: consecutive failures that open the breaker
+        :param reset_timeout: seconds to stay open before probing
+        :param half_open_max_calls: probe calls allowed at once while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or \
+            config.API_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout if reset_timeout is not None \
+            else config.API_BREAKER_RESET_TIMEOUT_SECS
+        self.half_open_max_calls = half_open_max_calls or \
+            config.API_BREAKER_HALF_OPEN_MAX_CALLS
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probes = 0
+        self.rejected = 0
+        self.trips = 0
+        self.transitions = collections.deque(maxlen=20)
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args):
+        """
+        Returns FN(*ARGS), a requests.Response, recording whether it
+        succeeded.
+
+        Raises CircuitOpenError without calling FN while the breaker is
+        open.
+        """
+        probe = self.before_call()
+        try:
+            response = fn(*args)
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout):
+            self.after_call(probe, False)
+            raise
+        except Exception:
+            # Not upstream's fault (e.g. our own deadline); just free
+            # the probe slot.
+            self.after_call(probe, None)
+            raise
+        self.after_call(probe, not is_failure(response))
+        return response
+
+    def before_call(self):
+        """
+        Returns whether this call is a half-open probe.  Pass it to
+        after_call() once the call is done.
+
+        Raises CircuitOpenError while the breaker is open.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                retry_after = self.opened_at + self.reset_timeout - \
+                    time.monotonic()
+                if retry_after > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, retry_after)
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self.probes >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self.probes += 1
+                return True
+            return False
+
+    def after_call(self, probe, success):
+        """
+        :param success: True, False, or None if the call says nothing
+                        about upstream's health
+        """
+        with self._lock:
+            if probe:
+                self.probes -= 1
+            if success is None:
+                return
+            if success:
+                self.failures = 0
+                if self.state != CLOSED:
+                    self._transition(CLOSED)
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or (
+                    self.state == CLOSED and
+                    self.failures >= self.failure_threshold):
+                self._transition(OPEN)
+
+    def _transition(self, state):
+        # Called with self._lock held.
+        logger.warning(
+            "API circuit '%s': %s -> %s", self.name, self.state, state
+        )
+        self.transitions.append((time.time(), self.state, state))
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.trips += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'trips': self.trips,
+                'transitions': list(self.transitions),
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name):
+    """
+    Returns the process-wide breaker of endpoint family NAME, creating
+    it on first use.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+def breaker_stats():
+    """
+    Returns the state and recent transitions of every breaker, keyed by
+    endpoint family.
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
+
+def reset_breakers():
+    """
+    Forgets every breaker, closing all circuits.
+    """
+    with _breakers_lock:
+        _breakers.clear()
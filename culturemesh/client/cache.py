@@ -0,0 +1,652 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Caches for API responses that rarely change.
+
+Endpoints opt in by name (e.g. client._request(url, Request.GET,
+cache='city')); each named endpoint has its own TTL and hit statistics
+but shares the size bound of the cache it lives in.
+
+Caches are kept by the backend named in config.API_CACHE_BACKEND:
+'process' keeps them in the memory of each process, and 'sqlite' in a
+file that every gunicorn worker on a host shares, so that an entry
+filled by one worker is a hit for all of them.
+
+Aggregate counts (users in a network, replies to a post, ...) are served
+stale-while-revalidate: past their TTL they are still returned at once,
+for up to a bounded staleness, while a background call refreshes them.
+"""
+
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import config
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from culturemesh.client import concurrency
+from culturemesh.client.decoding import loads
+from culturemesh.client.exceptions import RefreshDropped
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend(object):
+    """
+    Storage of a cache: a bounded map from keys to values that expire
+    after a per-entry TTL.
+
+    Subclasses implement _lookup(), set(), get_or_set(), delete(),
+    invalidate(), clear() and __len__(), and keep a generation that
+    every invalidate() changes.
+    """
+
+    # Names the backend in stats() and config.API_CACHE_BACKEND.
+    backend = None
+
+    def __init__(self, maxsize):
+        """
+        :param maxsize: the largest number of entries kept
+        """
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """
+        Returns a (found, value) pair for KEY, refreshing its recency.
+        """
+        found, value = self._lookup(key)
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found, value
+
+    def stats(self):
+        size = len(self)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.backend,
+                'size': size,
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+            }
+
+
+class LRUCache(CacheBackend):
+    """
+    Thread-safe LRU cache kept in the memory of this process.
+    """
+
+    backend = 'process'
+
+    def __init__(self, maxsize):
+        CacheBackend.__init__(self, maxsize)
+        self._entries = OrderedDict()
+        # Key -> [lock, number of callers using it] for get_or_set().
+        self._filling = {}
+        # Bumped by every invalidate(), so that a response fetched before
+        # a write is not stored after the write invalidated it.
+        self.generation = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl=None, generation=None):
+        """
+        :param ttl: seconds until the entry expires; None never expires
+        :param generation: if given, nothing is stored when the cache was
+                           invalidated since it read this generation
+
+        Stores VALUE under KEY, evicting the least recently used
+        entries if the cache is full. Returns whether VALUE was stored.
+        """
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def get_or_set(self, key, compute, ttl=None, timeout=None):
+        """
+        :param compute: returns the value to store if KEY is missing
+        :param timeout: the longest to wait for another caller computing
+                        KEY, after which COMPUTE is called anyway; None
+                        waits for as long as it takes
+
+        Returns a (computed, value) pair: the value under KEY, computed
+        and stored first if KEY was missing.  While one caller computes
+        a key, others wait for its value rather than computing it too.
+        """
+        with self._lock:
+            filling = self._filling.get(key)
+            if filling is None:
+                filling = self._filling[key] = [threading.Lock(), 0]
+            filling[1] += 1
+        try:
+            locked = filling[0].acquire(
+                timeout=-1 if timeout is None else max(0, timeout)
+            )
+            try:
+                found, value = self._lookup(key)
+                if found:
+                    return False, value
+                generation = self.generation
+                value = compute()
+                self.set(key, value, ttl, generation)
+                return True, value
+            finally:
+                if locked:
+                    filling[0].release()
+        finally:
+            with self._lock:
+                filling[1] -= 1
+                if not filling[1]:
+                    del self._filling[key]
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self, match):
+        """
+        :param match: a predicate on keys
+
+        Drops every entry whose key satisfies MATCH and returns how many
+        were dropped.
+        """
+        with self._lock:
+            self.generation += 1
+            keys = [key for key in self._entries if match(key)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    LRU cache kept in a SQLite file shared by every process on the host,
+    so that gunicorn workers share their entries and fill each one once.
+
+    Several caches may share a file; each keeps its entries under its
+    own NAMESPACE.  Values must be JSON-serializable, and come back as
+    they would from the API (tuples as lists).  Hit statistics are
+    counted per process.
+    """
+
+    _SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS entries (namespace TEXT, key TEXT, '
+        'value TEXT, expires_at REAL, used_at REAL, '
+        'PRIMARY KEY (namespace, key))',
+        'CREATE INDEX IF NOT EXISTS entries_used ON entries '
+        '(namespace, used_at)',
+        'CREATE TABLE IF NOT EXISTS generations '
+        '(namespace TEXT PRIMARY KEY, generation INTEGER)',
+        'CREATE TABLE IF NOT EXISTS leases (namespace TEXT, key TEXT, '
+        'expires_at REAL, PRIMARY KEY (namespace, key))',
+    )
+    # Recency is only written back once it is this many seconds old, so
+    # that most hits do not take the write lock.
+    _TOUCH_INTERVAL = 1.0
+    _POLL_INTERVAL = 0.01
+
+    backend = 'sqlite'
+
+    def __init__(self, path, namespace, maxsize, lease=None):
+        """
+        :param path: the SQLite file, created if missing
+        :param namespace: names this cache's entries in the file
+        :param lease: the longest, in seconds, other processes wait for
+                      one computing an entry in get_or_set()
+        """
+        CacheBackend.__init__(self, maxsize)
+        self.path = path
+        self.namespace = namespace
+        self.lease = config.API_CACHE_LEASE_SECS if lease is None else lease
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per thread, reopened after a fork.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in self._SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _write(self):
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        else:
+            connection.execute('COMMIT')
+
+    def _generation(self, connection):
+        row = connection.execute(
+            'SELECT generation FROM generations WHERE namespace = ?',
+            (self.namespace,)
+        ).fetchone()
+        return row[0] if row is not None else 0
+
+    @property
+    def generation(self):
+        return self._generation(self._connect())
+
+    def _lookup(self, key):
+        connection = self._connect()
+        now = time.time()
+        row = connection.execute(
+            'SELECT value, expires_at, used_at FROM entries '
+            'WHERE namespace = ? AND key = ?', (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return False, None
+        value, expires_at, used_at = row
+        if expires_at is not None and expires_at <= now:
+            with self._write() as connection:
+                connection.execute(
+                    'DELETE FROM entries WHERE namespace = ? AND key = ? '
+                    'AND expires_at <= ?', (self.namespace, key, now)
+                )
+            with self._lock:
+                self.expirations += 1
+            return False, None
+        if now - used_at > self._TOUCH_INTERVAL:
+            connection.execute(
+                'UPDATE entries SET used_at = ? '
+                'WHERE namespace = ? AND key = ?', (now, self.namespace, key)
+            )
+        return True, loads(value)
+
+    def set(self, key, value, ttl=None, generation=None):
+        value = json.dumps(value)
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        with self._write() as connection:
+            if generation is not None and \
+                    generation != self._generation(connection):
+                return False
+            connection.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                (self.namespace, key, value, expires_at, now)
+            )
+            size = connection.execute(
+                'SELECT COUNT(*) FROM entries WHERE namespace = ?',
+                (self.namespace,)
+            ).fetchone()[0]
+            if size > self.maxsize:
+                expired = connection.execute(
+                    'DELETE FROM entries WHERE namespace = ? '
+                    'AND expires_at <= ?', (self.namespace, now)
+                ).rowcount
+                evicted = connection.execute(
+                    'DELETE FROM entries WHERE namespace = ? AND key IN '
+                    '(SELECT key FROM entries WHERE namespace = ? '
+                    'ORDER BY used_at LIMIT ?)',
+                    (self.namespace, self.namespace,
+                     max(0, size - expired - self.maxsize))
+                ).rowcount
+                with self._lock:
+                    self.expirations += expired
+                    self.evictions += evicted
+        return True
+
+    def _take_lease(self, key):
+        now = time.time()
+        with self._write() as connection:
+            row = connection.execute(
+                'SELECT expires_at FROM leases '
+                'WHERE namespace = ? AND key = ?', (self.namespace, key)
+            ).fetchone()
+            if row is not None and row[0] > now:
+                return False
+            connection.execute(
+                'INSERT OR REPLACE INTO leases VALUES (?, ?, ?)',
+                (self.namespace, key, now + self.lease)
+            )
+            return True
+
+    def _release_lease(self, key):
+        with self._write() as connection:
+            connection.execute(
+                'DELETE FROM leases WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            )
+
+    def get_or_set(self, key, compute, ttl=None, timeout=None):
+        """
+        Like LRUCache.get_or_set(), across processes: the caller that
+        computes KEY holds a lease on it, and the others poll for its
+        value.  Waiters never wait longer than the lease, in case its
+        holder died.
+        """
+        wait = self.lease if timeout is None else min(self.lease, timeout)
+        give_up = time.time() + wait
+        while True:
+            found, value = self._lookup(key)
+            if found:
+                return False, value
+            leased = self._take_lease(key)
+            if leased or time.time() >= give_up:
+                break
+            time.sleep(self._POLL_INTERVAL)
+        try:
+            generation = self.generation
+            value = compute()
+            self.set(key, value, ttl, generation)
+            return True, value
+        finally:
+            if leased:
+                self._release_lease(key)
+
+    def delete(self, key):
+        with self._write() as connection:
+            connection.execute(
+                'DELETE FROM entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            )
+
+    def invalidate(self, match):
+        with self._write() as connection:
+            keys = [
+                row[0] for row in connection.execute(
+                    'SELECT key FROM entries WHERE namespace = ?',
+                    (self.namespace,)
+                ) if match(row[0])
+            ]
+            connection.executemany(
+                'DELETE FROM entries WHERE namespace = ? AND key = ?',
+                [(self.namespace, key) for key in keys]
+            )
+            connection.execute(
+                'INSERT OR REPLACE INTO generations VALUES (?, ?)',
+                (self.namespace, self._generation(connection) + 1)
+            )
+        with self._lock:
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._write() as connection:
+            for table in ('entries', 'leases'):
+                connection.execute(
+                    'DELETE FROM %s WHERE namespace = ?' % table,
+                    (self.namespace,)
+                )
+
+    def __len__(self):
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM entries WHERE namespace = ? '
+            'AND (expires_at IS NULL OR expires_at > ?)',
+            (self.namespace, time.time())
+        ).fetchone()[0]
+
+
+class CachedEndpoint(object):
+    """
+    An API endpoint whose GET responses are kept in a shared cache.
+    """
+
+    def __init__(self, name, cache, ttl):
+        """
+        :param name: the name endpoints pass to Client._request
+        :param cache: the CacheBackend holding the responses
+        :param ttl: seconds a response stays fresh
+        """
+        self.name = name
+        self.cache = cache
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, refresh=None):
+        """
+        :param refresh: returns a fresh body for KEY; unused here
+
+        Returns a (found, body) pair. The body is a copy, as for the
+        request memo (see RequestScope.memo_get).
+        """
+        found, body = self.cache.get(key)
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if found:
+            return True, copy.deepcopy(body)
+        return False, None
+
+    def get_or_set(self, key, fetch, timeout=None):
+        """
+        :param fetch: returns the body of KEY from upstream
+        :param timeout: the longest to wait for another caller, in this
+                        process or another, already fetching KEY
+
+        Returns a (fetched, body) pair: the cached body of KEY, fetched
+        and cached first if it was missing.
+        """
+        fetched, entry = self.cache.get_or_set(
+            key, lambda: self._entry(fetch()), self._cache_ttl(), timeout
+        )
+        return fetched, self._body(entry)
+
+    def generation(self):
+        """
+        Returns a token to pass to set() along with a body fetched after
+        this call.
+        """
+        return self.cache.generation
+
+    def set(self, key, body, generation=None):
+        """
+        :param generation: if given, the body is dropped when the cache
+                           was invalidated since generation() returned it
+        """
+        self.cache.set(key, self._entry(body), self._cache_ttl(), generation)
+
+    def _entry(self, body):
+        return copy.deepcopy(body)
+
+    def _body(self, entry):
+        return copy.deepcopy(entry)
+
+    def _cache_ttl(self):
+        return self.ttl
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+            }
+
+
+class StaleWhileRevalidateEndpoint(CachedEndpoint):
+    """
+    A cached endpoint whose responses are still served for a while after
+    they go stale, while a background call fetches a fresh one.
+    """
+
+    def __init__(self, name, cache, ttl, max_stale):
+        """
+        :param ttl: seconds a response stays fresh
+        :param max_stale: seconds past its TTL a response may still be
+                          served; after that callers wait for upstream
+        """
+        CachedEndpoint.__init__(self, name, cache, ttl)
+        self.max_stale = max_stale
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self._refreshing = set()
+
+    def get(self, key, refresh=None):
+        """
+        :param refresh: returns a fresh body for KEY; called in the
+                        background when the cached body is stale.  It
+                        may raise RefreshDropped to give up quietly.
+
+        Returns a (found, body) pair, found even if the body is stale.
+        """
+        found, entry = self.cache.get(key)
+        if not found:
+            with self._lock:
+                self.misses += 1
+            return False, None
+
+        fresh_until, body = entry
+        # Wall-clock time, since entries may be shared between processes.
+        stale = fresh_until <= time.time()
+        with self._lock:
+            self.hits += 1
+            start_refresh = stale and refresh is not None and \
+                key not in self._refreshing
+            if stale:
+                self.stale_hits += 1
+            if start_refresh:
+                self._refreshing.add(key)
+                self.refreshes += 1
+        if start_refresh:
+            # On the bare pool, not in the caller's scope: the refresh
+            # must not draw from the deadline of the request that
+            # triggered it.
+            concurrency.get_executor().submit(
+                self._refresh, key, refresh, self.generation()
+            )
+        return True, copy.deepcopy(body)
+
+    def _entry(self, body):
+        return (time.time() + self.ttl, copy.deepcopy(body))
+
+    def _body(self, entry):
+        return copy.deepcopy(entry[1])
+
+    def _cache_ttl(self):
+        return self.ttl + self.max_stale
+
+    def _refresh(self, key, refresh, generation):
+        try:
+            self.set(key, refresh(), generation)
+        except RefreshDropped:
+            logger.debug("Background refresh of '%s' dropped", key)
+        except Exception:
+            logger.warning(
+                "Background refresh of '%s' failed", key, exc_info=True
+            )
+            with self._lock:
+                self.refresh_failures += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self):
+        stats = CachedEndpoint.stats(self)
+        with self._lock:
+            stats.update({
+                'stale_hits': self.stale_hits,
+                'refreshes': self.refreshes,
+                'refresh_failures': self.refresh_failures,
+            })
+        return stats
+
+
+def _make_cache(name, maxsize):
+    backend = config.API_CACHE_BACKEND
+    if backend == 'process':
+        return LRUCache(maxsize)
+    elif backend == 'sqlite':
+        return SQLiteCache(config.API_CACHE_FILE, name, maxsize)
+    raise ValueError("Unknown cache backend '%s'" % backend)
+
+REFERENCE_CACHE = _make_cache('reference', config.API_REFERENCE_CACHE_SIZE)
+COUNT_CACHE = _make_cache('count', config.API_COUNT_CACHE_SIZE)
+
+ENDPOINTS = dict(
+    (name, CachedEndpoint(name, REFERENCE_CACHE, ttl))
+    for name, ttl in config.API_REFERENCE_CACHE_TTLS.items()
+)
+ENDPOINTS.update(
+    (name, StaleWhileRevalidateEndpoint(name, COUNT_CACHE, ttl, max_stale))
+    for name, (ttl, max_stale) in config.API_COUNT_CACHE_TTLS.items()
+)
+
+CACHES = [REFERENCE_CACHE, COUNT_CACHE]
+
+def get_cached_endpoint(name):
+    """
+    Returns the CachedEndpoint registered under NAME.
+    """
+    return ENDPOINTS[name]
+
+def invalidate(match):
+    """
+    Drops the entries whose key satisfies MATCH from every cache.
+    Returns how many were dropped.
+    """
+    return sum(cache.invalidate(match) for cache in CACHES)
+
+def cache_stats():
+    """
+    Returns hit statistics for every cached endpoint and every cache.
+    """
+    return {
+        'reference': REFERENCE_CACHE.stats(),
+        'count': COUNT_CACHE.stats(),
+        'endpoints': dict(
+            (name, endpoint.stats()) for name, endpoint in ENDPOINTS.items()
+        ),
+    }
@@ -0,0 +1,220 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Record/replay of API traffic.
+
+With config.API_CASSETTE_MODE set to 'record', every HTTP request the
+client sends upstream, and the response or error it got back, is
+appended to a cassette: a JSON-lines file at config.API_CASSETTE_FILE.
+With 'replay', requests are answered from the cassette instead of the
+API, at full speed or, if config.API_CASSETTE_REPLAY_LATENCY is set,
+after the latency recorded for them.
+
+Both modes are transport adapters mounted on the shared session (see
+transport.py), so retries, caches, metrics and everything else above
+the wire behave exactly as they would against the live API.  That makes
+replayed page flows a like-for-like benchmark of client optimizations.
+
+The API key is stripped from recorded URLs, and credentials are not
+recorded.  Requests are matched by method and URL, and identical
+requests are answered in the order they were recorded; once those run
+out, the last response is served again.
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+import requests
+
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urlparse
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from culturemesh.client.exceptions import CassetteMissError
+from culturemesh.client.scope import current_scope
+
+# Response headers worth replaying. Transfer headers are left out, since
+# the recorded body is already decoded.
+RECORDED_HEADERS = (
+    'Content-Type', 'ETag', 'Last-Modified', 'Retry-After', 'Cache-Control'
+)
+TIMEOUT = 'timeout'
+CONNECTION_ERROR = 'connection_error'
+
+logger = logging.getLogger(__name__)
+
+def request_url(url):
+    """
+    Returns URL without scheme, host or API key, and with its query
+    parameters sorted.
+    """
+    parsed = urlparse(url)
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parsed.query)
+        if name != 'key'
+    )
+    path = '/'.join(segment for segment in parsed.path.split('/') if segment)
+    return path + ('?' + urlencode(query) if query else '')
+
+def _complete(interaction):
+    """
+    Returns whether INTERACTION recorded a response or a transport error.
+    """
+    return 'status' in interaction or 'error' in interaction
+
+def _read_timeout(timeout):
+    if isinstance(timeout, tuple):
+        return timeout[1]
+    return timeout
+
+class Cassette(object):
+    """
+    The interactions of a cassette file, in the order they happened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._queues = None
+
+    def append(self, interaction):
+        line = json.dumps(interaction, sort_keys=True)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+    def interactions(self):
+        """
+        Returns every interaction recorded in the cassette.
+        """
+        with open(self.path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def next(self, method, url):
+        """
+        Returns the next recorded interaction for METHOD and URL, a URL
+        as returned by request_url().  Interactions recording neither a
+        response nor an error are skipped.
+
+        Raises CassetteMissError if the cassette has none.
+        """
+        with self._lock:
+            if self._queues is None:
+                self._queues = {}
+                for interaction in self.interactions():
+                    if not _complete(interaction):
+                        logger.warning(
+                            "Skipping incomplete cassette interaction: %s %s",
+                            interaction.get('method'), interaction.get('url')
+                        )
+                        continue
+                    self._queues.setdefault(
+                        (interaction['method'], interaction['url']), deque()
+                    ).append(interaction)
+            queue = self._queues.get((method, url))
+            if not queue:
+                raise CassetteMissError(method, url)
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Sends requests upstream and records them, and their outcome, in a
+    cassette. Bodies are read in full before they are returned, so
+    recording defeats streaming.
+    """
+
+    def __init__(self, cassette, *args, **kwargs):
+        HTTPAdapter.__init__(self, *args, **kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        scope = current_scope()
+        interaction = {
+            'method': request.method,
+            'url': request_url(request.url),
+            'page': getattr(scope, 'page', None),
+        }
+        started = time.monotonic()
+        # Other exceptions are not recorded: they cannot be replayed.
+        try:
+            response = HTTPAdapter.send(self, request, **kwargs)
+            content = response.content
+        except requests.exceptions.Timeout:
+            interaction['error'] = TIMEOUT
+            self._record(interaction, started)
+            raise
+        except requests.exceptions.ConnectionError:
+            interaction['error'] = CONNECTION_ERROR
+            self._record(interaction, started)
+            raise
+        interaction['status'] = response.status_code
+        interaction['headers'] = dict(
+            (name, response.headers[name]) for name in RECORDED_HEADERS
+            if name in response.headers
+        )
+        try:
+            interaction['body'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            interaction['body_base64'] = \
+                base64.b64encode(content).decode('ascii')
+        self._record(interaction, started)
+        return response
+
+    def _record(self, interaction, started):
+        interaction['latency'] = time.monotonic() - started
+        self.cassette.append(interaction)
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answers requests from a cassette without going upstream.
+    """
+
+    def __init__(self, cassette, replay_latency=False):
+        """
+        :param replay_latency: if True, each answer is delayed by the
+                               latency recorded for it
+        """
+        BaseAdapter.__init__(self)
+        self.cassette = cassette
+        self.replay_latency = replay_latency
+
+    def send(self, request, stream=False, timeout=None, verify=True,
+             cert=None, proxies=None):
+        interaction = self.cassette.next(
+            request.method, request_url(request.url)
+        )
+        if self.replay_latency:
+            latency = interaction['latency']
+            read_timeout = _read_timeout(timeout)
+            if read_timeout is not None and latency > read_timeout:
+                time.sleep(read_timeout)
+                raise requests.exceptions.ReadTimeout(request=request)
+            time.sleep(latency)
+
+        error = interaction.get('error')
+        if error == TIMEOUT:
+            raise requests.exceptions.ReadTimeout(request=request)
+        elif error == CONNECTION_ERROR:
+            raise requests.exceptions.ConnectionError(request=request)
+
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        if 'body_base64' in interaction:
+            response._content = base64.b64decode(interaction['body_base64'])
+        else:
+            response._content = interaction['body'].encode('utf-8')
+        response._content_consumed = True
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
@@ -13,10 +13,30 @@ HTTP requests).
 import requests
 import os
 import json
+import time
 import datetime
 import config
 import culturemesh
 from culturemesh import app
+from culturemesh.client.transport import get_session
+from culturemesh.client.ratelimit import get_limiter
+from culturemesh.client.retry import RetryPolicy
+from culturemesh.client.retry import RETRY_STATUSES
+from culturemesh.client.retry import parse_retry_after
+from culturemesh.client.scope import current_scope
+from culturemesh.client.cache import get_cached_endpoint
+from culturemesh.client.conditional import VALIDATOR_STORE
+from culturemesh.client.singleflight import IN_FLIGHT
+from culturemesh.client import concurrency
+from culturemesh.client import metrics
+from culturemesh.client import ledger
+from culturemesh.client.urls import canonical_key
+from culturemesh.client.urls import endpoint_template
+from culturemesh.client.breaker import get_breaker
+from culturemesh.client.streaming import iter_response
+from culturemesh.client.decoding import decode_body
+from culturemesh.client.exceptions import DeadlineExceeded
+from culturemesh.client.mock_store import make_mock_store
 from difflib import SequenceMatcher
 from flask import abort
 from urllib.parse import urlparse
@@ -34,8 +54,25 @@ LANG_DATA_LOC = os.path.join(app.root_path, "../data/mock/db_mock_languages.json
 CITY_DATA_LOC = os.path.join(app.root_path, "../data/mock/db_mock_location_cities.json")
 REGION_DATA_LOC = os.path.join(app.root_path, "../data/mock/db_mock_location_regions.json")
 COUNTRY_DATA_LOC = os.path.join(app.root_path, "../data/mock/db_mock_location_countries.json")
+TABLES_LOC = os.path.join(app.root_path, "../data/tables.txt")
 KEY = os.environ['CULTUREMESH_API_KEY']
 
+# Mock datasets, named after their tables in TABLES_LOC.
+MOCK_DATA_LOCS = {
+	'users': USER_DATA_LOC,
+	'posts': POST_DATA_LOC,
+	'post_replies': POST_REPLY_DATA_LOC,
+	'events': EVENT_DATA_LOC,
+	'event_registration': EVENT_REGISTRATION_LOC,
+	'network_registration': NET_REGISTRATION_LOC,
+	'networks': NETWORK_DATA_LOC,
+	'languages': LANG_DATA_LOC,
+	'cities': CITY_DATA_LOC,
+	'regions': REGION_DATA_LOC,
+	'countries': COUNTRY_DATA_LOC,
+}
+MOCK_STORE = make_mock_store(MOCK_DATA_LOCS, TABLES_LOC)
+
 class Request(IntEnum):
 	GET = 1
 	POST = 2
@@ -55,8 +92,40 @@ class Client(object):
 
 		self.mock = mock
 		# See: http://docs.python-requests.org/en/master/user/advanced/
-		#	  not used yet.
-		self.session = requests.Session()
+		# All clients in this process share one pooled keep-alive session.
+		self.session = get_session()
+
+		# Shared by every client in the process with the same budget.
+		self.limiter = get_limiter(queries_per_second)
+		self.retry_policy = RetryPolicy(retry_timeout)
+
+		# List calls asking for more items than this are read page by page.
+		self.max_page_size = config.API_MAX_PAGE_SIZE
+
+		# Seconds allowed to connect to, and between reads from, the API.
+		# TIMEOUT sets both unless a more specific value is given.
+		if timeout is None:
+			timeout = (config.API_CONNECT_TIMEOUT_SECS,
+					   config.API_READ_TIMEOUT_SECS)
+		else:
+			timeout = (timeout, timeout)
+		self.connect_timeout = connect_timeout
+		if connect_timeout is None:
+			self.connect_timeout = timeout[0]
+		self.read_timeout = read_timeout
+		if read_timeout is None:
+			self.read_timeout = timeout[1]
+
+	def gather(self, *calls, return_exceptions=False):
+		"""
+		:param calls: (method, arg, ...) tuples, e.g. (c.get_network, 5)
+		:param return_exceptions: if True, failed calls yield their exception
+		                          in place of a result instead of raising
+
+		Runs independent client calls concurrently on a bounded thread
+		pool and returns their results in order.
+		"""
+		return concurrency.gather(calls, return_exceptions=return_exceptions)
 
 	def _request(self,
 				 url,
@@ -65,36 +134,298 @@ class Client(object):
 				 body_data=None,
 				 json=None,
 				 body_extractor=None,
-				 basic_auth=None):
+				 basic_auth=None,
+				 retry=None,
+				 cache=None,
+				 stream=False):
 		"""
 		Carries out HTTP requests.
 
+		GET requests are retried on connection errors and 429/5xx
+		responses.  Other methods are only retried if RETRY is True.
+
+		Inside a Flask request, identical GETs are only sent upstream
+		once; any other method clears that request's memo.  GETs naming
+		a CACHE endpoint are also cached across requests.
+
+		GETs whose last response carried an ETag or Last-Modified header
+		are sent conditionally; a 304 is answered from the stored body.
+
+		Inside a Flask request, calls draw from the request's deadline
+		and raise DeadlineExceeded once it has passed.
+
+		Calls to an endpoint family whose circuit breaker is open raise
+		CircuitOpenError without going upstream.
+
+		If STREAM is set, the body must be a JSON list; an iterator over
+		its elements is returned, decoding each as it arrives.  Streamed
+		bodies are not memoized or cached.
+
 		Returns body as JSON.
 		"""
 		if self.mock:
-			return self._mock_request(url, query_params, body_data)
+			body = self._mock_request(url, query_params, body_data)
+			return iter(body) if stream else body
+
+		scope = current_scope()
+		key = canonical_key(url, query_params, basic_auth)
+		endpoint = endpoint_template(url)
+		if scope is None:
+			return self._fetch(
+				scope, key, endpoint, url, request_method, query_params,
+				body_data, json, basic_auth, retry, cache, stream
+			)[1]
+
+		started = time.monotonic()
+		source = ledger.ERROR
+		try:
+			source, body = self._fetch(
+				scope, key, endpoint, url, request_method, query_params,
+				body_data, json, basic_auth, retry, cache, stream
+			)
+			return body
+		finally:
+			scope.ledger.record(
+				endpoint, request_method.name, key, source,
+				time.monotonic() - started
+			)
+
+	def _fetch(self, scope, key, endpoint, url, request_method, query_params,
+			   body_data, json, basic_auth, retry, cache, stream):
+		"""
+		Carries out _request for a call named KEY, once the mock and the
+		ledger are out of the way.
+
+		Returns a (source, body) pair, where source names what answered
+		the call (see ledger.py).
+		"""
+		if scope is not None:
+			if request_method == Request.GET:
+				found, body = scope.memo_get(key)
+				if found:
+					return ledger.MEMO, iter(body) if stream else body
+			else:
+				scope.memo_clear()
 
+		args = (
+			key, endpoint, url, request_method, query_params, body_data,
+			json, basic_auth, retry, stream
+		)
+
+		cached_endpoint = None
+		if cache is not None and request_method == Request.GET:
+			cached_endpoint = get_cached_endpoint(cache)
+			found, body = cached_endpoint.get(
+				key, lambda: self._fetch_upstream(*args)[1]
+			)
+			if found:
+				return ledger.CACHE, iter(body) if stream else body
+		if cached_endpoint is not None and not stream:
+			# Fill the entry once, however many threads and workers
+			# missed it at the same time.
+			sources = []
+			def fill():
+				source, body = self._fetch_shared(scope, args)
+				sources.append(source)
+				return body
+			fetched, body = cached_endpoint.get_or_set(
+				key, fill, self._remaining(scope)
+			)
+			source = sources[0] if fetched else ledger.CACHE
+		else:
+			source, body = self._fetch_shared(scope, args)
+		if stream:
+			return source, body
+
+		if scope is not None and request_method == Request.GET:
+			scope.memo_set(key, body)
+		return source, body
+
+	def _fetch_shared(self, scope, args):
+		"""
+		Carries out _fetch_upstream(*ARGS), sharing the response of an
+		identical GET already in flight.
+
+		Returns a (source, body) pair.
+		"""
+		key, request_method, stream = args[0], args[3], args[9]
+		if (request_method == Request.GET and not stream and
+				config.API_SINGLE_FLIGHT):
+			timeout = self._remaining(scope)
+			shared, (source, body) = IN_FLIGHT.do(
+				key, timeout, self._fetch_upstream, *args
+			)
+			if shared:
+				source = ledger.COALESCED
+			return source, body
+		return self._fetch_upstream(*args)
+
+	def _fetch_upstream(self, key, endpoint, url, request_method, query_params,
+						body_data, json, basic_auth, retry, stream):
+		"""
+		Carries out _fetch for a call that neither the request memo nor
+		the cache could answer.
+
+		Returns a (source, body) pair.
+		"""
+		url = self._build_url(url, query_params)
+
+		# GET requests never carry a body.
+		if request_method == Request.GET:
+			json = body_data = None
+
+		if retry is None:
+			retry = request_method == Request.GET
+
+		headers = None
+		conditional = (request_method == Request.GET and not stream and
+					   config.API_CONDITIONAL_REQUESTS)
+		if conditional:
+			headers = VALIDATOR_STORE.conditional_headers(key)
+
+		response = self._send(
+			request_method, url, json, body_data, basic_auth, retry, headers,
+			endpoint, stream
+		)
+		if stream:
+			return ledger.UPSTREAM, self._iter_body(response)
+
+		source = ledger.UPSTREAM
+		found = False
+		if headers:
+			if response.status_code == 304:
+				found, body = VALIDATOR_STORE.revalidated(key)
+				if found:
+					source = ledger.NOT_MODIFIED
+				else:
+					# Evicted since the request went out: fetch it in full.
+					response = self._send(
+						request_method, url, json, body_data, basic_auth, retry,
+						endpoint=endpoint
+					)
+			else:
+				VALIDATOR_STORE.modified()
+		if not found:
+			body = self._get_body(response)
+			if conditional:
+				VALIDATOR_STORE.store(key, response, body)
+		return source, body
+
+	def _build_url(self, url, query_params):
+		"""
+		Returns the full upstream URL for an API path.
+		"""
 		# This is always controlled by us, not by the user.
 		url = "%s/%s?key=%s" % (self._api_base_url_, url, KEY)
 		if query_params is not None:
 			for param in query_params:
 				url += "&%s=%s" % (param, query_params[param])
+		return url
 
-		if request_method == Request.GET:
-			response = requests.get(url, auth=basic_auth)
-		elif request_method == Request.POST:
-			response = requests.post(
-				url, json=json, data=body_data, auth=basic_auth
-			)
-		elif request_method == Request.PUT:
-			response = requests.put(
-				url, json=json, data=body_data, auth=basic_auth
-			)
-		elif request_method == Request.DELETE:
-			response = requests.delete(
-				url, json=json, data=body_data, auth=basic_auth
+	def _send(self, request_method, url, json, body_data, basic_auth, retry,
+			  headers=None, endpoint=None, stream=False):
+		"""
+		Sends a request through the shared session, retrying with
+		backoff if RETRY is set.  No attempt outlives the current
+		request's deadline.
+
+		If given, ENDPOINT is the endpoint template of the request: its
+		circuit breaker sees the final outcome, and every attempt is
+		recorded in its metrics.
+
+		Returns the final requests.Response.
+		"""
+		if endpoint is None:
+			return self._send_attempts(
+				request_method, url, json, body_data, basic_auth, retry,
+				headers, 'unknown', stream
 			)
-		return self._get_body(response)
+		return get_breaker(endpoint).call(
+			self._send_attempts, request_method, url, json, body_data,
+			basic_auth, retry, headers, endpoint, stream
+		)
+
+	def _send_attempts(self, request_method, url, json, body_data, basic_auth,
+					   retry, headers, endpoint, stream):
+		"""
+		Carries out the attempts of _send.
+		"""
+		labels = (endpoint, request_method.name)
+		scope = current_scope()
+		deadline = scope.deadline if scope is not None else None
+		started = time.monotonic()
+		attempt = 0
+		while True:
+			attempt += 1
+			remaining = self._remaining(scope)
+			if self.limiter is not None:
+				max_wait = self.limiter.max_wait
+				if remaining is not None:
+					max_wait = remaining if max_wait is None \
+						else min(max_wait, remaining)
+				self.limiter.acquire(max_wait)
+				remaining = self._remaining(scope)
+			timeout = (self.connect_timeout, self.read_timeout)
+			if remaining is not None:
+				timeout = tuple(min(t, remaining) for t in timeout)
+			sent = time.monotonic()
+			try:
+				response = self.session.request(
+					request_method.name, url, json=json, data=body_data,
+					auth=basic_auth, headers=headers, timeout=timeout,
+					stream=stream
+				)
+			except (requests.exceptions.ConnectionError,
+					requests.exceptions.Timeout) as e:
+				metrics.record_error(
+					labels, isinstance(e, requests.exceptions.Timeout)
+				)
+				if not retry:
+					raise
+				delay = self.retry_policy.next_delay(
+					attempt, started, deadline=deadline
+				)
+				if delay is None:
+					raise
+			else:
+				self._record_response(
+					labels, response, time.monotonic() - sent, stream
+				)
+				if not retry or response.status_code not in RETRY_STATUSES:
+					return response
+				delay = self.retry_policy.next_delay(
+					attempt, started, parse_retry_after(response), deadline
+				)
+				if delay is None:
+					return response
+				response.close()
+			metrics.RETRIES.inc(labels)
+			time.sleep(delay)
+
+	def _record_response(self, labels, response, elapsed, stream):
+		"""
+		Records an upstream attempt that got RESPONSE after ELAPSED seconds.
+		"""
+		if stream:
+			# The body has not been read yet.
+			size = int(response.headers.get('Content-Length') or 0)
+		else:
+			size = len(response.content)
+		metrics.record_response(labels, response.status_code, elapsed, size)
+
+	def _remaining(self, scope):
+		"""
+		Returns the seconds left in SCOPE's deadline, or None if there
+		is no deadline.
+
+		Raises DeadlineExceeded if it has already passed.
+		"""
+		if scope is None:
+			return None
+		remaining = scope.remaining()
+		if remaining is not None and remaining <= 0:
+			raise DeadlineExceeded(scope.budget)
+		return remaining
 
 	def _get_body(self, response):
 		"""
@@ -104,10 +435,19 @@ class Client(object):
 		"""
 		if response.status_code != 200:
 			abort(response.status_code)
-		try:
-			return response.json()
-		except json.decoder.JSONDecodeError:
-			return response.text
+		return decode_body(response)
+
+	def _iter_body(self, response):
+		"""
+		Returns an iterator over the elements of a JSON list response,
+		decoded as the body is downloaded.
+
+		Raises HTTPError exceptions.
+		"""
+		if response.status_code != 200:
+			response.close()
+			abort(response.status_code)
+		return iter_response(response, config.API_STREAM_CHUNK_BYTES)
 
 	########################### MOCK DATA METHODS BELOW ##########################
 
@@ -230,29 +570,13 @@ class Client(object):
 
 	def _mock_get_users(self, query_params):
 		self._mock_ensure_count(query_params)
-		count = query_params['count']
-		with open(USER_DATA_LOC) as users:
-			users = sorted(json.load(users), key=lambda x: x['id'], reverse=True)
-			max_id = users[0]['id']
-			if 'max_id' in query_params:
-				max_id = query_params['max_id']
-
-			result = []
-			for u in users:
-				if count == 0:
-					break
-				if u['id'] <= max_id:
-					result.append(u)
-					count -= 1
-
-			return result
+		return MOCK_STORE.page(
+			'users', None, None, 'id', query_params['count'],
+			query_params.get('max_id')
+		)
 
 	def _mock_get_user(self, id_user):
-		with open(USER_DATA_LOC) as users:
-			users = json.load(users)
-			for u in users:
-				if u['id'] == id_user:
-					return u
+		return MOCK_STORE.get('users', id_user)
 
 	def _mock_get_user_networks(self, id_user, query_params):
 		"""
@@ -260,123 +584,54 @@ class Client(object):
 		joined networks first.
 		"""
 		self._mock_ensure_count(query_params)
-		count = query_params['count']
-		with open(NET_REGISTRATION_LOC) as network_reg:
-			user_network_regs = []
-			network_reg = json.load(network_reg)
-			for n_reg in network_reg:
-				if n_reg['id_user'] == id_user:
-					user_network_regs.append(n_reg)
-
-			if len(user_network_regs) == 0:
-				return []
-
-			# Sort in reverse join-date order, i.e. latest joins go first
-			user_network_regs = sorted(
-				user_network_regs,
-				key=lambda x: self._mock_str_to_date(x['join_date']),
-				reverse=True
-			)
-
-			max_date = self._mock_str_to_date(user_network_regs[0]['join_date'])
-			if 'max_register_date' in query_params:
-				max_date = self._mock_str_to_date(query_params['max_register_date'])
-
-			# Construct the id's of the networks according to pagination
-			network_ids = []
-			for n in user_network_regs:
-				if count == 0:
-					break
-
-				if self._mock_str_to_date(n['join_date']) <= max_date:
-					network_ids.append(n['id_network'])
-					count -= 1
+		# Latest joins go first. Dates are stored in DATETIME_FMT_STR, so
+		# they sort as strings.
+		user_network_regs = MOCK_STORE.page(
+			'network_registration', 'id_user', id_user, 'join_date',
+			query_params['count'], self._mock_max_date(query_params)
+		)
 
-			# Fetch the network objects
-			networks = []
-			for network_id in network_ids:
-				network = self._mock_get_network(network_id)
-				if network is not None:
-					networks.append(network)
-			return networks
+		# Fetch the network objects
+		networks = []
+		for n in user_network_regs:
+			network = self._mock_get_network(n['id_network'])
+			if network is not None:
+				networks.append(network)
+		return networks
 
 	def _mock_get_user_posts(self, id_user, query_params):
 		self._mock_ensure_count(query_params)
-		count = query_params['count']
-		with open(POST_DATA_LOC) as posts:
-			user_posts = []
-			posts = json.load(posts)
-			for p in posts:
-				if p['id_user'] == id_user:
-					user_posts.append(p)
-
-			if len(user_posts) == 0:
-				return user_posts
-
-			# Sort in reverse id order.
-			user_posts = sorted(user_posts, key=lambda x: x['id'], reverse=True)
-			max_id = user_posts[0]['id']
-			if 'max_id' in query_params:
-				max_id = query_params['max_id']
-
-			res = []
-			for p in user_posts:
-				if count == 0:
-					break
-				if p['id'] <= max_id:
-					res.append(p)
-					count -= 1
-
-			return res
+		return self._pagination(
+			query_params, 'posts', 'id_user', id_user, key='id'
+		)
 
 	def _mock_get_user_events_hosting(self, id_user, query_params):
 		self._mock_ensure_count(query_params)
-		count = query_params['count']
-		with open(EVENT_DATA_LOC) as events:
-			user_hosting = []
-			events = json.load(events)
-			for e in events:
-				if e['id_host'] == id_user:
-					user_hosting.append(e)
-			if len(user_hosting) == 0:
-				return user_hosting
-
-			user_hosting = sorted(user_hosting, key=lambda x: x['id'], reverse=True)
-			max_id = user_hosting[0]['id']
-			if 'max_id' in query_params:
-				max_id = query_params['max_id']
-
-			res = []
-			for e in user_hosting:
-				if count == 0:
-					break
-				if e['id'] <= max_id:
-					res.append(e)
-					count -= 1
-			return res
-
-	def _pagination(self, query_params, objects, key='id'):
-		""" Pagination """
+		return self._pagination(
+			query_params, 'events', 'id_host', id_user, key='id'
+		)
+
+	def _pagination(self, query_params, name, field, value, key='id'):
+		"""
+		Pagination: returns the records of mock dataset NAME whose FIELD
+		is VALUE (every record if FIELD is None), in reverse KEY order,
+		as selected by the 'count' and 'max_id' query parameters.
+		"""
 		self._mock_ensure_count(query_params)
-		count = query_params['count']
-		if len(objects) == 0:
-			return objects
-
-		# Sort in reverse id order.
-		objects = sorted(objects, key=lambda x: x[key], reverse=True)
-		max_id = objects[0][key]
-		if 'max_id' in query_params:
-			max_id = query_params['max_id']
-
-		res = []
-		for p in objects:
-			if count == 0:
-				break
-			if p[key] <= max_id:
-				res.append(p)
-				count -= 1
-
-		return res
+		return MOCK_STORE.page(
+			name, field, value, key, query_params['count'],
+			query_params.get('max_id')
+		)
+
+	def _mock_max_date(self, query_params):
+		"""
+		Returns the 'max_register_date' query parameter, checked against
+		DATETIME_FMT_STR, or None.
+		"""
+		max_date = query_params.get('max_register_date')
+		if max_date is not None:
+			max_date = str(self._mock_str_to_date(max_date))
+		return max_date
 
 	def filter_networks(self, filter_params, networks):
 		"""
@@ -384,9 +639,9 @@ class Client(object):
 		"""
 		def similarity(a, b):
 		    return SequenceMatcher(None, a, b).ratio()
-		cities = {c["id"]:c["name"] for c in json.load(open(CITY_DATA_LOC))}
-		countries = {c["id"]:c["name"] for c in json.load(open(COUNTRY_DATA_LOC))}
-		regions = {r["id"]:r["name"] for r in json.load(open(REGION_DATA_LOC))}
+		cities = {c["id"]:c["name"] for c in MOCK_STORE.all('cities')}
+		countries = {c["id"]:c["name"] for c in MOCK_STORE.all('countries')}
+		regions = {r["id"]:r["name"] for r in MOCK_STORE.all('regions')}
 		N = len(networks)
 		query_near = filter_params["near"]
 		networks_cur_countries = [countries[net["location_cur"]["country_id"]] for net in networks]
@@ -421,13 +676,11 @@ class Client(object):
 			net["search_rank"] = similarity[i]
 
 	def _mock_get_networks(self, query_params, body_params):
-		with open(NETWORK_DATA_LOC) as networks:
-			networks = sorted(json.load(networks), key=lambda x: x['id'], reverse=True)
-			networks = self._pagination(query_params, objects=networks, key='id')
-			if body_params and "filter" in body_params and body_params["filter"]:
-				self.filter_networks(body_params["filter"], networks)
-				networks = sorted(networks, key=lambda x: x['search_rank'], reverse=True)
-			return networks
+		networks = self._pagination(query_params, 'networks', None, None, key='id')
+		if body_params and "filter" in body_params and body_params["filter"]:
+			self.filter_networks(body_params["filter"], networks)
+			networks = sorted(networks, key=lambda x: x['search_rank'], reverse=True)
+		return networks
 
 
 	def _mock_get_network(self, network_id):
@@ -435,52 +688,32 @@ class Client(object):
 		Returns mock data for a single
 		network.
 		"""
-		with open(NETWORK_DATA_LOC) as networks:
-			networks = json.load(networks)
-			for n in networks:
-				if n['id'] == network_id:
-					return n
+		return MOCK_STORE.get('networks', network_id)
 
 	def _mock_get_network_posts(self, network_id, query_params):
-		with open(POST_DATA_LOC) as posts:
-			network_posts = []
-			posts = json.load(posts)
-			for p in posts:
-				if p['id_network'] == network_id:
-					network_posts.append(p)
-			return self._pagination(query_params, objects=network_posts, key='id')
+		return self._pagination(
+			query_params, 'posts', 'id_network', network_id, key='id'
+		)
 
 	def _mock_get_network_events(self, network_id, query_params):
 		"""
 		Returns events associated with this
 		"""
-		with open(EVENT_DATA_LOC) as events:
-			network_events = []
-			events = json.load(events)
-			for p in events:
-				if p['id_network'] == network_id:
-					network_events.append(p)
-			return self._pagination(query_params, objects=network_events, key='id')
+		return self._pagination(
+			query_params, 'events', 'id_network', network_id, key='id'
+		)
 
 	def _mock_get_network_users(self, network_id, query_params):
 		"""
 		Return mock list of network registration jsons associated with the network.
 		"""
-		with open(NET_REGISTRATION_LOC) as registrations:
-			network_registration = []
-			registrations = json.load(registrations)
-			for p in registrations:
-				if p['id_network'] == network_id:
-					network_registration.append(p)
-			return self._pagination(query_params, objects=network_registration, key='join_date')
+		return self._pagination(
+			query_params, 'network_registration', 'id_network', network_id,
+			key='join_date'
+		)
 
 	def _mock_get_post(self, post_id):
-		with open(POST_DATA_LOC) as posts:
-			posts = json.load(posts)
-			for p in posts:
-				if p['id'] == post_id:
-					return p
-			return None
+		return MOCK_STORE.get('posts', post_id)
 
 	def _mock_get_post_replies(self, post_id, query_params):
 		"""
@@ -488,41 +721,15 @@ class Client(object):
 		post.
 		"""
 		self._mock_ensure_count(query_params)
-		count = query_params['count']
-		with open(POST_REPLY_DATA_LOC) as post_replies:
-			post_replies_ = []
-			post_replies = json.load(post_replies)
-			for p in post_replies:
-				if p['id_parent'] == post_id:
-					post_replies_.append(p)
-
-			if len(post_replies_) == 0:
-				return post_replies_
-
-			post_replies_ = sorted(post_replies_, key=lambda x: x['id'], reverse=True)
-			max_id = post_replies_[0]['id']
-			if 'max_id' in query_params:
-				max_id = query_params['max_id']
-
-			res = []
-			for repl in post_replies_:
-				if count == 0:
-					break
-				if repl['id'] <= max_id:
-					res.append(repl)
-					count -= 1
-			return res
+		return self._pagination(
+			query_params, 'post_replies', 'id_parent', post_id, key='id'
+		)
 
 	def _mock_get_event(self, event_id):
 		"""
 		Returns this mock event.
 		"""
-		with open(EVENT_DATA_LOC) as events:
-			events = json.load(events)
-			for e in events:
-				if e['id'] == event_id:
-					return e
-			return None
+		return MOCK_STORE.get('events', event_id)
 
 	def _mock_get_event_registration(self, event_id, query_params):
 		"""
@@ -530,65 +737,28 @@ class Client(object):
 		this event.
 		"""
 		self._mock_ensure_count(query_params)
-		count = query_params['count']
-		with open(EVENT_REGISTRATION_LOC) as event_regs:
-			event_regs_ = []
-			event_regs = json.load(event_regs)
-			for reg in event_regs:
-				if reg['id_event'] == event_id:
-					event_regs_.append(reg)
-
-			if len(event_regs_) == 0:
-				return event_regs_
-
-			sort_key = lambda x: self._mock_str_to_date(x['date_registered'])
-			event_regs_ = sorted(event_regs_, key=sort_key, reverse=True)
-			max_date = self._mock_str_to_date(event_regs_[0]['date_registered'])
-			if 'max_register_date' in query_params:
-				max_date = self._mock_str_to_date(query_params['max_register_date'])
-
-			res = []
-			for e in event_regs_:
-				if count == 0:
-					break
-
-				if self._mock_str_to_date(e['date_registered']) <= max_date:
-					res.append(e)
-					count -= 1
-			return res
+		return MOCK_STORE.page(
+			'event_registration', 'id_event', event_id, 'date_registered',
+			query_params['count'], self._mock_max_date(query_params)
+		)
 
 	def _mock_get_city(self, city_id):
 		"""
 		Returns mock data for this city.
 		"""
-		with open(CITY_DATA_LOC) as cities:
-			cities = json.load(cities)
-			for c in cities:
-				if c['id'] == city_id:
-					return c
-			return None
+		return MOCK_STORE.get('cities', city_id)
 
 	def _mock_get_region(self, region_id):
 		"""
 		Returns mock data for this region.
 		"""
-		with open(REGION_DATA_LOC) as regions:
-			regions = json.load(regions)
-			for r in regions:
-				if r['id'] == region_id:
-					return r
-			return None
+		return MOCK_STORE.get('regions', region_id)
 
 	def _mock_get_country(self, country_id):
 		"""
 		Returns mock data for country.
 		"""
-		with open(COUNTRY_DATA_LOC) as countries:
-			countries = json.load(countries)
-			for c in countries:
-				if c['id'] == country_id:
-					return c
-			return None
+		return MOCK_STORE.get('countries', country_id)
 
 	def _mock_location_autocomplete(self, input_text):
 		"""
@@ -600,12 +770,7 @@ class Client(object):
 		"""
 		Returns mock data for language.
 		"""
-		with open(LANG_DATA_LOC) as langs:
-			langs = json.load(langs)
-			for l in langs:
-				if l['id'] == lang_id:
-					return l
-			return None
+		return MOCK_STORE.get('languages', lang_id)
 
 	def _mock_language_autocomplete(self, input_text):
 		"""
@@ -623,6 +788,8 @@ from .events import create_event
 from .events import update_event
 from .events import delete_event
 from .events import get_events_attending_in_network
+from .events import iter_event_registrations
+from .events import iter_events_attending_in_network
 from .languages import get_language
 from .languages import language_autocomplete
 from .locations import get_city
@@ -646,6 +813,10 @@ from .users import get_user_posts
 from .users import get_user_events
 from .users import get_user_events_hosting
 from .users import get_user_events_attending
+from .users import iter_user_networks
+from .users import iter_user_events
+from .users import iter_user_events_hosting
+from .users import iter_user_events_attending
 from .users import create_user
 from .users import join_event_as_host
 from .users import join_event_as_guest
@@ -658,22 +829,28 @@ from .networks import get_networks
 from .networks import get_network
 from .networks import get_network_posts
 from .networks import get_network_events
+from .networks import iter_network_posts
+from .networks import iter_network_events
 from .networks import get_network_users
 from .networks import get_network_user_count
 from .networks import get_network_post_count
+from .invalidation import invalidating
 
 # We may consider adding a wrapper around these assignments
 # below to introduce more specific features for the client.
+# Mutations are wrapped to invalidate the responses they change.
 
 Client.get_token = get_token
 Client.ping_event = ping_event
 Client.get_event = get_event
 Client.get_event_registration_list = get_event_registration_list
 Client.get_event_reg_count = get_event_reg_count
-Client.create_event = create_event
-Client.update_event = update_event
-Client.delete_event = delete_event
+Client.create_event = invalidating(create_event)
+Client.update_event = invalidating(update_event)
+Client.delete_event = invalidating(delete_event)
 Client.get_events_attending_in_network = get_events_attending_in_network
+Client.iter_event_registrations = iter_event_registrations
+Client.iter_events_attending_in_network = iter_events_attending_in_network
 Client.get_language = get_language
 Client.language_autocomplete = language_autocomplete
 Client.get_city = get_city
@@ -685,10 +862,10 @@ Client.get_post = get_post
 Client.get_post_reply = get_post_reply
 Client.get_post_replies = get_post_replies
 Client.get_post_reply_count = get_post_reply_count
-Client.create_post = create_post
-Client.create_post_reply = create_post_reply
-Client.update_post = update_post
-Client.update_post_reply = update_post_reply
+Client.create_post = invalidating(create_post)
+Client.create_post_reply = invalidating(create_post_reply)
+Client.update_post = invalidating(update_post)
+Client.update_post_reply = invalidating(update_post_reply)
 Client.ping_user = ping_user
 Client.get_users = get_users
 Client.get_user = get_user
@@ -697,18 +874,24 @@ Client.get_user_posts = get_user_posts
 Client.get_user_events = get_user_events
 Client.get_user_events_hosting = get_user_events_hosting
 Client.get_user_events_attending = get_user_events_attending
-Client.create_user = create_user
-Client.join_event_as_guest = join_event_as_guest
-Client.join_event_as_host = join_event_as_host
-Client.leave_event = leave_event
-Client.join_network = join_network
-Client.leave_network = leave_network
-Client.update_user = update_user
+Client.iter_user_networks = iter_user_networks
+Client.iter_user_events = iter_user_events
+Client.iter_user_events_hosting = iter_user_events_hosting
+Client.iter_user_events_attending = iter_user_events_attending
+Client.create_user = invalidating(create_user)
+Client.join_event_as_guest = invalidating(join_event_as_guest)
+Client.join_event_as_host = invalidating(join_event_as_host)
+Client.leave_event = invalidating(leave_event)
+Client.join_network = invalidating(join_network)
+Client.leave_network = invalidating(leave_network)
+Client.update_user = invalidating(update_user)
 Client.ping_network = ping_network
 Client.get_networks = get_networks
 Client.get_network = get_network
 Client.get_network_posts = get_network_posts
 Client.get_network_events = get_network_events
+Client.iter_network_posts = iter_network_posts
+Client.iter_network_events = iter_network_events
 Client.get_network_users = get_network_users
 Client.get_network_user_count = get_network_user_count
 Client.get_network_post_count = get_network_post_count
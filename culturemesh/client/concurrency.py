@@ -0,0 +1,107 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Runs independent client calls concurrently on a bounded, process-wide
+thread pool.
+"""
+
+import threading
+import config
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from culturemesh.client.scope import bind_scope
+from culturemesh.client.scope import current_scope
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+def get_executor():
+    """
+    Returns the process-wide thread pool, creating it on first use.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=config.API_GATHER_MAX_WORKERS,
+                    thread_name_prefix='culturemesh-api'
+                )
+    return _executor
+
+def _call(function, args):
+    """
+    Returns a (succeeded, result or exception) pair.
+    """
+    try:
+        return True, function(*args)
+    except Exception as e:
+        return False, e
+
+def _call_in_pool(scope, function, args):
+    _local.in_pool = True
+    with bind_scope(scope):
+        return _call(function, args)
+
+def _run_in_pool(scope, function, args):
+    _local.in_pool = True
+    with bind_scope(scope):
+        return function(*args)
+
+def submit(function, *args):
+    """
+    Starts FUNCTION(*ARGS) in the background, in the caller's request
+    scope, and returns a concurrent.futures.Future for its result.
+
+    From inside the pool the call runs inline and the returned future is
+    already done.
+    """
+    if getattr(_local, 'in_pool', False):
+        future = Future()
+        succeeded, result = _call(function, args)
+        if succeeded:
+            future.set_result(result)
+        else:
+            future.set_exception(result)
+        return future
+    return get_executor().submit(
+        _run_in_pool, current_scope(), function, args
+    )
+
+def gather(calls, return_exceptions=False):
+    """
+    :param calls: a list of (function, arg, ...) tuples
+    :param return_exceptions: if True, a failed call's exception is put in
+                              its place in the results instead of raised
+
+    Runs CALLS concurrently and returns their results in the same order.
+    Calls see the request scope of the caller, so they share its memo.
+
+    Unless RETURN_EXCEPTIONS is set, waits for every call and then raises
+    the exception of the first one that failed.
+    """
+    calls = [tuple(call) for call in calls]
+    scope = current_scope()
+
+    # Calls made from inside the pool run inline so that nested gathers
+    # cannot exhaust the pool waiting on each other.
+    if len(calls) <= 1 or getattr(_local, 'in_pool', False):
+        outcomes = [_call(call[0], call[1:]) for call in calls]
+    else:
+        executor = get_executor()
+        futures = [
+            executor.submit(_call_in_pool, scope, call[0], call[1:])
+            for call in calls
+        ]
+        outcomes = [future.result() for future in futures]
+
+    results = []
+    for succeeded, result in outcomes:
+        if not succeeded and not return_exceptions:
+            raise result
+        results.append(result)
+    return results
@@ -0,0 +1,135 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Conditional GET support.
+
+Responses that carry an ETag or Last-Modified header are remembered per
+canonical request.  The next identical GET sends If-None-Match /
+If-Modified-Since, and a 304 answer is served from the stored body
+without downloading or parsing it again.
+"""
+
+import copy
+import threading
+import config
+
+from collections import OrderedDict
+
+class ValidatorStore(object):
+    """
+    LRU store of (etag, last_modified, body) entries, bounded by the
+    total size of the response bodies it holds.
+    """
+
+    def __init__(self, maxbytes):
+        """
+        :param maxbytes: the largest total body size, in bytes, kept
+        """
+        self.maxbytes = maxbytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.conditional_requests = 0
+        self.not_modified = 0
+
+    def conditional_headers(self, key):
+        """
+        Returns the If-None-Match / If-Modified-Since headers to send
+        with the request named KEY, if its response is stored.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return {}
+            etag, last_modified = entry[0], entry[1]
+        headers = {}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if last_modified is not None:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store(self, key, response, body):
+        """
+        Remembers BODY as the parsed content of RESPONSE, if RESPONSE
+        carries validators.
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag is None and last_modified is None:
+            return
+        size = len(response.content)
+        if size > self.maxbytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (etag, last_modified, copy.deepcopy(body), size)
+            self._bytes += size
+            while self._bytes > self.maxbytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[3]
+
+    def revalidated(self, key):
+        """
+        Called when upstream answered 304 for KEY. Returns a (found, body)
+        pair; found is False if the entry was evicted meanwhile.
+        """
+        with self._lock:
+            self.conditional_requests += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            self.not_modified += 1
+            self._entries.move_to_end(key)
+            body = entry[2]
+        return True, copy.deepcopy(body)
+
+    def modified(self):
+        """
+        Called when a conditional request got a full response.
+        """
+        with self._lock:
+            self.conditional_requests += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate(self, match):
+        """
+        Forgets the entries whose key satisfies MATCH, so that their next
+        GET is sent unconditionally. Returns how many were dropped.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if match(key)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+
+    def stats(self):
+        with self._lock:
+            requests = self.conditional_requests
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxbytes': self.maxbytes,
+                'conditional_requests': requests,
+                'not_modified': self.not_modified,
+                'not_modified_rate':
+                    float(self.not_modified) / requests if requests else 0.0,
+            }
+
+
+VALIDATOR_STORE = ValidatorStore(config.API_CONDITIONAL_STORE_MAX_BYTES)
@@ -0,0 +1,78 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Decoding of API response bodies, and the content codings we accept.
+
+JSON is parsed by the fastest decoder installed: orjson, then ujson,
+then the standard library.  config.API_JSON_DECODER can pin one.  Bodies
+are requested compressed: gzip and deflate always, and brotli when
+urllib3 can decode it (the brotli or brotlicffi package is installed).
+"""
+
+import json
+import urllib3
+import config
+
+def _stdlib_loads(data):
+    return json.loads(data.decode('utf-8') if isinstance(data, bytes) else data)
+
+def _load_decoders():
+    """
+    Returns a list of (name, loads) pairs for every JSON decoder that
+    can be imported, fastest first.
+    """
+    decoders = []
+    try:
+        import orjson
+        decoders.append(('orjson', orjson.loads))
+    except ImportError:
+        pass
+    try:
+        import ujson
+        decoders.append(('ujson', ujson.loads))
+    except ImportError:
+        pass
+    decoders.append(('json', _stdlib_loads))
+    return decoders
+
+DECODERS = _load_decoders()
+
+def get_decoder(name=None):
+    """
+    :param name: 'orjson', 'ujson', 'json', or 'auto' for the fastest
+                 installed; defaults to config.API_JSON_DECODER
+
+    Returns a (name, loads) pair. loads takes bytes or str and raises
+    ValueError on malformed input.
+    """
+    if name is None:
+        name = config.API_JSON_DECODER
+    if name == 'auto':
+        return DECODERS[0]
+    for decoder in DECODERS:
+        if decoder[0] == name:
+            return decoder
+    raise ValueError("JSON decoder '%s' is not installed" % name)
+
+DECODER_NAME, loads = get_decoder()
+
+def accept_encoding():
+    """
+    Returns the Accept-Encoding header value for API requests.
+    """
+    encodings = ['gzip', 'deflate']
+    if getattr(urllib3.response, 'brotli', None) is not None:
+        encodings.insert(0, 'br')
+    return ', '.join(encodings)
+
+def decode_body(response):
+    """
+    Returns the JSON body of RESPONSE, a requests.Response, or its text
+    if it is not JSON.
+    """
+    try:
+        return loads(response.content)
+    except ValueError:
+        return response.text
@@ -3,6 +3,7 @@
 #
 
 from .client import Request
+from .pagination import PageIterator, id_cursor, exceeds_page_size
 
 ####################### GET methods #######################
 
@@ -20,41 +21,96 @@ def get_event(client, eventId):
 	url = '/event/%s' % str(eventId)
 	return client._request(url, Request.GET)
 
-def get_event_registration_list(client, eventId, count, max_register_date=None):
+def get_event_registration_list(client, eventId, count, max_register_date=None,
+								stream=False):
 	"""
 	:param client: the CultureMesh API client
 	:param eventId: the id of the event in question
 	:param count: the number of results to return
 	:param max_register_date: the maximum register date, inclusive, to return
 	                          events for.
+	:param stream: if True, return an iterator that decodes registrations
+	               as they arrive
 
 	Returns a list of user JSONs registered to this event.
 	"""
+	if exceeds_page_size(client, count):
+		regs = iter_event_registrations(client, eventId, count, max_register_date)
+		return regs if stream else regs.to_list()
 	url = '/event/%s/reg' % str(eventId)
 	query_params = {'count': count}
 	if max_register_date:
 		query_params['max_register_date'] = max_register_date
 
 	# TODO: need to URL escape the query parameters with spaces.
-	return client._request(url, Request.GET, query_params=query_params)
+	return client._request(
+		url, Request.GET, query_params=query_params, stream=stream
+	)
+
+def iter_event_registrations(client, eventId, limit=None,
+							 max_register_date=None):
+	"""
+	:param client: the CultureMesh API client
+	:param eventId: the id of the event in question
+	:param limit: the most registrations to return, or None for all of them
+	:param max_register_date: the maximum register date, inclusive, to return
+	                          registrations for.
+
+	Returns a lazy iterator over the registrations to this event, latest
+	first, fetched a page at a time.
+	"""
+	return PageIterator(
+		lambda count, cursor: get_event_registration_list(
+			client, eventId, count, cursor
+		),
+		lambda reg: reg['date_registered'], key=lambda reg: reg['id_guest'],
+		limit=limit, cursor=max_register_date, page_size=client.max_page_size
+	)
 
 def get_events_attending_in_network(client, current_user,
-									network_id, count, max_id=None):
+									network_id, count, max_id=None,
+									stream=False):
 	"""
 	:param client: the CultureMesh API client
 	:param network_id: the id of the event to fetch
 	:param count: the max number of results to return
 	:param max_id: the maximum id, inclusive, to return events for.
+	:param stream: if True, return an iterator that decodes events as
+	               they arrive
 
 	Returns events the current user is attending in this network.
 	"""
+	if exceeds_page_size(client, count):
+		events = iter_events_attending_in_network(
+			client, current_user, network_id, count, max_id
+		)
+		return events if stream else events.to_list()
 	url = '/event/currentUserEventsByNetwork/%s' % str(network_id)
 	query_params = {'count': count}
 	if max_id:
 		query_params['max_id'] = max_id
 	basic_auth = (str(current_user.api_token), "")
 	return client._request(
-		url, Request.GET, query_params=query_params, basic_auth=basic_auth
+		url, Request.GET, query_params=query_params, basic_auth=basic_auth,
+		stream=stream
+	)
+
+def iter_events_attending_in_network(client, current_user, network_id,
+									 limit=None, max_id=None):
+	"""
+	:param client: the CultureMesh API client
+	:param network_id: the id of the network in question
+	:param limit: the most events to return, or None for all of them
+	:param max_id: the maximum id, inclusive, to return events for.
+
+	Returns a lazy iterator over the events the current user is attending
+	in this network, newest first, fetched a page at a time.
+	"""
+	return PageIterator(
+		lambda count, cursor: get_events_attending_in_network(
+			client, current_user, network_id, count, cursor
+		),
+		id_cursor, limit=limit, cursor=max_id, page_size=client.max_page_size
 	)
 
 def get_event_reg_count(client, event_id):
@@ -65,7 +121,7 @@ def get_event_reg_count(client, event_id):
 	Returns the number of people registered for an event.
 	"""
 	url = '/event/%s/reg_count' % str(event_id)
-	return client._request(url, Request.GET)
+	return client._request(url, Request.GET, cache='event_reg_count')
 
 ####################### POST methods #######################
 
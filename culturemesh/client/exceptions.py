@@ -17,10 +17,62 @@ class ApiError(Exception):
         else:
             return "%s (%s)" % (self.status, self.message)
 
+class TransportError(Exception):
+    """Something went wrong while trying to execute the request."""
+    pass
+
 class Timeout(Exception):
     """The request timed out."""
     pass
-    
+
+class RateLimitTimeout(Timeout):
+    """The request waited too long for the client-side rate limiter."""
+    def __init__(self, wait_secs):
+        self.wait_secs = wait_secs
+
+    def __str__(self):
+        return "Rate limiter queue wait of %.2fs is too long" % self.wait_secs
+
+class DeadlineExceeded(Timeout):
+    """The Flask request being served ran out of time for API calls."""
+    def __init__(self, budget_secs):
+        self.budget_secs = budget_secs
+
+    def __str__(self):
+        return "Request deadline of %.2fs exceeded" % self.budget_secs
+
+class CircuitOpenError(TransportError):
+    """Upstream calls to this endpoint family are failing; not sent."""
+    def __init__(self, endpoint, retry_after):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return "Circuit for '%s' is open (retry in %.1fs)" % (
+            self.endpoint, self.retry_after
+        )
+
+class CassetteMissError(TransportError):
+    """A replayed request was never recorded in the cassette."""
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+
+    def __str__(self):
+        return "No recorded response to %s %s" % (self.method, self.url)
+
+class CursorMissingError(Exception):
+    """A full page's last item lacks the field the next page starts at."""
+    def __init__(self, field):
+        self.field = field
+
+    def __str__(self):
+        return "Cannot page past an item without '%s'" % self.field
+
+class RefreshDropped(Exception):
+    """A background cache refresh can no longer run, and is abandoned."""
+    pass
+
 class HTTPError(TransportError):
     """An unexpected HTTP error occurred."""
     def __init__(self, status_code):
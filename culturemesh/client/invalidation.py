@@ -0,0 +1,195 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Write-aware invalidation of stored API responses.
+
+Every client mutation names, in INVALIDATES, the GET paths whose answers
+it may change: create_post changes the posts and post count of its
+network, join_network the users and user count of the network and the
+networks of the user, and so on.  Once the mutation returns (or fails,
+since a write that timed out may still have been applied), the matching
+responses are dropped from the caches and the conditional-request store,
+and identical GETs already in flight stop taking new followers.  The
+page a user is redirected to after a write therefore reads it back.
+On an AsyncClient, where mutations return coroutines, that happens once
+the coroutine is awaited, not when it is created.
+
+Paths are canonical (see urls.py) and may use '*' for a segment whose
+id the mutation does not know, e.g. the network of an updated event.  A
+path matches every request to it, whatever its query parameters or
+credentials.
+"""
+
+import functools
+import inspect
+import threading
+
+from culturemesh.client import cache
+from culturemesh.client.conditional import VALIDATOR_STORE
+from culturemesh.client.singleflight import IN_FLIGHT
+from culturemesh.client.urls import canonical_path
+
+_lock = threading.Lock()
+_stats = {'mutations': 0, 'invalidated': 0}
+
+def _id(value):
+    return '*' if value is None else str(value)
+
+def _post_paths(current_user, post):
+    network = _id(post.get('id_network'))
+    return [
+        'network/%s/posts' % network,
+        'network/%s/post_count' % network,
+        'user/%s/posts' % _id(post.get('id_user', current_user.id)),
+    ]
+
+def _create_post(current_user, post):
+    return _post_paths(current_user, post)
+
+def _update_post(current_user, post):
+    return _post_paths(current_user, post) + ['post/%s' % _id(post.get('id'))]
+
+def _post_reply(current_user, postId, reply):
+    return [
+        'post/%s/replies' % _id(postId),
+        'post/%s/reply_count' % _id(postId),
+        'post/reply/%s' % _id(reply.get('id')),
+    ]
+
+def _event_lists(network):
+    # Every user's event lists may hold a copy of the event.
+    return [
+        'network/%s/events' % network,
+        'event/currentUserEventsByNetwork/%s' % network,
+        'user/*/events',
+    ]
+
+def _create_event(current_user, event):
+    return _event_lists(_id(event.get('id_network')))
+
+def _update_event(current_user, event):
+    return _event_lists(_id(event.get('id_network'))) + \
+        ['event/%s' % _id(event.get('id'))]
+
+def _delete_event(current_user, event_id):
+    return _event_lists('*') + [
+        'event/%s' % _id(event_id),
+        'event/%s/reg' % _id(event_id),
+        'event/%s/reg_count' % _id(event_id),
+    ]
+
+def _event_registration(current_user, event_id):
+    return [
+        'event/%s/reg' % _id(event_id),
+        'event/%s/reg_count' % _id(event_id),
+        'user/%s/events' % _id(current_user.id),
+        'event/currentUserEventsByNetwork/*',
+    ]
+
+def _network_membership(current_user, network_id):
+    return [
+        'network/%s/users' % _id(network_id),
+        'network/%s/user_count' % _id(network_id),
+        'user/%s/networks' % _id(current_user.id),
+    ]
+
+def _create_user(user):
+    return ['users']
+
+def _update_user(current_user, user):
+    # Lists of users embed their profiles.
+    return [
+        'user/%s' % _id(current_user.id),
+        'users',
+        'network/*/users',
+        'event/*/reg',
+    ]
+
+# Mutation name -> function of the mutation's arguments (less the client)
+# returning the paths it invalidates.
+INVALIDATES = {
+    'create_post': _create_post,
+    'update_post': _update_post,
+    'create_post_reply': _post_reply,
+    'update_post_reply': _post_reply,
+    'create_event': _create_event,
+    'update_event': _update_event,
+    'delete_event': _delete_event,
+    'join_event_as_guest': _event_registration,
+    'join_event_as_host': _event_registration,
+    'leave_event': _event_registration,
+    'join_network': _network_membership,
+    'leave_network': _network_membership,
+    'create_user': _create_user,
+    'update_user': _update_user,
+}
+
+def matcher(paths):
+    """
+    Returns a predicate telling whether a canonical_key() names a request
+    to one of PATHS.
+    """
+    patterns = [tuple(canonical_path(path).split('/')) for path in paths]
+
+    def match(key):
+        path = key.split('#', 1)[0].split('?', 1)[0]
+        segments = path.split('/')
+        for pattern in patterns:
+            if len(pattern) == len(segments) and all(
+                    expected in ('*', segment)
+                    for expected, segment in zip(pattern, segments)):
+                return True
+        return False
+    return match
+
+def invalidate(paths):
+    """
+    Drops every stored response to a request to one of PATHS. Returns
+    how many were dropped.
+    """
+    match = matcher(paths)
+    IN_FLIGHT.forget(match)
+    dropped = cache.invalidate(match) + VALIDATOR_STORE.invalidate(match)
+    with _lock:
+        _stats['mutations'] += 1
+        _stats['invalidated'] += dropped
+    return dropped
+
+def invalidating(mutation):
+    """
+    Wraps the client method MUTATION, listed in INVALIDATES, so that
+    the responses it may change are invalidated once it returns.
+    """
+    paths_of = INVALIDATES[mutation.__name__]
+
+    @functools.wraps(mutation)
+    def wrapper(client, *args, **kwargs):
+        paths = paths_of(*args, **kwargs)
+        if inspect.iscoroutinefunction(client._request):
+            # The write is only sent once the caller awaits it.
+            try:
+                write = mutation(client, *args, **kwargs)
+            except BaseException:
+                invalidate(paths)
+                raise
+            return _invalidate_after(write, paths)
+        try:
+            return mutation(client, *args, **kwargs)
+        finally:
+            invalidate(paths)
+    return wrapper
+
+async def _invalidate_after(write, paths):
+    try:
+        return await write
+    finally:
+        invalidate(paths)
+
+def invalidation_stats():
+    """
+    Returns how many mutations ran and how many responses they dropped.
+    """
+    with _lock:
+        return dict(_stats)
@@ -14,7 +14,7 @@ def get_language(client, langId):
 	Returns a language JSON.
 	"""
 	url = '/language/%s' % str(langId)
-	return client._request(url, Request.GET)
+	return client._request(url, Request.GET, cache='language')
 
 def language_autocomplete(client, input_text):
 	"""
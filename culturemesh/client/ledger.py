@@ -0,0 +1,117 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Per-request ledger of client calls.
+
+Every call made while serving a Flask request is written to the ledger
+of its RequestScope: endpoint template, how it was answered (upstream,
+request memo, cache, ...) and how long it took.  The summary flags
+GETs the API answered more than once and endpoints called over and over
+in one request, the usual sign of an N+1 loop in a view.
+"""
+
+import collections
+import threading
+import config
+
+# How a call was answered.
+UPSTREAM = 'upstream'          # A full response from the API.
+NOT_MODIFIED = 'not_modified'  # A 304 answered from the conditional store.
+COALESCED = 'coalesced'        # Shared with an identical call in flight.
+MEMO = 'memo'                  # The request memo.
+CACHE = 'cache'                # The cross-request cache.
+ERROR = 'error'                # The call raised.
+
+# The sources for which a call reached the API.
+FETCHED = (UPSTREAM, NOT_MODIFIED)
+
+Call = collections.namedtuple(
+    'Call', ['endpoint', 'method', 'key', 'source', 'duration']
+)
+
+class CallLedger(object):
+    """
+    Thread-safe list of the calls made for one request.
+    """
+
+    def __init__(self):
+        self._calls = []
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, method, key, source, duration):
+        with self._lock:
+            self._calls.append(Call(endpoint, method, key, source, duration))
+
+    def calls(self):
+        with self._lock:
+            return list(self._calls)
+
+    def summary(self):
+        """
+        Returns a dict describing the calls recorded so far:
+
+            calls: how many calls were made
+            sources: calls per source (UPSTREAM, MEMO, ...)
+            duplicates: GETs of a key already asked for in this request
+            refetched: those of the duplicates the API answered again,
+                       rather than the memo, cache or an identical call
+            seconds: time spent in client calls, summed over calls
+            endpoints: calls per endpoint template
+            repeated: (endpoint, calls) pairs of endpoints called at least
+                      config.API_LEDGER_REPEAT_THRESHOLD times, most first
+        """
+        calls = self.calls()
+        sources = collections.Counter(call.source for call in calls)
+        endpoints = collections.Counter(call.endpoint for call in calls)
+        seen = set()
+        duplicates = refetched = 0
+        for call in calls:
+            if call.method != 'GET':
+                continue
+            if call.key in seen:
+                duplicates += 1
+                if call.source in FETCHED:
+                    refetched += 1
+            seen.add(call.key)
+        return {
+            'calls': len(calls),
+            'sources': dict(sources),
+            'duplicates': duplicates,
+            'refetched': refetched,
+            'seconds': sum(call.duration for call in calls),
+            'endpoints': dict(endpoints),
+            'repeated': [
+                (endpoint, count) for endpoint, count
+                in endpoints.most_common()
+                if count >= config.API_LEDGER_REPEAT_THRESHOLD
+            ],
+        }
+
+def needs_report(summary):
+    """
+    Returns whether SUMMARY crosses a configured threshold.
+    """
+    return (summary['calls'] > config.API_LEDGER_MAX_CALLS or
+            summary['refetched'] > config.API_LEDGER_MAX_DUPLICATES or
+            bool(summary['repeated']))
+
+def describe(summary):
+    """
+    Returns SUMMARY as a one-line string, e.g.
+    'calls=12 upstream=9 memo=3 duplicates=3 refetched=0 secs=0.412
+    repeated=user/<id>x6'.
+    """
+    parts = ['calls=%d' % summary['calls']]
+    for source in (UPSTREAM, NOT_MODIFIED, COALESCED, MEMO, CACHE, ERROR):
+        if summary['sources'].get(source):
+            parts.append('%s=%d' % (source, summary['sources'][source]))
+    parts.append('duplicates=%d' % summary['duplicates'])
+    parts.append('refetched=%d' % summary['refetched'])
+    parts.append('secs=%.3f' % summary['seconds'])
+    if summary['repeated']:
+        parts.append('repeated=%s' % ','.join(
+            '%sx%d' % pair for pair in summary['repeated']
+        ))
+    return ' '.join(parts)
@@ -14,7 +14,7 @@ def get_city(client, cityId):
 	Returns a city JSON.
 	"""
 	url = '/location/cities/%s' % str(cityId)
-	return client._request(url, Request.GET)
+	return client._request(url, Request.GET, cache='city')
 
 def get_region(client, regionId):
 	"""
@@ -24,7 +24,7 @@ def get_region(client, regionId):
 	Returns a region JSON.
 	"""
 	url = '/location/regions/%s' % str(regionId)
-	return client._request(url, Request.GET)
+	return client._request(url, Request.GET, cache='region')
 
 def get_country(client, countryId):
 	"""
@@ -34,7 +34,7 @@ def get_country(client, countryId):
 	Returns a country JSON.
 	"""
 	url = '/location/countries/%s' % str(countryId)
-	return client._request(url, Request.GET)
+	return client._request(url, Request.GET, cache='country')
 
 def location_autocomplete(client, input_text):
 	"""
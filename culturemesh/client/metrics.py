@@ -0,0 +1,236 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Metrics on calls to the CultureMesh API, rendered in the Prometheus text
+exposition format.
+
+Every upstream attempt made by Client is recorded under its endpoint
+template (e.g. 'network/<id>/posts'), so cardinality is bounded by the
+number of API routes.  Each observation is a dict update under a lock,
+cheap enough to leave on in production.  Metrics are per process.
+
+The state of each circuit breaker (see breaker.py) is read when the
+metrics are rendered.
+"""
+
+import bisect
+import threading
+
+from culturemesh.client.breaker import CLOSED, HALF_OPEN, OPEN
+from culturemesh.client.breaker import breaker_stats
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (name, _escape(value)) for name, value in pairs
+    )
+
+class Counter(object):
+    """
+    Monotonic count, per combination of label values.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        """
+        :param labels: a tuple of label values, in the order of labelnames
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Histogram(object):
+    """
+    Distribution of observed values over fixed buckets, per combination
+    of label values.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        """
+        :param labels: a tuple of label values, in the order of labelnames
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[labels] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, labels):
+        with self._lock:
+            entry = self._values.get(labels)
+            return entry[2] if entry is not None else 0
+
+    def samples(self):
+        with self._lock:
+            values = sorted(
+                (labels, (list(entry[0]), entry[1], entry[2]))
+                for labels, entry in self._values.items()
+            )
+        bounds = [repr(float(b)) for b in self.buckets] + ['+Inf']
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                yield (
+                    self.name + '_bucket',
+                    _format_labels(self.labelnames, labels, ('le', bound)),
+                    cumulative
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            yield self.name + '_sum', label_text, total
+            yield self.name + '_count', label_text, count
+
+class Collected(object):
+    """
+    Metric whose values are read from elsewhere each time it is rendered.
+    """
+
+    def __init__(self, name, documentation, kind, labelnames, collect):
+        """
+        :param kind: 'counter' or 'gauge'
+        :param collect: returns (labels, value) pairs, labels being tuples
+                        of label values in the order of labelnames
+        """
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def samples(self):
+        for labels, value in sorted(self.collect()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+def _breaker_states():
+    # One sample per state, 1 for the breaker's current state.
+    for endpoint, stats in breaker_stats().items():
+        for state in (CLOSED, HALF_OPEN, OPEN):
+            yield (endpoint, state), int(stats['state'] == state)
+
+def _breaker_trips():
+    for endpoint, stats in breaker_stats().items():
+        yield (endpoint,), stats['trips']
+
+
+REQUESTS = Counter(
+    'culturemesh_api_requests_total',
+    'Upstream API attempts, by outcome (HTTP status or error kind).',
+    ('endpoint', 'method', 'status')
+)
+LATENCY = Histogram(
+    'culturemesh_api_request_duration_seconds',
+    'Time to the response headers of upstream API attempts.',
+    ('endpoint', 'method'), LATENCY_BUCKETS
+)
+RESPONSE_BYTES = Counter(
+    'culturemesh_api_response_bytes_total',
+    'Bytes of response bodies received from the upstream API.',
+    ('endpoint', 'method')
+)
+RETRIES = Counter(
+    'culturemesh_api_retries_total',
+    'Upstream API attempts that were retried.',
+    ('endpoint', 'method')
+)
+TIMEOUTS = Counter(
+    'culturemesh_api_timeouts_total',
+    'Upstream API attempts that timed out.',
+    ('endpoint', 'method')
+)
+BREAKER_STATE = Collected(
+    'culturemesh_api_breaker_state',
+    'Circuit breaker state of each endpoint family: 1 for the current one.',
+    'gauge', ('endpoint', 'state'), _breaker_states
+)
+BREAKER_TRIPS = Collected(
+    'culturemesh_api_breaker_trips_total',
+    'Times the circuit breaker of each endpoint family opened.',
+    'counter', ('endpoint',), _breaker_trips
+)
+
+METRICS = [
+    REQUESTS, LATENCY, RESPONSE_BYTES, RETRIES, TIMEOUTS, BREAKER_STATE,
+    BREAKER_TRIPS,
+]
+
+def record_response(labels, status, elapsed, size):
+    """
+    Records an upstream attempt answered with STATUS after ELAPSED seconds,
+    with a body of SIZE bytes.
+
+    :param labels: the (endpoint, method) of the attempt
+    """
+    LATENCY.observe(labels, elapsed)
+    REQUESTS.inc(labels + (str(status),))
+    RESPONSE_BYTES.inc(labels, size)
+
+def record_error(labels, timed_out):
+    """
+    Records an upstream attempt that timed out, or failed to connect.
+
+    :param labels: the (endpoint, method) of the attempt
+    """
+    if timed_out:
+        TIMEOUTS.inc(labels)
+        REQUESTS.inc(labels + ('timeout',))
+    else:
+        REQUESTS.inc(labels + ('connection_error',))
+
+def render():
+    """
+    Returns every metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.append('# HELP %s %s' % (metric.name, metric.documentation))
+        lines.append('# TYPE %s %s' % (metric.name, metric.kind))
+        for name, labels, value in metric.samples():
+            lines.append('%s%s %s' % (name, labels, value))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,594 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Indexed store of the mock data served by Client(mock=True).
+
+Each dataset (users, posts, ...) is read from its JSON file once, on
+first use, and indexed by primary key and by its foreign keys
+(id_network, id_user, ...); other fields are indexed the first time a
+dataset is queried by them.  Lookups then cost in proportion to the size of
+their result rather than of the dataset.
+
+Before each lookup the file's modification time and size are checked
+with a stat() call.  If either changed (say, db_generator.py rewrote the
+data), only that dataset is read and indexed again, and the new indexes
+replace the old ones in a single step.
+
+Records are returned as copies, like cached responses (see
+RequestScope.memo_get).  insert(), update() and delete() change a dataset
+in memory only (for the stand-in API server, standin.py); the changes
+are lost when its file is reloaded.
+
+SQLiteMockStore serves the same queries from a SQLite database whose
+tables and indexes are derived from the real schema in data/tables.txt,
+with pagination done by indexed SQL.  build_database() fills it from the
+JSON files, optionally with the activity tables copied many times over,
+to try pages at scale.  Once a JSON file is newer than the database, the
+database is rebuilt, at the same scale, before the next lookup.
+"""
+
+import bisect
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import config
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# The foreign keys worth indexing; others are indexed on first query too.
+SECONDARY_KEYS = ('id_network', 'id_user', 'id_parent', 'id_event', 'id_host')
+
+# The tables build_database() copies SCALE times; reference data is not.
+SCALED_TABLES = ('posts', 'post_replies', 'events')
+# Records how a database was built; not a table of data/tables.txt.
+BUILD_TABLE = 'mock_build'
+
+def _read(path):
+    with open(path) as f:
+        return json.load(f)
+
+class _Dataset(object):
+    def __init__(self, records):
+        self.records = records
+        self.by_id = {}
+        for record in records:
+            if 'id' in record:
+                # The first record wins, as it did for linear scans.
+                self.by_id.setdefault(record['id'], record)
+        self.indexes = {}
+        # (field, order) -> value -> (ORDER keys, records), ascending.
+        self.pages = {}
+
+    def index(self, field):
+        """
+        Returns a dict mapping each value of FIELD to the records having
+        it, in file order.
+        """
+        index = self.indexes.get(field)
+        if index is None:
+            index = {}
+            for record in self.records:
+                if field in record:
+                    index.setdefault(record[field], []).append(record)
+            self.indexes[field] = index
+        return index
+
+    def page_index(self, field, order):
+        """
+        Returns a dict mapping each value of FIELD (or None, for every
+        record if FIELD is None) to a (keys, records) pair: the records
+        having it in ascending ORDER, and their ORDER values.
+
+        Records with equal ORDER are kept in reverse file order, so that
+        reading the arrays backwards matches a stable descending sort.
+        """
+        pages = self.pages.get((field, order))
+        if pages is None:
+            if field is None:
+                groups = {None: self.records}
+            else:
+                groups = self.index(field)
+            pages = {}
+            for value, records in groups.items():
+                records = sorted(
+                    records, key=lambda r: r[order], reverse=True
+                )[::-1]
+                pages[value] = ([r[order] for r in records], records)
+            self.pages[(field, order)] = pages
+        return pages
+
+    def add(self, record):
+        self.records.append(record)
+        if 'id' in record:
+            self.by_id.setdefault(record['id'], record)
+        for field, index in self.indexes.items():
+            if field in record:
+                index.setdefault(record[field], []).append(record)
+        for (field, order), pages in self.pages.items():
+            if field is not None and field not in record:
+                continue
+            keys, records = pages.setdefault(
+                record.get(field) if field else None, ([], [])
+            )
+            # Before its equals: it comes after them in file order.
+            i = bisect.bisect_left(keys, record[order])
+            keys.insert(i, record[order])
+            records.insert(i, record)
+
+    def changed(self):
+        """
+        Drops every index, to be rebuilt on next use.
+        """
+        self.indexes = {}
+        self.pages = {}
+
+    def remove(self, records):
+        """
+        Removes RECORDS, and returns how many there were.
+        """
+        gone = set(id(record) for record in records)
+        self.records = [r for r in self.records if id(r) not in gone]
+        self.by_id = dict(
+            (id_, r) for id_, r in self.by_id.items() if id(r) not in gone
+        )
+        for record in self.records:
+            if 'id' in record:
+                self.by_id.setdefault(record['id'], record)
+        self.changed()
+        return len(gone)
+
+
+class MockStore(object):
+    """
+    The mock datasets, loaded lazily from their JSON files and reloaded
+    when those change.
+    """
+
+    def __init__(self, paths):
+        """
+        :param paths: a dict mapping dataset names to JSON files, each
+                      holding a list of records
+        """
+        self.paths = paths
+        # Name -> (signature of the file it was read from, _Dataset).
+        self._datasets = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.reloads = 0
+
+    def _signature(self, name):
+        stat = os.stat(self.paths[name])
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, name):
+        dataset = _Dataset(_read(self.paths[name]))
+        for field in SECONDARY_KEYS:
+            dataset.index(field)
+        return dataset
+
+    def _dataset(self, name):
+        """
+        Returns the current _Dataset NAME, (re)loading it first if its
+        file changed since it was read.
+
+        A dataset is rebuilt in full before it replaces the old one, and
+        readers keep using the old one meanwhile.
+        """
+        signature = self._signature(name)
+        entry = self._datasets.get(name)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        if not self._load_lock.acquire(blocking=entry is None):
+            return entry[1]
+        try:
+            entry = self._datasets.get(name)
+            if entry is not None and entry[0] == self._signature(name):
+                return entry[1]
+            # Stat before reading, so that a write during the read is
+            # picked up by the next check.
+            signature = self._signature(name)
+            try:
+                dataset = self._load(name)
+            except ValueError:
+                if entry is None:
+                    raise
+                # Most likely caught halfway through a rewrite.
+                logger.warning(
+                    "Could not reload mock dataset '%s'", name, exc_info=True
+                )
+                return entry[1]
+            with self._lock:
+                if entry is not None:
+                    self.reloads += 1
+                self._datasets[name] = (signature, dataset)
+            return dataset
+        finally:
+            self._load_lock.release()
+
+    def all(self, name):
+        """
+        Returns every record of dataset NAME, in file order.
+        """
+        return copy.deepcopy(self._dataset(name).records)
+
+    def get(self, name, id_):
+        """
+        Returns the record of dataset NAME whose id is ID_, or None.
+        """
+        return copy.deepcopy(self._dataset(name).by_id.get(id_))
+
+    def where(self, name, field, value):
+        """
+        Returns the records of dataset NAME whose FIELD is VALUE, in
+        file order.
+        """
+        dataset = self._dataset(name)
+        with self._lock:
+            records = dataset.index(field).get(value, [])
+        return copy.deepcopy(records)
+
+    def page(self, name, field, value, order, count, max_value=None):
+        """
+        :param field: the field to filter on, or None for every record
+        :param order: the field to page by, newest (largest) first
+        :param max_value: the largest ORDER, inclusive, to return
+
+        Returns at most COUNT records of dataset NAME whose FIELD is VALUE,
+        by descending ORDER.  Records are kept sorted per value of FIELD,
+        so a page is a binary search for MAX_VALUE and a slice, however
+        deep it is.
+        """
+        dataset = self._dataset(name)
+        with self._lock:
+            keys, records = dataset.page_index(field, order).get(
+                value if field is not None else None, ([], [])
+            )
+            end = len(keys)
+            if max_value is not None:
+                end = bisect.bisect_right(keys, max_value)
+            records = records[max(end - int(count), 0):end]
+        return copy.deepcopy(records[::-1])
+
+    def insert(self, name, record):
+        """
+        Adds RECORD to dataset NAME, in memory only.
+        """
+        dataset = self._dataset(name)
+        with self._lock:
+            dataset.add(copy.deepcopy(record))
+
+    def update(self, name, id_, fields):
+        """
+        Sets FIELDS on the record of dataset NAME whose id is ID_, in
+        memory only.  Returns the updated record, or None if there is
+        none.
+        """
+        dataset = self._dataset(name)
+        with self._lock:
+            record = dataset.by_id.get(id_)
+            if record is None:
+                return None
+            record.update(copy.deepcopy(fields))
+            # Indexed fields may have changed.
+            dataset.changed()
+            return copy.deepcopy(record)
+
+    def delete(self, name, fields):
+        """
+        Removes the records of dataset NAME whose values match every one
+        of FIELDS, in memory only.  Returns how many were removed.
+        """
+        dataset = self._dataset(name)
+        with self._lock:
+            return dataset.remove([
+                r for r in dataset.records
+                if all(r.get(f) == v for f, v in fields.items())
+            ])
+
+    def clear(self):
+        """
+        Forgets every loaded dataset, and the changes made to them; they
+        are read again on next use.
+        """
+        with self._lock:
+            self._datasets.clear()
+
+
+def parse_schema(path):
+    """
+    Returns an OrderedDict mapping table names to their column names, as
+    described by PATH (data/tables.txt): one 'table: column, ...' line
+    per table.
+    """
+    tables = OrderedDict()
+    with open(path) as f:
+        for line in f:
+            if ':' not in line:
+                continue
+            table, columns = line.split(':', 1)
+            tables[table.strip()] = [
+                column.strip() for column in columns.split(',')
+                if column.strip()
+            ]
+    return tables
+
+def _is_key(column):
+    return column == 'id' or column.startswith('id_') or \
+        column.endswith('_id')
+
+def _order_column(columns):
+    """
+    Returns the column a table is paged by: its id, or else its first
+    date column.
+    """
+    if 'id' in columns:
+        return 'id'
+    for column in columns:
+        if 'date' in column:
+            return column
+    return None
+
+def schema_statements(table, columns):
+    """
+    Returns the SQL creating TABLE and its indexes: one on each foreign
+    key, followed by the column the table is paged by, so that a page is
+    one index range scan.
+    """
+    order = _order_column(columns)
+    definitions = []
+    for column in columns:
+        if column == 'id':
+            definitions.append('"id" INTEGER PRIMARY KEY')
+        elif _is_key(column):
+            definitions.append('"%s" INTEGER' % column)
+        else:
+            definitions.append('"%s"' % column)
+    # The record as the API serves it.
+    definitions.append('doc TEXT NOT NULL')
+    statements = ['CREATE TABLE IF NOT EXISTS "%s" (%s)' % (
+        table, ', '.join(definitions)
+    )]
+    for column in columns:
+        if _is_key(column) and column != order and column != 'id':
+            statements.append(
+                'CREATE INDEX IF NOT EXISTS "%s_%s" ON "%s" ("%s", "%s")' % (
+                    table, column, table, column, order
+                )
+            )
+    return statements
+
+
+class SQLiteMockStore(object):
+    """
+    The mock datasets, served from a SQLite database whose tables and
+    indexes follow the real schema (data/tables.txt).  Lookups and pages
+    are indexed SQL queries, so pages stay fast with millions of rows.
+    """
+
+    def __init__(self, path, schema, paths=None):
+        """
+        :param path: the SQLite database, as written by build_database()
+        :param schema: the tables, as returned by parse_schema()
+        :param paths: if given, the JSON mock files the database was
+                      built from; it is rebuilt once one of them changes
+        """
+        self.path = path
+        self.schema = schema
+        self.paths = paths
+        self.rebuilds = 0
+        self._built = os.stat(path).st_mtime_ns
+        # Bumped whenever the database file is replaced.
+        self._version = 0
+        self._rebuild_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per thread, reopened after a fork or a rebuild.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid() or \
+                self._local.version != self._version:
+            if connection is not None:
+                connection.close()
+            connection = sqlite3.connect(self.path)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._local.version = self._version
+        return connection
+
+    def _check(self, name):
+        """
+        Rebuilds the database first if the JSON file of table NAME
+        changed since it was built.  Readers keep using the old one
+        while another thread rebuilds it.
+        """
+        if self.paths is None or name not in self.paths or \
+                os.stat(self.paths[name]).st_mtime_ns <= self._built:
+            return
+        if not self._rebuild_lock.acquire(blocking=False):
+            return
+        try:
+            if is_stale(self.path, self.paths):
+                build_database(
+                    self.path, self.paths, self.schema,
+                    database_scale(self.path)
+                )
+                self.rebuilds += 1
+            # Perhaps another process rebuilt it already.
+            self._built = os.stat(self.path).st_mtime_ns
+            self._version += 1
+        finally:
+            self._rebuild_lock.release()
+
+    def _table(self, name):
+        # Identifiers cannot be bound, so only schema names get in.
+        if name not in self.schema:
+            raise ValueError("No mock table '%s'" % name)
+        return '"%s"' % name
+
+    def _column(self, name, column):
+        if column not in self.schema[name]:
+            raise ValueError("Table '%s' has no column '%s'" % (name, column))
+        return '"%s"' % column
+
+    def _query(self, name, sql, params):
+        self._check(name)
+        return [
+            json.loads(row[0])
+            for row in self._connect().execute(sql, params).fetchall()
+        ]
+
+    def all(self, name):
+        return self._query(
+            name, 'SELECT doc FROM %s ORDER BY rowid' % self._table(name), ()
+        )
+
+    def get(self, name, id_):
+        rows = self._query(
+            name, 'SELECT doc FROM %s WHERE "id" = ?' % self._table(name),
+            (id_,)
+        )
+        return rows[0] if rows else None
+
+    def where(self, name, field, value):
+        return self._query(
+            name, 'SELECT doc FROM %s WHERE %s = ? ORDER BY rowid' % (
+                self._table(name), self._column(name, field)
+            ), (value,)
+        )
+
+    def page(self, name, field, value, order, count, max_value=None):
+        conditions = []
+        params = []
+        if field is not None:
+            conditions.append('%s = ?' % self._column(name, field))
+            params.append(value)
+        if max_value is not None:
+            conditions.append('%s <= ?' % self._column(name, order))
+            params.append(max_value)
+        sql = 'SELECT doc FROM %s' % self._table(name)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY %s DESC LIMIT ?' % self._column(name, order)
+        return self._query(name, sql, params + [int(count)])
+
+    def clear(self):
+        pass
+
+
+def _rows(columns, records, copies):
+    """
+    Yields the rows of COPIES copies of RECORDS; each copy gets ids past
+    those of the one before.
+    """
+    step = max([r['id'] for r in records if 'id' in r] or [0])
+    for copy_ in range(copies):
+        for record in records:
+            if copy_:
+                record = dict(record, id=record['id'] + copy_ * step)
+            row = []
+            for column in columns:
+                value = record.get(column)
+                if isinstance(value, (dict, list)):
+                    value = json.dumps(value)
+                row.append(value)
+            row.append(json.dumps(record))
+            yield row
+
+def build_database(path, paths, schema, scale=1):
+    """
+    :param paths: a dict mapping table names to the JSON mock files that
+                  fill them
+    :param schema: the tables, as returned by parse_schema()
+    :param scale: copies of each record to store in SCALED_TABLES (posts,
+                  replies, events), so that pages can be tried at scale
+
+    Creates the SQLite mock database at PATH from the JSON mock files,
+    replacing any database already there.  It is written aside and moved
+    into place, so workers starting together never see half a database.
+    """
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        with connection:
+            for table, json_path in paths.items():
+                columns = schema[table]
+                for statement in schema_statements(table, columns):
+                    connection.execute(statement)
+                records = _read(json_path)
+                copies = scale if table in SCALED_TABLES else 1
+                connection.executemany(
+                    'INSERT OR IGNORE INTO "%s" VALUES (%s)' % (
+                        table, ', '.join('?' * (len(columns) + 1))
+                    ), _rows(columns, records, copies)
+                )
+            connection.execute(
+                'CREATE TABLE "%s" (scale INTEGER)' % BUILD_TABLE
+            )
+            connection.execute(
+                'INSERT INTO "%s" VALUES (?)' % BUILD_TABLE, (scale,)
+            )
+    finally:
+        connection.close()
+    # Never older than its sources, even those with mtimes in the future.
+    built = max([int(time.time() * 10 ** 9)] + [
+        os.stat(json_path).st_mtime_ns for json_path in paths.values()
+    ])
+    os.utime(tmp_path, ns=(built, built))
+    os.replace(tmp_path, path)
+
+def database_scale(path):
+    """
+    Returns the scale the database at PATH was built with, or 1.
+    """
+    if not os.path.exists(path):
+        return 1
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(
+            'SELECT scale FROM "%s"' % BUILD_TABLE
+        ).fetchone()[0]
+    except (sqlite3.Error, TypeError):
+        return 1
+    finally:
+        connection.close()
+
+def is_stale(path, paths):
+    """
+    Returns whether the database at PATH is missing, or older than one
+    of the JSON files PATHS it is built from.
+    """
+    if not os.path.exists(path):
+        return True
+    built = os.stat(path).st_mtime_ns
+    return any(os.stat(p).st_mtime_ns > built for p in paths.values())
+
+def make_mock_store(paths, schema_path):
+    """
+    :param paths: a dict mapping table names to their JSON mock files
+    :param schema_path: the schema the tables follow (data/tables.txt)
+
+    Returns the mock store chosen by config.API_MOCK_BACKEND.  The SQLite
+    database is built from the JSON files if it is missing or older than
+    them.
+    """
+    backend = config.API_MOCK_BACKEND
+    if backend == 'json':
+        return MockStore(paths)
+    elif backend == 'sqlite':
+        schema = parse_schema(schema_path)
+        path = config.API_MOCK_SQLITE_FILE
+        if is_stale(path, paths):
+            build_database(path, paths, schema, database_scale(path))
+        return SQLiteMockStore(path, schema, paths)
+    raise ValueError("Unknown mock backend '%s'" % backend)
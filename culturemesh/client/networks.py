@@ -3,6 +3,7 @@
 #
 
 from .client import Request
+from .pagination import PageIterator, id_cursor, exceeds_page_size
 
 ####################### GET methods #######################
 
@@ -63,6 +64,8 @@ def get_network_posts(client, networkId, count, max_id=None):
 
     Returns list of posts JSONs for posts in networkId
     """
+    if exceeds_page_size(client, count):
+        return iter_network_posts(client, networkId, count, max_id).to_list()
     url = 'network/%s/posts' % str(networkId)
     query_params = {'count': count}
     if max_id is not None:
@@ -77,6 +80,8 @@ def get_network_events(client, networkId, count, max_id=None):
 
     Returns list of events JSONs for events in networkId
     """
+    if exceeds_page_size(client, count):
+        return iter_network_events(client, networkId, count, max_id).to_list()
     url = 'network/%s/events' % str(networkId)
     query_params = {'count': count}
     if max_id is not None:
@@ -84,6 +89,42 @@ def get_network_events(client, networkId, count, max_id=None):
     return client._request(url, Request.GET, query_params=query_params)
 
 
+def iter_network_posts(client, networkId, limit=None, max_id=None):
+    """
+    :param client: the CultureMesh API client
+    :param networkId: The id of the network to return posts for.
+    :param limit: the most posts to return, or None for all of them
+    :param max_id: the maximum id, inclusive, of posts to return
+
+    Returns a lazy iterator over the posts in networkId, newest first,
+    fetched a page at a time.
+    """
+    return PageIterator(
+        lambda count, cursor: get_network_posts(
+            client, networkId, count, cursor
+        ),
+        id_cursor, limit=limit, cursor=max_id, page_size=client.max_page_size
+    )
+
+
+def iter_network_events(client, networkId, limit=None, max_id=None):
+    """
+    :param client: the CultureMesh API client
+    :param networkId: The id of the network to return events for.
+    :param limit: the most events to return, or None for all of them
+    :param max_id: the maximum id, inclusive, of events to return
+
+    Returns a lazy iterator over the events in networkId, newest first,
+    fetched a page at a time.
+    """
+    return PageIterator(
+        lambda count, cursor: get_network_events(
+            client, networkId, count, cursor
+        ),
+        id_cursor, limit=limit, cursor=max_id, page_size=client.max_page_size
+    )
+
+
 def get_network_users(client, networkId, count, max_id=None):
     """
     :param client: the CultureMesh API client
@@ -106,7 +147,7 @@ def get_network_user_count(client, networkId):
     Returns the number of users on this network.
     """
     url = 'network/%s/user_count' % str(networkId)
-    return client._request(url, Request.GET)
+    return client._request(url, Request.GET, cache='network_user_count')
 
 def get_network_post_count(client, networkId):
     """
@@ -116,7 +157,7 @@ def get_network_post_count(client, networkId):
     Returns the number of posts on this network.
     """
     url = 'network/%s/post_count' % str(networkId)
-    return client._request(url, Request.GET)
+    return client._request(url, Request.GET, cache='network_post_count')
 
 ####################### POST methods #######################
 ####################### PUT methods #######################
@@ -0,0 +1,140 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Lazy iteration over cursor-paginated list endpoints.
+
+List endpoints return at most `count` items, newest first, starting at an
+inclusive cursor (max_id or max_register_date).  PageIterator walks that
+cursor for the caller, asking for pages of at most
+config.API_MAX_PAGE_SIZE items and fetching the next page in the
+background while the current one is consumed.
+
+The next cursor is only known once the previous page has arrived, so
+pages cannot be requested in parallel; prefetching one page ahead is
+what overlaps the round trips.
+"""
+
+import config
+
+from culturemesh.client import concurrency
+from culturemesh.client.exceptions import CursorMissingError
+
+def id_cursor(item):
+    """
+    Returns the max_id cursor following ITEM.
+    """
+    return item['id'] - 1
+
+def field_cursor(field):
+    """
+    Returns a cursor_of function giving the FIELD of an item, for inclusive
+    cursors such as max_register_date.  It raises CursorMissingError for
+    items without FIELD, rather than quietly ending the iteration.
+    """
+    def cursor_of(item):
+        if item.get(field) is None:
+            raise CursorMissingError(field)
+        return item[field]
+    return cursor_of
+
+class PageIterator(object):
+    """
+    Iterator over every item of a paginated list, across pages.
+    """
+
+    def __init__(self, fetch, cursor_of, key=None, limit=None, cursor=None,
+                 page_size=None):
+        """
+        :param fetch: fetch(count, cursor) returns one page of at most COUNT
+                      items at or before CURSOR (None for the newest)
+        :param cursor_of: cursor_of(item) returns the cursor of the page
+                          after ITEM; items without one end the iteration
+        :param key: for cursors that repeat their boundary item (dates),
+                    key(item) identifies items so repeats are skipped
+        :param limit: the most items to yield, or None for all of them
+        :param cursor: where to start, or None for the newest item
+        :param page_size: the most items asked for per request
+        """
+        self.fetch = fetch
+        self.cursor_of = cursor_of
+        self.key = key
+        self.limit = limit
+        self.cursor = cursor
+        self.page_size = page_size or config.API_MAX_PAGE_SIZE
+        self._items = self._generate()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    def close(self):
+        """
+        Stops the iteration. A page already being prefetched is dropped.
+        """
+        self._items.close()
+
+    def _count(self, remaining, boundary):
+        """
+        Returns how many items to ask for: enough for REMAINING new items
+        on top of the BOUNDARY items the next page will repeat.
+        """
+        if remaining is None:
+            return self.page_size
+        return min(self.page_size, remaining + len(boundary))
+
+    def _generate(self):
+        remaining = self.limit
+        if remaining is not None and remaining <= 0:
+            return
+        cursor = self.cursor
+        boundary = set()
+        count = self._count(remaining, boundary)
+        pending = concurrency.submit(self.fetch, count, cursor)
+        while pending is not None:
+            raw = pending.result()
+            pending = None
+
+            # Skip items repeated from the previous page's boundary.
+            page = raw
+            if self.key is not None and boundary:
+                page = [item for item in raw if self.key(item) not in boundary]
+            if remaining is not None:
+                page = page[:remaining]
+                remaining -= len(page)
+
+            next_cursor = None
+            if page and len(raw) >= count and remaining != 0:
+                next_cursor = self.cursor_of(raw[-1])
+            if next_cursor is not None:
+                if self.key is not None:
+                    if next_cursor != cursor:
+                        boundary = set()
+                    boundary.update(
+                        self.key(item) for item in raw
+                        if self.cursor_of(item) == next_cursor
+                    )
+                cursor = next_cursor
+                count = self._count(remaining, boundary)
+                pending = concurrency.submit(self.fetch, count, cursor)
+
+            # An empty page means the list is exhausted, or that more
+            # than a page of items share one cursor so it cannot advance.
+            for item in page:
+                yield item
+
+    def to_list(self):
+        """
+        Returns every remaining item as a list.
+        """
+        return list(self)
+
+def exceeds_page_size(client, count):
+    """
+    Returns whether COUNT items are more than CLIENT asks for in one
+    request, so that the list must be read page by page.
+    """
+    return client.max_page_size is not None and int(count) > client.max_page_size
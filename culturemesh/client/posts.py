@@ -56,7 +56,7 @@ def get_post_reply_count(client, postId):
 	Returns a JSON with a single reply_count element.
 	"""
 	url = 'post/%s/reply_count' % str(postId)
-	return client._request(url, Request.GET)
+	return client._request(url, Request.GET, cache='post_reply_count')
 
 ####################### POST methods #######################
 
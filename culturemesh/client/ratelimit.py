@@ -0,0 +1,189 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Token-bucket rate limiting for calls to the CultureMesh API.
+
+Buckets are shared by every client in the process that asks for the
+same rate.  The 'file' backend keeps the bucket in a small file guarded
+by flock() so that every gunicorn worker on a host draws from one budget.
+"""
+
+import os
+import struct
+import threading
+import time
+import config
+
+from culturemesh.client.exceptions import RateLimitTimeout
+
+class TokenBucket(object):
+    """
+    In-process token bucket. Callers that find the bucket empty reserve
+    a future token and sleep until it is due, so bursts are queued
+    rather than rejected.
+    """
+
+    def __init__(self, rate, capacity=None, max_wait=None):
+        """
+        :param rate: tokens (requests) added to the bucket per second
+        :param capacity: the largest burst allowed; defaults to RATE
+        :param max_wait: the longest a caller may queue before giving up
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.max_wait = max_wait
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._waited = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+
+    def _reserve(self, max_wait):
+        """
+        Takes one token, possibly borrowing against the future.
+
+        Returns how long the caller must sleep before the token is
+        valid, or None if that is longer than MAX_WAIT (in which case
+        nothing is taken).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            wait = max(0.0, (1.0 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1.0
+            return wait
+
+    def reserve(self, max_wait=None):
+        """
+        :param max_wait: overrides the bucket's default queueing limit
+
+        Takes a token without sleeping. Returns the number of seconds
+        the caller must wait before sending its request.
+
+        Raises RateLimitTimeout if the caller would have to queue for
+        longer than MAX_WAIT.
+        """
+        if max_wait is None:
+            max_wait = self.max_wait
+        wait = self._reserve(max_wait)
+        if wait is None:
+            raise RateLimitTimeout(max_wait)
+        self._record(wait)
+        return wait
+
+    def acquire(self, max_wait=None):
+        """
+        :param max_wait: overrides the bucket's default queueing limit
+
+        Blocks until a request may be sent. Returns the number of
+        seconds spent waiting.
+
+        Raises RateLimitTimeout if the caller would have to queue for
+        longer than MAX_WAIT.
+        """
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def _record(self, wait):
+        with self._stats_lock:
+            self._requests += 1
+            if wait > 0:
+                self._waited += 1
+                self._total_wait += wait
+                self._max_wait_seen = max(self._max_wait_seen, wait)
+
+    def stats(self):
+        """
+        Returns a dict describing how long requests have queued on
+        this bucket.
+        """
+        with self._stats_lock:
+            return {
+                'requests': self._requests,
+                'waited': self._waited,
+                'total_wait_secs': self._total_wait,
+                'max_wait_secs': self._max_wait_seen,
+            }
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a file shared by every process on
+    the host. The file holds two doubles: the token count and the time
+    it was last refilled.
+    """
+
+    _STATE = struct.Struct('dd')
+
+    def __init__(self, path, rate, capacity=None, max_wait=None):
+        TokenBucket.__init__(self, rate, capacity, max_wait)
+        self.path = path
+
+    def _reserve(self, max_wait):
+        import fcntl
+
+        # Open per call: flock() locks are shared by forked processes
+        # that inherit the same descriptor.
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            now = time.time()
+            raw = os.pread(fd, self._STATE.size, 0)
+            if len(raw) == self._STATE.size:
+                tokens, updated = self._STATE.unpack(raw)
+                tokens = min(
+                    self.capacity, tokens + max(0.0, now - updated) * self.rate
+                )
+            else:
+                tokens = self.capacity
+            wait = max(0.0, (1.0 - tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            os.pwrite(fd, self._STATE.pack(tokens - 1.0, now), 0)
+            return wait
+        finally:
+            os.close(fd)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(queries_per_second):
+    """
+    :param queries_per_second: the request budget, or None for no limit
+
+    Returns the process-wide bucket for this rate, creating it on first
+    use. The backend is chosen by config.API_RATE_LIMIT_BACKEND.
+    """
+    if not queries_per_second:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(queries_per_second)
+        if limiter is None:
+            limiter = _make_limiter(queries_per_second)
+            _limiters[queries_per_second] = limiter
+        return limiter
+
+def _make_limiter(queries_per_second):
+    capacity = config.API_RATE_LIMIT_BURST
+    max_wait = config.API_RATE_LIMIT_MAX_WAIT_SECS
+    backend = config.API_RATE_LIMIT_BACKEND
+    if backend == 'process':
+        return TokenBucket(queries_per_second, capacity, max_wait)
+    elif backend == 'file':
+        path = "%s.%s" % (config.API_RATE_LIMIT_FILE, queries_per_second)
+        return FileTokenBucket(path, queries_per_second, capacity, max_wait)
+    raise ValueError("Unknown rate limit backend '%s'" % backend)
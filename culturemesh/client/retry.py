@@ -0,0 +1,82 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Retry policy for calls to the CultureMesh API: exponential backoff with
+full jitter, bounded by the client's retry_timeout.
+"""
+
+import random
+import time
+import config
+
+# Upstream responses worth trying again.
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+class RetryPolicy(object):
+    """
+    Decides whether, and after how long, a failed attempt is retried.
+    """
+
+    def __init__(self, retry_timeout, base_delay=None, max_delay=None,
+                 max_attempts=None):
+        """
+        :param retry_timeout: seconds after the first attempt past which
+                              no retry is started
+        :param base_delay: the backoff ceiling after the first failure
+        :param max_delay: the largest backoff ceiling
+        :param max_attempts: the most attempts made, including the first
+        """
+        self.retry_timeout = retry_timeout
+        self.base_delay = base_delay if base_delay is not None \
+            else config.API_RETRY_BASE_DELAY_SECS
+        self.max_delay = max_delay if max_delay is not None \
+            else config.API_RETRY_MAX_DELAY_SECS
+        self.max_attempts = max_attempts if max_attempts is not None \
+            else config.API_RETRY_MAX_ATTEMPTS
+
+    def backoff(self, attempt):
+        """
+        :param attempt: the number of attempts made so far (1 or more)
+
+        Returns a random delay in [0, min(max_delay, base_delay * 2^(attempt-1))].
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def next_delay(self, attempt, started, retry_after=None, deadline=None):
+        """
+        :param attempt: the number of attempts made so far
+        :param started: time.monotonic() when the first attempt began
+        :param retry_after: seconds the server asked us to wait, if any
+        :param deadline: time.monotonic() past which no retry is started
+
+        Returns how long to sleep before the next attempt, or None if
+        the request should not be retried.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        wake = time.monotonic() + delay
+        if wake > started + self.retry_timeout:
+            return None
+        if deadline is not None and wake >= deadline:
+            return None
+        return delay
+
+def parse_retry_after(response):
+    """
+    Returns the Retry-After header of RESPONSE in seconds, or None if it
+    is missing or given as an HTTP date.
+    """
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
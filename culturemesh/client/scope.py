@@ -0,0 +1,138 @@
+#
+# CultureMesh API Client
+#
+
+"""
+State shared by every client call made while serving one Flask request.
+
+The scope lives on flask.g, so it is created on the first client call of
+a request and thrown away with the request.  Outside of a request (unit
+tests, scripts) there is no scope and client calls are not memoized.
+Worker threads running calls on behalf of a request see its scope
+through bind_scope().
+
+Each scope also carries the request's deadline: every client call made
+while serving the request draws from one budget of
+config.API_REQUEST_DEADLINE_SECS, counted from start_request_scope().
+"""
+
+import copy
+import threading
+import time
+import config
+
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from culturemesh.client.ledger import CallLedger
+
+_local = threading.local()
+
+class RequestScope(object):
+    """
+    Per-request memo of GET responses, keyed by canonical_key(),
+    deadline for upstream calls and ledger of client calls.
+    """
+
+    def __init__(self, budget=None, page=None):
+        """
+        :param budget: seconds the request may spend on API calls, or
+                       None for no deadline
+        :param page: the path of the Flask request, if any
+        """
+        self.budget = budget
+        self.page = page
+        self.deadline = None
+        if budget is not None:
+            self.deadline = time.monotonic() + budget
+        self.ledger = CallLedger()
+        self._memo = {}
+        self._lock = threading.Lock()
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def remaining(self):
+        """
+        Returns the seconds left before the deadline, or None if the
+        scope has none.
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def memo_get(self, key):
+        """
+        Returns a (found, body) pair for KEY. The body is a copy, since
+        views decorate the dicts they get back from the client; every
+        layer that keeps response bodies hands out copies for this reason.
+        """
+        with self._lock:
+            if key in self._memo:
+                self.memo_hits += 1
+                return True, copy.deepcopy(self._memo[key])
+            self.memo_misses += 1
+            return False, None
+
+    def memo_set(self, key, body):
+        with self._lock:
+            self._memo[key] = copy.deepcopy(body)
+
+    def memo_clear(self):
+        """
+        Forgets every memoized response. Called before any mutation so
+        that later reads in the same request see its effect.
+        """
+        with self._lock:
+            self._memo.clear()
+
+    def memo_stats(self):
+        with self._lock:
+            return {'hits': self.memo_hits, 'misses': self.memo_misses}
+
+def current_scope():
+    """
+    Returns the RequestScope of the Flask request being served, or None
+    outside of a request context.
+    """
+    scope = getattr(_local, 'scope', None)
+    if scope is not None:
+        return scope
+    if not has_request_context():
+        return None
+    scope = getattr(g, '_culturemesh_scope', None)
+    if scope is None:
+        scope = start_request_scope()
+    return scope
+
+def start_request_scope():
+    """
+    Creates the scope of the Flask request being served, starting its
+    deadline. Called before each request; current_scope() falls back to
+    it for requests that bypass the hook.
+    """
+    scope = RequestScope(
+        config.API_REQUEST_DEADLINE_SECS, request.full_path.rstrip('?')
+    )
+    g._culturemesh_scope = scope
+    return scope
+
+@contextmanager
+def bind_scope(scope):
+    """
+    Makes SCOPE the current scope of this thread for the duration of
+    the with block.
+    """
+    previous = getattr(_local, 'scope', None)
+    _local.scope = scope
+    try:
+        yield scope
+    finally:
+        _local.scope = previous
+
+def memo_stats():
+    """
+    Returns memo hit and miss counts for the current request.
+    """
+    scope = current_scope()
+    if scope is None:
+        return {'hits': 0, 'misses': 0}
+    return scope.memo_stats()
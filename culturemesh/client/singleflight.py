@@ -0,0 +1,110 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Single-flight coalescing of identical upstream calls.
+
+When a call is already in flight in this process, later callers with the
+same key wait for it and share its result rather than sending a
+duplicate request.  This flattens bursts of identical GETs, such as many
+users opening the same popular network page, or many requests missing
+the cache at once after an entry expires.
+"""
+
+import copy
+import threading
+
+from culturemesh.client.exceptions import Timeout
+
+class _Flight(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        self.value = None
+        self.error = None
+
+class SingleFlight(object):
+    """
+    Registry of in-flight calls, keyed by canonical_key().
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, timeout, function, *args):
+        """
+        :param key: names the call; calls with equal keys are identical
+        :param timeout: the longest a follower waits, or None to wait
+                        for as long as the call takes
+
+        Returns a (shared, result) pair. Returns FUNCTION(*ARGS) if no call
+        with KEY is in flight; otherwise waits for that call and returns a
+        copy of its result (or raises its exception) with shared set.
+
+        Raises Timeout if a follower waits longer than TIMEOUT.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.leaders += 1
+            else:
+                flight.followers += 1
+                self.followers += 1
+
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise Timeout("Timed out waiting for an identical call")
+            if flight.error is not None:
+                raise flight.error
+            return True, copy.deepcopy(flight.value)
+
+        try:
+            result = function(*args)
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            flight.value = result
+        finally:
+            # No follower can join once the flight is unregistered.
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                followers = flight.followers
+            flight.done.set()
+
+        if followers:
+            # Followers copy the stored result; the leader's caller gets
+            # its own copy so that they never see its changes.
+            result = copy.deepcopy(result)
+        return False, result
+
+    def forget(self, match):
+        """
+        Unregisters the calls in flight whose key satisfies MATCH. Their
+        current followers still share their result, but later callers
+        start a call of their own.
+        """
+        with self._lock:
+            keys = [key for key in self._flights if match(key)]
+            for key in keys:
+                del self._flights[key]
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'leaders': self.leaders,
+                'followers': self.followers,
+            }
+
+
+IN_FLIGHT = SingleFlight()
@@ -0,0 +1,702 @@
+#
+# CultureMesh API Client
+#
+
+"""
+A local stand-in for the CultureMesh API.
+
+StandInAPI is a WSGI application serving every endpoint the client
+calls, from the mock data in data/mock/.  That includes the counts,
+autocomplete, account token and mutation routes that Client(mock=True)
+cannot answer.  Pointing a Client(mock=False) at it exercises the
+production path (URL building, the session, auth, retries, caches and
+_get_body) end to end on one machine:
+
+    server = start_server(StandInAPI(faults=Faults(latency=0.05)))
+    Client._api_base_url_ = 'http://127.0.0.1:%d' % server.port
+
+Records are served in the API's schema rather than as stored in the
+mock data: field names are those of the API, networks and events carry
+their location names, and dates are in UTC (see api_record()).
+
+Requests are dispatched through a werkzeug routing table (ROUTES).
+Faults optionally delays answers, with jitter, and fails a share of them
+with an error status, for all routes or per route.  Mutations change the
+server's own copy of the data, in memory; Client(mock=True) does not see
+them.
+
+Run one from the command line with bench/standin_server.py.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+
+import config
+from collections import Counter
+from werkzeug.exceptions import BadRequest, HTTPException, NotFound
+from werkzeug.exceptions import Unauthorized
+from werkzeug.routing import Map, Rule
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+from culturemesh.client.mock_store import MockStore
+
+TOKEN_SECS = 24 * 60 * 60
+MAX_COUNT = 100
+
+# How the API spells dates; the mock data uses config.DATETIME_FMT_STR.
+API_DATE_FMT = '%Y-%m-%dT%H:%M:%SZ'
+DATE_FIELDS = (
+    'register_date', 'last_login', 'join_date', 'date_registered',
+    'date_created', 'event_date', 'post_date', 'reply_date', 'date_added',
+)
+
+# Mock data field names the API spells differently.
+RENAMED_FIELDS = {
+    'firstName': 'first_name',
+    'lastName': 'last_name',
+    'registerDate': 'register_date',
+}
+# Mock data fields the API does not serve.
+HIDDEN_FIELDS = ('password',)
+
+def _rule(path, endpoint, method='GET'):
+    return Rule(path, endpoint=endpoint, methods=[method])
+
+# Each endpoint names the StandInAPI method answering it.
+ROUTES = Map([
+    _rule('/account/token', 'get_token'),
+
+    _rule('/user/ping', 'ping'),
+    _rule('/users', 'get_users'),
+    _rule('/user/<int:id_user>', 'get_user'),
+    _rule('/user/<int:id_user>/networks', 'get_user_networks'),
+    _rule('/user/<int:id_user>/posts', 'get_user_posts'),
+    _rule('/user/<int:id_user>/events', 'get_user_events'),
+    _rule('/user/users', 'create_user', 'POST'),
+    _rule('/user/joinEvent/<int:id_event>', 'join_event', 'POST'),
+    _rule('/user/joinNetwork/<int:id_network>', 'join_network', 'POST'),
+    _rule('/user/leaveEvent/<int:id_event>', 'leave_event', 'DELETE'),
+    _rule('/user/leaveNetwork/<int:id_network>', 'leave_network', 'DELETE'),
+    _rule('/user/update_user', 'update_user', 'PUT'),
+
+    _rule('/network/ping', 'ping'),
+    _rule('/network/networks', 'get_networks'),
+    _rule('/network/<int:id_network>', 'get_network'),
+    _rule('/network/<int:id_network>/posts', 'get_network_posts'),
+    _rule('/network/<int:id_network>/events', 'get_network_events'),
+    _rule('/network/<int:id_network>/users', 'get_network_users'),
+    _rule('/network/<int:id_network>/user_count', 'get_network_user_count'),
+    _rule('/network/<int:id_network>/post_count', 'get_network_post_count'),
+
+    _rule('/post/ping', 'ping'),
+    _rule('/post/<int:id_post>', 'get_post'),
+    _rule('/post/reply/<int:id_reply>', 'get_post_reply'),
+    _rule('/post/<int:id_post>/replies', 'get_post_replies'),
+    _rule('/post/<int:id_post>/reply_count', 'get_post_reply_count'),
+    _rule('/post/new', 'create_post', 'POST'),
+    _rule('/post/new', 'update_post', 'PUT'),
+    _rule('/post/<int:id_post>/reply', 'create_post_reply', 'POST'),
+    _rule('/post/<int:id_post>/reply', 'update_post_reply', 'PUT'),
+
+    _rule('/event/ping', 'ping'),
+    _rule('/event/<int:id_event>', 'get_event'),
+    _rule('/event/<int:id_event>/reg', 'get_event_registrations'),
+    _rule('/event/<int:id_event>/reg_count', 'get_event_reg_count'),
+    _rule('/event/currentUserEventsByNetwork/<int:id_network>',
+          'get_events_attending_in_network'),
+    _rule('/event/new', 'create_event', 'POST'),
+    _rule('/event/new', 'update_event', 'PUT'),
+    _rule('/event/delete', 'delete_event', 'DELETE'),
+
+    _rule('/location/cities/<int:id_>', 'get_city'),
+    _rule('/location/regions/<int:id_>', 'get_region'),
+    _rule('/location/countries/<int:id_>', 'get_country'),
+    _rule('/location/autocomplete', 'location_autocomplete'),
+    _rule('/language/<int:id_>', 'get_language'),
+    _rule('/language/autocomplete', 'language_autocomplete'),
+])
+
+def _now():
+    return time.strftime(config.DATETIME_FMT_STR)
+
+def _page(records, order, count, max_value):
+    """
+    Returns at most COUNT of RECORDS by descending ORDER, starting from
+    MAX_VALUE, if given.
+    """
+    records = sorted(records, key=lambda r: r[order], reverse=True)
+    if max_value is not None:
+        records = [r for r in records if r[order] <= max_value]
+    return records[:count]
+
+def _api_date(value):
+    """
+    Returns VALUE, a mock data date, as the API spells it.  Other values
+    are returned as they are.
+    """
+    try:
+        date = time.strptime(value, config.DATETIME_FMT_STR)
+    except (TypeError, ValueError):
+        return value
+    return time.strftime(API_DATE_FMT, date)
+
+def _store_date(value):
+    """
+    Returns VALUE, a date as the API spells it, as the mock data does.
+    """
+    try:
+        date = time.strptime(value, API_DATE_FMT)
+    except (TypeError, ValueError):
+        return value
+    return time.strftime(config.DATETIME_FMT_STR, date)
+
+def _network_class(network):
+    """
+    Returns the API's class of NETWORK, a mock data network: '_l' for a
+    language network, or 'cc', 'rc' or 'co' for a network of people from
+    a city, region or country.
+    """
+    if network.get('network_class') in (1, '1', '_l'):
+        return '_l'
+    origin = network.get('location_origin') or {}
+    if origin.get('city_id') is not None:
+        return 'cc'
+    elif origin.get('region_id') is not None:
+        return 'rc'
+    return 'co'
+
+def _location_matches(location, query):
+    """
+    Returns whether LOCATION has the ids of QUERY, a 'country,region,city'
+    string in which -1 stands for any.
+    """
+    try:
+        country_id, region_id, city_id = [int(i) for i in query.split(',')]
+    except ValueError:
+        raise BadRequest("Bad location '%s'" % query)
+    for field, id_ in (('country_id', country_id), ('region_id', region_id),
+                       ('city_id', city_id)):
+        if id_ != -1 and location.get(field) != id_:
+            return False
+    return True
+
+
+class Faults(object):
+    """
+    The faults injected into answers: a delay of LATENCY seconds plus up
+    to JITTER more, and a failure with ERROR_STATUS for a share
+    ERROR_RATE of requests.
+    """
+
+    def __init__(self, latency=0, jitter=0, error_rate=0, error_status=503,
+                 retry_after=None):
+        """
+        :param retry_after: if given, the Retry-After header of failures
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+
+    def delay(self, rng):
+        return self.latency + rng.uniform(0, self.jitter)
+
+    def error(self, rng):
+        """
+        Returns the failure response to answer with, or None.
+        """
+        if not self.error_rate or rng.random() >= self.error_rate:
+            return None
+        response = Response(
+            json.dumps({'error': 'injected fault'}), self.error_status,
+            mimetype='application/json'
+        )
+        if self.retry_after is not None:
+            response.headers['Retry-After'] = str(self.retry_after)
+        return response
+
+
+class StandInAPI(object):
+    """
+    WSGI application answering CultureMesh API calls from mock data.
+    """
+
+    def __init__(self, paths=None, key=None, faults=None, route_faults=None,
+                 seed=None):
+        """
+        :param paths: the mock datasets, as for MockStore; defaults to
+                      those of Client(mock=True)
+        :param key: the API key calls must carry, or None to accept any
+        :param faults: the Faults of every route
+        :param route_faults: a dict mapping endpoints (see ROUTES) to the
+                             Faults replacing FAULTS for them
+        :param seed: seeds the faults, for repeatable runs
+        """
+        if paths is None:
+            from culturemesh.client.client import MOCK_DATA_LOCS
+            paths = MOCK_DATA_LOCS
+        self.store = MockStore(paths)
+        self.key = key
+        self.faults = faults or Faults()
+        self.route_faults = route_faults or {}
+        self.hits = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # Token -> (user id, expiration epoch).
+        self._tokens = {}
+
+    def __call__(self, environ, start_response):
+        request = Request(environ)
+        # The client may join its base URL and path with a double slash.
+        environ['PATH_INFO'] = '/' + '/'.join(
+            segment for segment in request.path.split('/') if segment
+        )
+        try:
+            endpoint, values = ROUTES.bind_to_environ(environ).match()
+            with self._lock:
+                self.hits[endpoint] += 1
+            response = self._inject(endpoint)
+            if response is None:
+                response = self._dispatch(request, endpoint, values)
+        except HTTPException as e:
+            response = e
+        return response(environ, start_response)
+
+    def _inject(self, endpoint):
+        faults = self.route_faults.get(endpoint, self.faults)
+        with self._lock:
+            delay = faults.delay(self._rng)
+            response = faults.error(self._rng)
+        if delay > 0:
+            time.sleep(delay)
+        return response
+
+    def _dispatch(self, request, endpoint, values):
+        if self.key is not None and request.args.get('key') != self.key:
+            raise Unauthorized("Bad API key")
+        body = getattr(self, endpoint)(request, **values)
+        if body is None:
+            raise NotFound()
+        if isinstance(body, list):
+            body = [self.api_record(record) for record in body]
+        else:
+            body = self.api_record(body)
+        return Response(json.dumps(body), mimetype='application/json')
+
+    def api_record(self, record):
+        """
+        Returns RECORD, as held in the store, in the API's schema.  Values
+        other than dicts are returned as they are.
+        """
+        if not isinstance(record, dict):
+            return record
+        record = dict(
+            (RENAMED_FIELDS.get(field, field), value)
+            for field, value in record.items() if field not in HIDDEN_FIELDS
+        )
+        for field in DATE_FIELDS:
+            if field in record:
+                record[field] = _api_date(record[field])
+        if 'location_cur' in record:
+            record['network_class'] = _network_class(record)
+            for suffix in ('cur', 'origin'):
+                location = record['location_' + suffix] or {}
+                for name, dataset in (('city', 'cities'),
+                                      ('region', 'regions'),
+                                      ('country', 'countries')):
+                    place = self.store.get(
+                        dataset, location.get(name + '_id')
+                    )
+                    record[name + '_' + suffix] = place and place['name']
+            language = record.get('language_origin')
+            if isinstance(language, dict):
+                record['language_origin'] = language.get('name')
+        if isinstance(record.get('location'), list) and \
+                len(record['location']) == 3:
+            # Events: the mock data lists country, region and city.
+            record['country'], record['region'], record['city'] = \
+                record['location']
+        return record
+
+    ######################### Request helpers #########################
+
+    def _count(self, request):
+        try:
+            count = int(request.args['count'])
+        except (KeyError, ValueError):
+            raise BadRequest("count field missing in query parameters")
+        if count < 1 or count > MAX_COUNT:
+            raise BadRequest("Invalid count field.")
+        return count
+
+    def _cursor(self, request, name, order):
+        value = request.args.get(name)
+        if value is not None and order == 'id':
+            try:
+                value = int(value)
+            except ValueError:
+                raise BadRequest("Bad %s '%s'" % (name, value))
+        elif value is not None:
+            # Pages by date continue from a date the API served.
+            value = _store_date(value)
+        return value
+
+    def _page(self, request, name, field, value, order, cursor='max_id'):
+        return self.store.page(
+            name, field, value, order, self._count(request),
+            self._cursor(request, cursor, order)
+        )
+
+    def _json(self, request):
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            raise BadRequest("Expected a JSON object")
+        return body
+
+    def _current_user(self, request):
+        """
+        Returns the id of the user whose token authorizes REQUEST.
+        """
+        auth = request.authorization
+        token = auth and auth.username
+        with self._lock:
+            id_user, expires = self._tokens.get(token, (None, 0))
+        if id_user is None or expires < time.time():
+            raise Unauthorized("Bad or expired token")
+        return id_user
+
+    def _insert(self, name, record):
+        """
+        Adds RECORD to dataset NAME under the next free id.
+        """
+        with self._lock:
+            ids = [r['id'] for r in self.store.all(name)]
+            record['id'] = max(ids or [0]) + 1
+            self.store.insert(name, record)
+        return record
+
+    def _update(self, request, name, owner):
+        """
+        Updates the record of dataset NAME named by the JSON body of
+        REQUEST, if the current user is its OWNER.
+        """
+        id_user = self._current_user(request)
+        fields = self._json(request)
+        record = self.store.get(name, fields.get('id'))
+        if record is None:
+            raise NotFound()
+        if record[owner] != id_user:
+            raise Unauthorized("Not yours to change")
+        return self.store.update(name, record['id'], fields)
+
+    def _records(self, name, ids):
+        records = [self.store.get(name, id_) for id_ in ids]
+        return [r for r in records if r is not None]
+
+    ############################ Accounts #############################
+
+    def get_token(self, request):
+        auth = request.authorization
+        if auth is None:
+            raise Unauthorized()
+        for user in self.store.all('users'):
+            if auth.username in (user.get('username'), user.get('email')) \
+                    and auth.password == user.get('password'):
+                break
+        else:
+            raise Unauthorized()
+        token = uuid.uuid4().hex
+        expires = int(time.time()) + TOKEN_SECS
+        with self._lock:
+            self._tokens[token] = (user['id'], expires)
+        return {
+            'id': user['id'], 'token': token,
+            'token_expiration_epoch': expires,
+        }
+
+    def ping(self, request):
+        return 'pong'
+
+    ############################## Users ##############################
+
+    def get_users(self, request):
+        return self._page(request, 'users', None, None, 'id')
+
+    def get_user(self, request, id_user):
+        return self.store.get('users', id_user)
+
+    def get_user_networks(self, request, id_user):
+        registrations = self._page(
+            request, 'network_registration', 'id_user', id_user, 'join_date',
+            cursor='max_register_date'
+        )
+        networks = []
+        for registration in registrations:
+            network = self.store.get('networks', registration['id_network'])
+            if network is not None:
+                network['join_date'] = registration['join_date']
+                networks.append(network)
+        return networks
+
+    def get_user_posts(self, request, id_user):
+        return self._page(request, 'posts', 'id_user', id_user, 'id')
+
+    def get_user_events(self, request, id_user):
+        role = request.args.get('role')
+        if role in ('host', 'hosting'):
+            return self._page(request, 'events', 'id_host', id_user, 'id')
+        elif role in ('guest', 'attending'):
+            registrations = self.store.where(
+                'event_registration', 'id_guest', id_user
+            )
+            events = self._records(
+                'events', [r['id_event'] for r in registrations]
+            )
+            return _page(events, 'id', self._count(request),
+                         self._cursor(request, 'max_id', 'id'))
+        raise BadRequest("Unknown role '%s'" % role)
+
+    def create_user(self, request):
+        user = self._json(request)
+        for field in ('username', 'email', 'password'):
+            if not user.get(field):
+                raise BadRequest("Missing %s" % field)
+        for other in self.store.all('users'):
+            if other.get('username') == user['username'] or \
+                    other.get('email') == user['email']:
+                raise BadRequest("User exists")
+        user.setdefault('register_date', _now())
+        return self._insert('users', user)
+
+    def update_user(self, request):
+        id_user = self._current_user(request)
+        fields = self._json(request)
+        fields.pop('id', None)
+        return self.store.update('users', id_user, fields)
+
+    def join_event(self, request, id_event):
+        id_user = self._current_user(request)
+        if self.store.get('events', id_event) is None:
+            raise NotFound()
+        registration = {'id_guest': id_user, 'id_event': id_event}
+        self.store.delete('event_registration', registration)
+        registration['date_registered'] = _now()
+        self.store.insert('event_registration', registration)
+        return registration
+
+    def leave_event(self, request, id_event):
+        id_user = self._current_user(request)
+        return {'deleted': self.store.delete(
+            'event_registration', {'id_guest': id_user, 'id_event': id_event}
+        )}
+
+    def join_network(self, request, id_network):
+        id_user = self._current_user(request)
+        if self.store.get('networks', id_network) is None:
+            raise NotFound()
+        registration = {'id_user': id_user, 'id_network': id_network}
+        self.store.delete('network_registration', registration)
+        registration['join_date'] = _now()
+        self.store.insert('network_registration', registration)
+        return registration
+
+    def leave_network(self, request, id_network):
+        id_user = self._current_user(request)
+        return {'deleted': self.store.delete(
+            'network_registration',
+            {'id_user': id_user, 'id_network': id_network}
+        )}
+
+    ############################ Networks #############################
+
+    def get_networks(self, request):
+        near = request.args.get('near_location')
+        from_ = request.args.get('from_location')
+        language = request.args.get('language')
+        if not (near or from_ or language):
+            return self._page(request, 'networks', None, None, 'id')
+        networks = [
+            n for n in self.store.all('networks')
+            if (not near or _location_matches(n['location_cur'], near)) and
+            (not from_ or _location_matches(n['location_origin'], from_)) and
+            (not language or
+             n.get('language_origin', {}).get('name') == language)
+        ]
+        return _page(networks, 'id', self._count(request),
+                     self._cursor(request, 'max_id', 'id'))
+
+    def get_network(self, request, id_network):
+        return self.store.get('networks', id_network)
+
+    def get_network_posts(self, request, id_network):
+        return self._page(request, 'posts', 'id_network', id_network, 'id')
+
+    def get_network_events(self, request, id_network):
+        return self._page(request, 'events', 'id_network', id_network, 'id')
+
+    def get_network_users(self, request, id_network):
+        # Paged by join date, though the cursor is called max_id.
+        return self._page(
+            request, 'network_registration', 'id_network', id_network,
+            'join_date'
+        )
+
+    def get_network_user_count(self, request, id_network):
+        return {'user_count': len(self.store.where(
+            'network_registration', 'id_network', id_network
+        ))}
+
+    def get_network_post_count(self, request, id_network):
+        return {'post_count': len(
+            self.store.where('posts', 'id_network', id_network)
+        )}
+
+    ############################## Posts ##############################
+
+    def get_post(self, request, id_post):
+        return self.store.get('posts', id_post)
+
+    def get_post_reply(self, request, id_reply):
+        return self.store.get('post_replies', id_reply)
+
+    def get_post_replies(self, request, id_post):
+        return self._page(request, 'post_replies', 'id_parent', id_post, 'id')
+
+    def get_post_reply_count(self, request, id_post):
+        return {'reply_count': len(
+            self.store.where('post_replies', 'id_parent', id_post)
+        )}
+
+    def create_post(self, request):
+        post = self._json(request)
+        post['id_user'] = self._current_user(request)
+        post.setdefault('post_date', _now())
+        return self._insert('posts', post)
+
+    def update_post(self, request):
+        return self._update(request, 'posts', 'id_user')
+
+    def create_post_reply(self, request, id_post):
+        id_user = self._current_user(request)
+        post = self.store.get('posts', id_post)
+        if post is None:
+            raise NotFound()
+        reply = self._json(request)
+        reply.update(id_parent=id_post, id_user=id_user)
+        reply.setdefault('id_network', post['id_network'])
+        reply.setdefault('reply_date', _now())
+        return self._insert('post_replies', reply)
+
+    def update_post_reply(self, request, id_post):
+        return self._update(request, 'post_replies', 'id_user')
+
+    ############################## Events #############################
+
+    def get_event(self, request, id_event):
+        return self.store.get('events', id_event)
+
+    def get_event_registrations(self, request, id_event):
+        return self._page(
+            request, 'event_registration', 'id_event', id_event,
+            'date_registered', cursor='max_register_date'
+        )
+
+    def get_event_reg_count(self, request, id_event):
+        return {'reg_count': len(
+            self.store.where('event_registration', 'id_event', id_event)
+        )}
+
+    def get_events_attending_in_network(self, request, id_network):
+        id_user = self._current_user(request)
+        registrations = self.store.where(
+            'event_registration', 'id_guest', id_user
+        )
+        events = [
+            e for e in self._records(
+                'events', [r['id_event'] for r in registrations]
+            ) if e['id_network'] == id_network
+        ]
+        return _page(events, 'id', self._count(request),
+                     self._cursor(request, 'max_id', 'id'))
+
+    def create_event(self, request):
+        event = self._json(request)
+        event['id_host'] = self._current_user(request)
+        event.setdefault('date_created', _now())
+        return self._insert('events', event)
+
+    def update_event(self, request):
+        return self._update(request, 'events', 'id_host')
+
+    def delete_event(self, request):
+        id_user = self._current_user(request)
+        id_event = self._cursor(request, 'id', 'id')
+        event = self.store.get('events', id_event)
+        if event is None:
+            raise NotFound()
+        if event['id_host'] != id_user:
+            raise Unauthorized("Not yours to delete")
+        self.store.delete('event_registration', {'id_event': id_event})
+        self.store.delete('events', {'id': id_event})
+        return {'deleted': 1}
+
+    ###################### Locations and languages ####################
+
+    def get_city(self, request, id_):
+        return self.store.get('cities', id_)
+
+    def get_region(self, request, id_):
+        return self.store.get('regions', id_)
+
+    def get_country(self, request, id_):
+        return self.store.get('countries', id_)
+
+    def location_autocomplete(self, request):
+        text = request.args.get('input_text', '').lower()
+        locations = []
+        for city in self.store.all('cities'):
+            if text in city['name'].lower():
+                locations.append({
+                    'city_id': city['id'], 'region_id': city.get('region_id'),
+                    'country_id': city.get('country_id'),
+                })
+        for region in self.store.all('regions'):
+            if text in region['name'].lower():
+                locations.append({
+                    'city_id': None, 'region_id': region['id'],
+                    'country_id': region.get('country_id'),
+                })
+        for country in self.store.all('countries'):
+            if text in country['name'].lower():
+                locations.append({
+                    'city_id': None, 'region_id': None,
+                    'country_id': country['id'],
+                })
+        return locations
+
+    def get_language(self, request, id_):
+        return self.store.get('languages', id_)
+
+    def language_autocomplete(self, request):
+        text = request.args.get('input_text', '').lower()
+        return [
+            language for language in self.store.all('languages')
+            if text in language['name'].lower()
+        ]
+
+
+def start_server(app, host='127.0.0.1', port=0):
+    """
+    Serves APP on HOST:PORT (any free port if 0) from a daemon thread,
+    one thread per request.  Returns the server; its port attribute is
+    the port it listens on, and shutdown() stops it.
+    """
+    server = make_server(host, port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
@@ -0,0 +1,94 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Incremental decoding of JSON list responses.
+
+iter_json_array() yields the elements of a JSON array as the bytes of
+the body arrive, holding at most one element (plus a chunk) in memory.
+Callers that only need the first few matches can stop iterating early
+without reading, or parsing, the rest of the body.
+"""
+
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DELIMITERS = ' \t\n\r,]'
+_decoder = json.JSONDecoder()
+
+# Parser states: before '[', before the first element or ']', before a
+# later element, and before ',' or ']'.
+_START, _FIRST, _VALUE, _SEPARATOR = range(4)
+
+def iter_json_array(chunks):
+    """
+    :param chunks: an iterable of bytes making up a UTF-8 JSON array
+
+    Yields the decoded elements of the array, in order.
+
+    Raises ValueError if the body is not a well-formed JSON array.
+    """
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    eof = False
+    state = _START
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos == len(buf) or state in (_FIRST, _VALUE):
+            # Elements are only taken once a delimiter follows them, so
+            # that a number split across chunks ('1', '.5') is not cut
+            # short.
+            if state in (_FIRST, _VALUE) and pos < len(buf):
+                if state == _FIRST and buf[pos] == ']':
+                    return
+                try:
+                    value, end = _decoder.raw_decode(buf, pos)
+                except ValueError:
+                    end = None
+                if end is not None and (eof or (
+                        end < len(buf) and buf[end] in _DELIMITERS)):
+                    yield value
+                    pos = end
+                    state = _SEPARATOR
+                    continue
+            if eof:
+                raise ValueError("Truncated or malformed JSON array")
+            chunk = next(chunks, None)
+            buf = buf[pos:]
+            pos = 0
+            if chunk is None:
+                buf += text_decoder.decode(b'', final=True)
+                eof = True
+            else:
+                buf += text_decoder.decode(chunk)
+            continue
+
+        char = buf[pos]
+        pos += 1
+        if state == _START and char == '[':
+            state = _FIRST
+        elif state == _SEPARATOR and char == ',':
+            state = _VALUE
+        elif state == _SEPARATOR and char == ']':
+            return
+        else:
+            raise ValueError(
+                "Unexpected %r in JSON array at offset %d" % (char, pos - 1)
+            )
+
+def iter_response(response, chunk_size):
+    """
+    Yields the elements of the JSON array in the body of RESPONSE, a
+    requests.Response sent with stream=True, as it is downloaded. The
+    response is closed once iteration stops, early or not.
+    """
+    try:
+        for element in iter_json_array(response.iter_content(chunk_size)):
+            yield element
+    finally:
+        response.close()
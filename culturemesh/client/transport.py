@@ -0,0 +1,84 @@
+#
+# CultureMesh API Client
+#
+
+"""
+HTTP transport shared by every API client in this process.
+
+Views create a new Client on every request, so the underlying
+requests.Session (and its keep-alive connection pools) lives here
+instead of on the client instance.
+"""
+
+import threading
+import requests
+import config
+
+from requests.adapters import HTTPAdapter
+from culturemesh.client import cassette
+from culturemesh.client.decoding import accept_encoding
+
+_session = None
+_session_lock = threading.Lock()
+
+def make_session(pool_connections=None, pool_maxsize=None):
+    """
+    :param pool_connections: the number of per-host pools to keep around
+    :param pool_maxsize: the number of keep-alive connections kept per host
+
+    Returns a new requests.Session with pooled HTTP(S) adapters mounted,
+    asking for compressed bodies.  Depending on config.API_CASSETTE_MODE,
+    the adapters record traffic to a cassette or replay it from one.
+    """
+    if pool_connections is None:
+        pool_connections = config.API_POOL_CONNECTIONS
+    if pool_maxsize is None:
+        pool_maxsize = config.API_POOL_MAXSIZE
+
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = accept_encoding()
+    mode = config.API_CASSETTE_MODE
+    if mode is None:
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+    elif mode == 'record':
+        adapter = cassette.RecordingAdapter(
+            cassette.Cassette(config.API_CASSETTE_FILE),
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+    elif mode == 'replay':
+        adapter = cassette.ReplayAdapter(
+            cassette.Cassette(config.API_CASSETTE_FILE),
+            config.API_CASSETTE_REPLAY_LATENCY
+        )
+    else:
+        raise ValueError("Unknown cassette mode '%s'" % mode)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_session():
+    """
+    Returns the process-wide pooled session, creating it on first use.
+
+    The session is created lazily so that each gunicorn worker builds
+    its own pools after forking.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+def reset_session():
+    """
+    Closes the process-wide session. The next call to get_session()
+    starts over with fresh connection pools.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
@@ -0,0 +1,49 @@
+#
+# CultureMesh API Client
+#
+
+"""
+Helpers for naming API requests independently of how call sites spell
+them ('/user/5' vs 'user/5', query parameter order, ...).
+"""
+
+import hashlib
+
+from urllib.parse import urlencode
+
+def canonical_path(url):
+    """
+    Returns URL without leading, trailing or repeated slashes.
+    """
+    return '/'.join(segment for segment in url.split('/') if segment)
+
+def endpoint_template(url):
+    """
+    Returns the endpoint family of URL: its canonical path with numeric
+    segments replaced by '<id>', e.g. 'event/12/reg_count' becomes
+    'event/<id>/reg_count'.
+    """
+    return '/'.join(
+        '<id>' if segment.isdigit() else segment
+        for segment in canonical_path(url).split('/')
+    )
+
+def canonical_key(url, query_params=None, basic_auth=None):
+    """
+    :param url: the API path, as passed to Client._request
+    :param query_params: a dict of query parameters, if any
+    :param basic_auth: the (user, password) tuple sent with the request
+
+    Returns a string naming this request. Query parameters are sorted
+    and credentials are reduced to a digest, so two calls share a key
+    exactly when upstream would answer them identically.
+    """
+    key = canonical_path(url)
+    if query_params:
+        key += '?' + urlencode(
+            sorted((str(k), str(v)) for k, v in query_params.items())
+        )
+    if basic_auth:
+        auth = '\0'.join(str(part) for part in basic_auth)
+        key += '#' + hashlib.sha1(auth.encode('utf-8')).hexdigest()[:16]
+    return key
@@ -3,6 +3,8 @@
 #
 
 from .client import Request
+from .pagination import PageIterator, id_cursor, field_cursor
+from .pagination import exceeds_page_size
 
 ####################### GET methods #######################
 
@@ -48,12 +50,35 @@ def get_user_networks(client, user_id, count, max_register_date=None):
 
 	Returns list of network JSONs to which USER_ID belongs.
 	"""
+	if exceeds_page_size(client, count):
+		return iter_user_networks(
+			client, user_id, count, max_register_date
+		).to_list()
 	url = 'user/%s/networks' % str(user_id)
 	query_params = {'count': count}
 	if max_register_date is not None:
 		query_params['max_register_date'] = max_register_date
 	return client._request(url, Request.GET, query_params=query_params)
 
+def iter_user_networks(client, user_id, limit=None, max_register_date=None):
+	"""
+	:param client: the CultureMesh API client
+	:param user_id: The id of the user to return networks for.
+	:param limit: the most networks to return, or None for all of them
+	:param max_register_date: the maximum network register date, inclusive,
+	                          to return networks for.
+
+	Returns a lazy iterator over the networks USER_ID belongs to, latest
+	joined first, fetched a page at a time.  Pages are chained by the
+	'join_date' of their last network; if upstream leaves it out, moving
+	past a full page raises CursorMissingError.
+	"""
+	return PageIterator(
+		lambda count, cursor: get_user_networks(client, user_id, count, cursor),
+		field_cursor('join_date'), key=lambda n: n['id'],
+		limit=limit, cursor=max_register_date, page_size=client.max_page_size
+	)
+
 def get_user_posts(client, user_id, count, max_id=None):
 	"""
 	:param client: the CultureMesh API client
@@ -70,25 +95,57 @@ def get_user_posts(client, user_id, count, max_id=None):
 		query_params['max_id'] = max_id
 	return client._request(url, Request.GET, query_params=query_params)
 
-def get_user_events(client, user_id, role, count, max_id=None):
+def get_user_events(client, user_id, role, count, max_id=None, stream=False):
 	"""
 	:param client: the CultureMesh API client
 	:param userId: The id of the user to return events for.
 	:param role: can be "host" or "guest"
+	:param stream: if True, return an iterator that decodes events as
+	               they arrive
 
 	Returns list of events related to USER_ID, according to ROLE.
 	"""
+	if exceeds_page_size(client, count):
+		events = iter_user_events(client, user_id, role, count, max_id)
+		return events if stream else events.to_list()
 	query_params = {'role': role, 'count': count}
 	url = 'user/%s/events' % str(user_id)
 	if max_id is not None:
 		query_params['max_id'] = max_id
-	return client._request(url, Request.GET, query_params=query_params)
+	return client._request(
+		url, Request.GET, query_params=query_params, stream=stream
+	)
+
+def get_user_events_hosting(client, user_id, count, max_id=None, stream=False):
+	return get_user_events(client, user_id, "host", count, max_id, stream)
+
+def get_user_events_attending(client, user_id, count, max_id=None,
+							  stream=False):
+	return get_user_events(client, user_id, "guest", count, max_id, stream)
+
+def iter_user_events(client, user_id, role, limit=None, max_id=None):
+	"""
+	:param client: the CultureMesh API client
+	:param user_id: The id of the user to return events for.
+	:param role: can be "host" or "guest"
+	:param limit: the most events to return, or None for all of them
+	:param max_id: the maximum id, inclusive, of events to return
+
+	Returns a lazy iterator over the events related to USER_ID, according
+	to ROLE, newest first, fetched a page at a time.
+	"""
+	return PageIterator(
+		lambda count, cursor: get_user_events(
+			client, user_id, role, count, cursor
+		),
+		id_cursor, limit=limit, cursor=max_id, page_size=client.max_page_size
+	)
 
-def get_user_events_hosting(client, user_id, count, max_id=None):
-	return get_user_events(client, user_id, "host", count, max_id)
+def iter_user_events_hosting(client, user_id, limit=None, max_id=None):
+	return iter_user_events(client, user_id, "host", limit, max_id)
 
-def get_user_events_attending(client, user_id, count, max_id=None):
-	return get_user_events(client, user_id, "guest", count, max_id)
+def iter_user_events_attending(client, user_id, limit=None, max_id=None):
+	return iter_user_events(client, user_id, "guest", limit, max_id)
 
 
 ####################### POST methods #######################
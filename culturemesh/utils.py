@@ -4,6 +4,7 @@ Otherwise, utilities are found in a dedicated utils file within
 that blueprint.
 """
 
+import config
 import pytz
 
 from flask import abort
@@ -217,17 +218,37 @@ def get_time_ago(past_time):
     return str(years) + " years ago"
 
 
+############### POSTS ################
+
+def enhance_post_info(client, posts):
+  """Adds the author's username, the reply count and a
+  'time ago' string to each post.
+  """
+  calls = []
+  for post in posts:
+    calls.append((client.get_user, post['id_user']))
+    calls.append((client.get_post_reply_count, post['id']))
+  results = client.gather(*calls)
+
+  for i, post in enumerate(posts):
+    post['username'] = results[2 * i]['username']
+    post['reply_count'] = results[2 * i + 1]['reply_count']
+    post['time_ago'] = get_time_ago(post['post_date'])
+  return posts
+
 ############### EVENTS ################
 
 def enhance_event_info(client, events):
+    calls = []
     for event in events:
+        calls.append((client.get_network, event['id_network']))
+        calls.append((client.get_event_reg_count, event['id']))
+    results = client.gather(*calls)
+
+    for i, event in enumerate(events):
         enhance_event_date_info(event)
-        event['network_title'] = get_network_title(
-          client.get_network(event['id_network'])
-        )
-        event['num_registered'] = client.get_event_reg_count(
-          event['id']
-        )['reg_count']
+        event['network_title'] = get_network_title(results[2 * i])
+        event['num_registered'] = results[2 * i + 1]['reg_count']
     return events
 
 def trim_and_sort_events(events):
@@ -250,11 +271,13 @@ def get_upcoming_events_by_user(client, user_id, count):
   networks and which are upcoming, sorted by how close they
   are to today
   """
-  upcoming_events = []
-  networks = client.get_user_networks(user_id, 200)
-  for network in networks:
-    events = client.get_network_events(network['id'], 10)
-    upcoming_events += events
+  # One page: moving past it needs a join_date on each network, which
+  # the API may leave out.
+  networks = client.get_user_networks(user_id, config.API_MAX_PAGE_SIZE)
+  network_events = client.gather(*[
+    (client.get_network_events, network['id'], 10) for network in networks
+  ])
+  upcoming_events = [e for events in network_events for e in events]
 
   upcoming_events = trim_and_sort_events(upcoming_events)
 
@@ -297,9 +320,10 @@ def get_upcoming_events_by_network(client, network_id, count):
 
 def user_is_attending_event(client, user_id, event):
   """Returns true if the given user is attending the given event
-  object. Assumes no more than 500 people are registered for an event.
+  object. Stops reading the registration list as soon as the user is
+  found.
   """
-  event_registration_list = client.get_event_registration_list(event['id'], 500)
+  event_registration_list = client.iter_event_registrations(event['id'])
   for reg in event_registration_list:
     if user_id == reg['id_guest']:
       return True
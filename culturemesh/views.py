@@ -16,6 +16,11 @@ from flask_wtf.csrf import CSRFError
 from flask import render_template, request, redirect, session, abort
 from culturemesh import app, login_manager
 from culturemesh.client import Client
+from culturemesh.client.exceptions import Timeout, CircuitOpenError
+from culturemesh.client.scope import start_request_scope
+from culturemesh.client.scope import current_scope
+from culturemesh.client import metrics
+from culturemesh.client import ledger
 from flask_login import current_user
 from culturemesh.forms import LoginForm, RegisterForm
 from culturemesh.models import User
@@ -110,6 +115,15 @@ def render_login_page():
     else:
         return render_template('login.html', msg=LOGIN_MSG, form=LoginForm())
 
+@app.route("/metrics/")
+def api_metrics():
+    if not config.API_METRICS_ENDPOINT or \
+            request.remote_addr not in config.API_METRICS_ALLOWED_ADDRS:
+        abort(httplib.NOT_FOUND)
+    return metrics.render(), 200, {
+        'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'
+    }
+
 @app.errorhandler(httplib.UNAUTHORIZED)
 @app.route("/logout/")
 @flask_login.login_required
@@ -168,6 +182,23 @@ def make_session_permanent():
     session.permanent = True
     app.permanent_session_lifetime = config.PERMANENT_SESSION_LIFETIME
 
+@app.before_request
+def start_api_deadline():
+    start_request_scope()
+
+@app.after_request
+def report_api_calls(response):
+    summary = current_scope().ledger.summary()
+    if ledger.needs_report(summary):
+        app.logger.warning(
+            "%s %s: %s", request.method, request.path,
+            ledger.describe(summary)
+        )
+    if config.API_LEDGER_DEBUG_HEADER:
+        response.headers["X-CultureMesh-API-Calls"] = \
+            ledger.describe(summary)
+    return response
+
 ##################### Error handling #########################
 
 @app.errorhandler(httplib.NOT_FOUND)
@@ -180,3 +211,12 @@ def page_not_found(e):
 def internal_server_error(e):
     return render_template('error.html')
 
+@app.errorhandler(CircuitOpenError)
+def upstream_unavailable(e):
+    return render_template('error.html'), httplib.SERVICE_UNAVAILABLE
+
+@app.errorhandler(Timeout)
+@app.errorhandler(requests.exceptions.Timeout)
+def upstream_timeout(e):
+    return render_template('error.html'), httplib.GATEWAY_TIMEOUT
+
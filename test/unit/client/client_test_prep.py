@@ -1,5 +1,44 @@
+import json
 import os
 
 os.environ['WTF_CSRF_SECRET_KEY'] = 'dummy-val'
 os.environ['CULTUREMESH_API_KEY'] = 'dummy-key'
 os.environ['CULTUREMESH_API_BASE_ENDPOINT'] = 'dummy-base-endpoint'
+
+from unittest import mock
+from culturemesh.client import Client
+from culturemesh.client.retry import RetryPolicy
+
+def make_response(status_code=200, body=None, headers=None):
+  """
+  Returns a stand-in for a requests.Response carrying a JSON body.
+  """
+  response = mock.Mock()
+  response.status_code = status_code
+  response.headers = headers or {}
+  response.json.return_value = body
+  response.content = json.dumps(body).encode('utf-8')
+  return response
+
+def make_client(retries=None, **kwargs):
+  """
+  Returns a client calling the API, without rate limiting.  KWARGS are
+  passed on to Client.
+
+  :param retries: if given, the client makes up to this many attempts
+                  per call, with no delay between them
+  """
+  c = Client(mock=False, queries_per_second=None, **kwargs)
+  if retries is not None:
+    c.retry_policy = RetryPolicy(retries, base_delay=0, max_delay=0)
+  return c
+
+def patch_requests(client, response=None, side_effect=None):
+  """
+  Returns a context manager replacing the requests CLIENT sends upstream
+  with a mock.  The mock answers RESPONSE, or follows SIDE_EFFECT as
+  mock.Mock does.
+  """
+  return mock.patch.object(
+    client.session, 'request', return_value=response, side_effect=side_effect
+  )
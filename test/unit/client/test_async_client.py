@@ -0,0 +1,294 @@
+#
+# Tests client/async_client.py
+#
+
+import asyncio
+import json
+import threading
+import time
+import werkzeug
+import test.unit.client.client_test_prep
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qs
+from unittest import mock
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh import app
+from culturemesh.client import Request
+from culturemesh.client import ledger
+from culturemesh.client import metrics
+from culturemesh.client.async_client import AsyncClient
+from culturemesh.client.breaker import reset_breakers
+from culturemesh.client.cache import COUNT_CACHE, get_cached_endpoint
+from culturemesh.client.exceptions import CircuitOpenError, DeadlineExceeded
+from culturemesh.client.exceptions import RateLimitTimeout
+from culturemesh.client.ratelimit import TokenBucket
+from culturemesh.client.scope import current_scope
+from culturemesh.client.urls import canonical_key
+
+class StandInHandler(BaseHTTPRequestHandler):
+  """
+  Answers a few API routes with canned JSON.
+  """
+
+  failures_left = 0
+
+  def do_GET(self):
+    url = urlparse(self.path)
+    path = [p for p in url.path.split('/') if p]
+    query = parse_qs(url.query)
+
+    if path == ['flaky'] and StandInHandler.failures_left > 0:
+      StandInHandler.failures_left -= 1
+      return self.reply(503, {})
+
+    if path[0] == 'user' and len(path) == 2:
+      return self.reply(200, {'id': int(path[1]), 'username': 'u%s' % path[1]})
+    elif path[0] == 'network' and path[2:] == ['posts']:
+      count = int(query['count'][0])
+      return self.reply(200, [{'id': i} for i in range(count, 0, -1)])
+    elif path == ['account', 'token']:
+      return self.reply(200, {'auth': self.headers.get('Authorization')})
+    elif path == ['flaky']:
+      return self.reply(200, {'ok': True})
+    elif path[0] == 'network' and path[2:] == ['post_count']:
+      return self.reply(200, {'post_count': 7})
+    self.reply(404, {})
+
+  def do_POST(self):
+    self.rfile.read(int(self.headers.get('Content-Length') or 0))
+    self.reply(200, {})
+
+  def reply(self, status, body):
+    data = json.dumps(body).encode('utf-8')
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(data)))
+    self.end_headers()
+    self.wfile.write(data)
+
+  def log_message(self, *args):
+    pass
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+  daemon_threads = True
+
+server = None
+
+def setup_module():
+  global server
+  server = StandInServer(('127.0.0.1', 0), StandInHandler)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def teardown_module():
+  server.shutdown()
+  server.server_close()
+
+def run(coroutine_fn):
+  """
+  Runs COROUTINE_FN(client) to completion against the stand-in server.
+  """
+  async def main():
+    async with AsyncClient(mock=False, queries_per_second=None) as c:
+      c._api_base_url_ = 'http://127.0.0.1:%d' % server.server_address[1]
+      return await coroutine_fn(c)
+  loop = asyncio.new_event_loop()
+  try:
+    return loop.run_until_complete(main())
+  finally:
+    loop.close()
+
+def test_endpoints_are_awaitable():
+  """
+  Tests that endpoint methods return awaitables with the API's data.
+  """
+  async def calls(c):
+    return await c.get_user(3), await c.get_network_posts(1, 4)
+  user, posts = run(calls)
+  assert_equal(user['username'], 'u3')
+  assert_equal([p['id'] for p in posts], [4, 3, 2, 1])
+
+def test_gather():
+  """
+  Tests that gather awaits calls concurrently and keeps their order.
+  """
+  async def calls(c):
+    return await c.gather(*[(c.get_user, i) for i in range(20)])
+  users = run(calls)
+  assert_equal([u['id'] for u in users], list(range(20)))
+
+def test_basic_auth():
+  """
+  Tests that credentials are sent as HTTP basic auth.
+  """
+  token = run(lambda c: c.get_token('someone', 'secret'))
+  assert_true(token['auth'].startswith('Basic '))
+
+def test_errors_and_retries():
+  """
+  Tests that 404s abort and 503s on GETs are retried.
+  """
+  async def missing(c):
+    return await c._request('nowhere', Request.GET)
+  assert_raises(werkzeug.exceptions.NotFound, run, missing)
+
+  StandInHandler.failures_left = 2
+  async def flaky(c):
+    c.retry_policy.base_delay = 0
+    return await c._request('flaky', Request.GET)
+  assert_equal(run(flaky), {'ok': True})
+
+def test_mock():
+  """
+  Tests that the mock data is available through the async client.
+  """
+  async def calls(c):
+    c.mock = True
+    return await c.get_post(4)
+  assert_equal(run(calls)['vid_link'], "https://www.lorempixel.com/1016/295")
+
+def test_stale_counts_revalidated():
+  """
+  Tests that a stale count is served at once and refreshed from
+  upstream in the background.
+  """
+  COUNT_CACHE.clear()
+  endpoint = get_cached_endpoint('network_post_count')
+  key = canonical_key('network/1/post_count', None, None)
+  with mock.patch.object(endpoint, 'ttl', 0):
+    endpoint.set(key, {'post_count': 1})
+
+  async def calls(c):
+    stale = await c.get_network_post_count(1)
+    deadline = time.monotonic() + 5
+    while endpoint._refreshing or not endpoint.stats()['refreshes']:
+      assert_true(time.monotonic() < deadline)
+      await asyncio.sleep(0.01)
+    return stale
+  assert_equal(run(calls), {'post_count': 1})
+  assert_equal(endpoint.get(key)[1], {'post_count': 7})
+  COUNT_CACHE.clear()
+
+def test_mutations_invalidate_once_awaited():
+  """
+  Tests that a mutation drops the responses it changes once its write
+  has been awaited, not when its coroutine is created.
+  """
+  COUNT_CACHE.clear()
+  endpoint = get_cached_endpoint('post_reply_count')
+  key = canonical_key('post/1/reply_count', None, None)
+  endpoint.set(key, {'reply_count': 1})
+
+  async def calls(c):
+    write = c.create_post_reply(mock.Mock(api_token='t'), 1, {'text': 'hi'})
+    assert_equal(endpoint.get(key), (True, {'reply_count': 1}))
+    await write
+    return endpoint.get(key)
+  assert_equal(run(calls), (False, None))
+
+def test_deadline_and_breakers():
+  """
+  Tests that calls honour the Flask request's deadline and their
+  endpoint's circuit breaker, and that iter_* methods are refused.
+  """
+  assert_raises(TypeError, AsyncClient().iter_network_posts, 1)
+
+  with app.test_request_context('/'):
+    current_scope().deadline = time.monotonic() - 1
+    assert_raises(DeadlineExceeded, run, lambda c: c.get_user(1))
+
+  reset_breakers()
+  StandInHandler.failures_left = 100
+  async def flaky(c):
+    for _ in range(5):
+      with assert_raises(werkzeug.exceptions.ServiceUnavailable):
+        await c._request('flaky', Request.GET, retry=False)
+    return await c._request('flaky', Request.GET, retry=False)
+  try:
+    assert_raises(CircuitOpenError, run, flaky)
+  finally:
+    StandInHandler.failures_left = 0
+    reset_breakers()
+
+def test_rate_limit_wait_within_deadline():
+  """
+  Tests that a call does not queue for the rate limiter past the Flask
+  request's deadline.
+  """
+  async def queued(c):
+    c.limiter = TokenBucket(1, 1)
+    c.limiter.reserve()
+    return await c.get_user(1)
+
+  with app.test_request_context('/'):
+    current_scope().deadline = time.monotonic() + 0.2
+    started = time.monotonic()
+    assert_raises(RateLimitTimeout, run, queued)
+    assert_true(time.monotonic() - started < 0.5)
+
+def test_refresh_dropped_once_loop_closed():
+  """
+  Tests that a background refresh whose event loop has closed is
+  dropped quietly.
+  """
+  COUNT_CACHE.clear()
+  endpoint = get_cached_endpoint('network_post_count')
+  key = canonical_key('network/1/post_count', None, None)
+  failures = endpoint.stats()['refresh_failures']
+  c = AsyncClient(mock=False)
+  loop = asyncio.new_event_loop()
+  loop.close()
+  fetch = lambda: c.get_network_post_count(1)
+  endpoint._refresh(key, lambda: c._run_in_loop(loop, fetch),
+                    endpoint.generation())
+  assert_equal(endpoint.stats()['refresh_failures'], failures)
+  assert_equal(endpoint.get(key), (False, None))
+
+def test_attempts_recorded_in_metrics():
+  """
+  Tests that upstream attempts are recorded under their endpoint template.
+  """
+  labels = ('flaky', 'GET')
+  retries = metrics.RETRIES.value(labels)
+  served = metrics.REQUESTS.value(labels + ('200',))
+  StandInHandler.failures_left = 1
+  async def flaky(c):
+    c.retry_policy.base_delay = 0
+    return await c._request('flaky', Request.GET)
+  try:
+    run(flaky)
+  finally:
+    StandInHandler.failures_left = 0
+  assert_equal(metrics.RETRIES.value(labels) - retries, 1)
+  assert_equal(metrics.REQUESTS.value(labels + ('200',)) - served, 1)
+  assert_true(metrics.REQUESTS.value(labels + ('503',)) >= 1)
+
+  run(lambda c: c.get_user(5))
+  assert_true(
+    'culturemesh_api_requests_total{endpoint="user/<id>",method="GET",'
+    'status="200"}' in metrics.render()
+  )
+
+def test_calls_ledgered():
+  """
+  Tests that calls made while serving a Flask request are recorded in
+  its ledger, with how they were answered.
+  """
+  COUNT_CACHE.clear()
+  async def calls(c):
+    await c.get_user(1)
+    await c.get_network_post_count(1)
+    await c.get_network_post_count(1)
+    with assert_raises(werkzeug.exceptions.NotFound):
+      await c._request('nowhere', Request.GET)
+
+  with app.test_request_context('/'):
+    run(calls)
+    summary = current_scope().ledger.summary()
+  COUNT_CACHE.clear()
+  assert_equal(summary['calls'], 4)
+  assert_equal(summary['sources'], {
+    ledger.UPSTREAM: 2, ledger.CACHE: 1, ledger.ERROR: 1
+  })
+  assert_equal(summary['endpoints']['network/<id>/post_count'], 2)
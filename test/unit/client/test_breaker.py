@@ -0,0 +1,74 @@
+#
+# Tests client/breaker.py
+#
+
+import requests
+import werkzeug
+import test.unit.client.client_test_prep
+
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh.client.breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from culturemesh.client.breaker import breaker_stats, reset_breakers
+from culturemesh.client.exceptions import CircuitOpenError
+from culturemesh.client.urls import endpoint_template
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_endpoint_template():
+  """
+  Tests that calls to the same endpoint family share a name.
+  """
+  assert_equal(endpoint_template('/event/12/reg_count'), 'event/<id>/reg_count')
+  assert_equal(endpoint_template('location/autocomplete'),
+               'location/autocomplete')
+
+def test_breaker_states():
+  """
+  Tests closed -> open -> half-open -> closed / open transitions.
+  """
+  breaker = CircuitBreaker('x', failure_threshold=2, reset_timeout=0)
+  down = lambda: make_response(503)
+  up = lambda: make_response(200)
+
+  breaker.call(down)
+  assert_equal(breaker.state, CLOSED)
+  breaker.call(down)
+  assert_equal(breaker.state, OPEN)
+
+  # With no reset timeout, the next call is a probe.
+  breaker.call(down)
+  assert_equal(breaker.state, OPEN)
+  breaker.call(up)
+  assert_equal(breaker.state, CLOSED)
+  assert_equal(
+    [t[1:] for t in breaker.stats()['transitions']],
+    [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN),
+     (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+  )
+
+def test_open_breaker_fails_fast():
+  """
+  Tests that an open circuit rejects calls without reaching upstream,
+  and that client errors don't count as failures.
+  """
+  reset_breakers()
+  c = make_client()
+  c.retry_policy.max_attempts = 1
+  with patch_requests(c, make_response(404)) as request:
+    for i in range(10):
+      assert_raises(werkzeug.exceptions.NotFound, c.get_event_reg_count, i)
+    assert_equal(breaker_stats()['event/<id>/reg_count']['state'], CLOSED)
+
+    request.side_effect = requests.exceptions.ConnectTimeout()
+    for i in range(5):
+      assert_raises(requests.exceptions.Timeout, c.get_event_reg_count, i)
+    assert_raises(CircuitOpenError, c.get_event_reg_count, 6)
+    assert_equal(request.call_count, 15)
+    assert_equal(breaker_stats()['event/<id>/reg_count']['rejected'], 1)
+
+    # Other endpoint families are unaffected.
+    request.side_effect = None
+    request.return_value = make_response(body={'id': 1})
+    assert_equal(c.get_event(1), {'id': 1})
+  reset_breakers()
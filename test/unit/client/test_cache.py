@@ -0,0 +1,151 @@
+#
+# Tests client/cache.py
+#
+
+import os
+import tempfile
+import time
+import test.unit.client.client_test_prep
+
+from nose.tools import assert_true, assert_false, assert_equal
+from culturemesh.client import Client
+from culturemesh.client import concurrency
+from culturemesh.client.cache import LRUCache
+from culturemesh.client.cache import SQLiteCache
+from culturemesh.client.cache import REFERENCE_CACHE
+from culturemesh.client.cache import COUNT_CACHE
+from culturemesh.client.cache import StaleWhileRevalidateEndpoint
+from culturemesh.client.cache import get_cached_endpoint
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_lru_eviction():
+  """
+  Tests that the least recently used entry is evicted first.
+  """
+  cache = LRUCache(2)
+  cache.set('a', 1)
+  cache.set('b', 2)
+  cache.get('a')
+  cache.set('c', 3)
+  assert_equal(cache.get('b'), (False, None))
+  assert_equal(cache.get('a'), (True, 1))
+  assert_equal(cache.get('c'), (True, 3))
+  assert_equal(cache.stats()['evictions'], 1)
+
+def test_ttl_expiry():
+  """
+  Tests that entries are not served past their TTL.
+  """
+  cache = LRUCache(10)
+  cache.set('a', 1, ttl=0.01)
+  cache.set('b', 2)
+  time.sleep(0.02)
+  assert_equal(cache.get('a'), (False, None))
+  assert_equal(cache.get('b'), (True, 2))
+  stats = cache.stats()
+  assert_equal(stats['expirations'], 1)
+  assert_equal(stats['hit_rate'], 0.5)
+
+def test_reference_data_cached_across_requests():
+  """
+  Tests that city lookups are served from the process-wide cache.
+  """
+  REFERENCE_CACHE.clear()
+  c = make_client()
+  city_b = make_response(body={'id': 2, 'name': 'City B'})
+  with patch_requests(c, city_b) as request:
+    city = c.get_city(2)
+    city['name'] = 'changed'
+    assert_equal(Client(mock=False).get_city(2)['name'], 'City B')
+    assert_equal(request.call_count, 1)
+    assert_true(get_cached_endpoint('city').stats()['hits'] >= 1)
+
+    c.location_autocomplete('City')
+    c.location_autocomplete('City')
+    assert_equal(request.call_count, 3)
+
+def wait_for(condition):
+  deadline = time.monotonic() + 5
+  while not condition():
+    assert_true(time.monotonic() < deadline)
+    time.sleep(0.001)
+
+def test_stale_while_revalidate():
+  """
+  Tests that stale entries are served at once and refreshed in the
+  background, but not past their maximum staleness.
+  """
+  endpoint = StaleWhileRevalidateEndpoint('count', LRUCache(10), 0, 0.2)
+  endpoint.set('k', 1)
+  refreshed = []
+  def refresh():
+    refreshed.append(1)
+    return 2
+
+  assert_equal(endpoint.get('k', refresh), (True, 1))
+  wait_for(lambda: endpoint.stats()['refreshes'] == 1 and
+                   not endpoint._refreshing)
+  assert_equal(endpoint.get('k'), (True, 2))
+  assert_equal(len(refreshed), 1)
+  assert_equal(endpoint.stats()['stale_hits'], 2)
+
+  time.sleep(0.25)
+  assert_equal(endpoint.get('k', refresh), (False, None))
+
+def test_counts_served_from_cache():
+  """
+  Tests that count endpoints skip upstream while their value is cached.
+  """
+  COUNT_CACHE.clear()
+  c = make_client()
+  with patch_requests(c, make_response(body={'reply_count': 4})) as request:
+    assert_equal(c.get_post_reply_count(9), {'reply_count': 4})
+    assert_equal(c.get_post_reply_count(9), {'reply_count': 4})
+    assert_equal(request.call_count, 1)
+
+def test_sqlite_cache_shared_between_instances():
+  """
+  Tests that SQLite caches on one file share entries, TTLs, the size
+  bound and invalidations, as gunicorn workers would.
+  """
+  path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+  worker_a = SQLiteCache(path, 'count', 2)
+  worker_b = SQLiteCache(path, 'count', 2)
+  worker_a.set('a', {'n': 1})
+  assert_equal(worker_b.get('a'), (True, {'n': 1}))
+
+  worker_a.set('b', [1, 2], ttl=0.01)
+  time.sleep(0.02)
+  assert_equal(worker_b.get('b'), (False, None))
+
+  worker_a.set('c', 3)
+  worker_b.set('d', 4)
+  assert_equal(len(worker_a), 2)
+  assert_equal(worker_a.get('a'), (False, None))
+
+  generation = worker_a.generation
+  assert_equal(worker_b.invalidate(lambda key: key == 'c'), 1)
+  assert_equal(worker_a.get('c'), (False, None))
+  assert_false(worker_a.set('c', 5, generation=generation))
+  assert_equal(SQLiteCache(path, 'other', 2).get('d'), (False, None))
+
+def test_get_or_set_computes_once():
+  """
+  Tests that concurrent callers missing one key share one computation,
+  in process and across SQLite caches on one file.
+  """
+  path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+  for make in (lambda: LRUCache(10), lambda: SQLiteCache(path, 'ns', 10)):
+    cache = make()
+    calls = []
+    def compute():
+      calls.append(1)
+      time.sleep(0.05)
+      return 'value'
+    results = concurrency.gather(
+      [(cache.get_or_set, 'k', compute)] * 4
+    )
+    assert_equal(len(calls), 1)
+    assert_equal(sorted(results), [(False, 'value')] * 3 + [(True, 'value')])
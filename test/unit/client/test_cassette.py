@@ -0,0 +1,105 @@
+#
+# Tests client/cassette.py
+#
+
+import json
+import os
+import tempfile
+import time
+import requests
+import test.unit.client.client_test_prep
+
+import config
+from unittest import mock
+from nose.tools import assert_true, assert_equal, assert_raises
+from requests.adapters import HTTPAdapter
+from culturemesh.client.cassette import Cassette
+from culturemesh.client.cassette import RecordingAdapter
+from culturemesh.client.cassette import ReplayAdapter
+from culturemesh.client.exceptions import CassetteMissError
+from culturemesh.client.transport import make_session
+from test.unit.client.client_test_prep import make_client
+
+def make_upstream_response(body, headers):
+  response = requests.Response()
+  response.status_code = 200
+  response.headers = requests.structures.CaseInsensitiveDict(headers)
+  response._content = json.dumps(body).encode('utf-8')
+  return response
+
+def test_record_then_replay():
+  """
+  Tests that recorded calls are replayed without going upstream, and
+  that the API key and transfer headers are not recorded.
+  """
+  path = os.path.join(tempfile.mkdtemp(), 'cassette.jsonl')
+  body = [{'id': 2, 'post_text': 'hi'}]
+  upstream = make_upstream_response(
+    body, {'Cache-Control': 'max-age=60', 'Content-Encoding': 'gzip'}
+  )
+  c = make_client()
+  c._api_base_url_ = 'http://api.culturemesh.test'
+  with mock.patch.object(config, 'API_CASSETTE_FILE', path):
+    with mock.patch.object(config, 'API_CASSETTE_MODE', 'record'):
+      c.session = make_session()
+    with mock.patch.object(HTTPAdapter, 'send', return_value=upstream):
+      assert_equal(c.get_network_posts(3, 10), body)
+
+    with open(path) as f:
+      text = f.read()
+    assert_true('dummy-key' not in text)
+    interaction = json.loads(text)
+    assert_equal(interaction['url'], 'network/3/posts?count=10')
+    assert_equal(interaction['headers'], {'Cache-Control': 'max-age=60'})
+
+    with mock.patch.object(config, 'API_CASSETTE_MODE', 'replay'):
+      c.session = make_session()
+    with mock.patch.object(HTTPAdapter, 'send') as send:
+      assert_equal(c.get_network_posts(3, 10), body)
+      assert_raises(CassetteMissError, c.get_network_posts, 4, 10)
+      assert_equal(send.call_count, 0)
+
+def test_replay_latency():
+  """
+  Tests that recorded latencies are replayed if asked, and that a
+  latency longer than the read timeout replays as a timeout.
+  """
+  path = os.path.join(tempfile.mkdtemp(), 'cassette.jsonl')
+  cassette = Cassette(path)
+  cassette.append({
+    'method': 'GET', 'url': 'event/1', 'status': 200, 'headers': {},
+    'body': '{"id": 1}', 'latency': 0.05
+  })
+  adapter = ReplayAdapter(cassette, replay_latency=True)
+  request = requests.Request('GET', 'http://api/event/1?key=k').prepare()
+
+  started = time.monotonic()
+  response = adapter.send(request, timeout=(1, 1))
+  assert_true(time.monotonic() - started >= 0.05)
+  assert_equal(response.json(), {'id': 1})
+  assert_raises(
+    requests.exceptions.ReadTimeout, adapter.send, request, timeout=(1, 0.01)
+  )
+
+def test_incomplete_interactions():
+  """
+  Tests that requests failing outside the transport are not recorded,
+  and that incomplete records are skipped on replay.
+  """
+  path = os.path.join(tempfile.mkdtemp(), 'cassette.jsonl')
+  cassette = Cassette(path)
+  request = requests.Request('GET', 'http://api/event/1?key=k').prepare()
+  adapter = RecordingAdapter(cassette)
+  with mock.patch.object(HTTPAdapter, 'send', side_effect=ValueError):
+    assert_raises(ValueError, adapter.send, request)
+  assert_true(not os.path.exists(path))
+
+  cassette.append({'method': 'GET', 'url': 'event/1', 'latency': 0})
+  adapter = ReplayAdapter(Cassette(path))
+  assert_raises(CassetteMissError, adapter.send, request)
+  cassette.append({
+    'method': 'GET', 'url': 'event/1', 'status': 200, 'headers': {},
+    'body': '{"id": 1}', 'latency': 0
+  })
+  adapter = ReplayAdapter(Cassette(path))
+  assert_equal(adapter.send(request).json(), {'id': 1})
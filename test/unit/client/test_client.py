@@ -2,9 +2,46 @@
 # Tests client/client.py
 #
 
-from nose.tools import assert_true
+from nose.tools import assert_true, assert_equal
 import test.unit.client.client_test_prep
 import culturemesh
 import requests
 
-# TODO: Insert tests for the Top-level client here.
+from culturemesh.client import Client
+from culturemesh.client import Request
+from culturemesh.client import transport
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_clients_share_session():
+  """
+  Tests that every client in the process reuses one pooled session.
+  """
+  c1 = Client(mock=False)
+  c2 = Client(mock=False)
+  assert_true(c1.session is c2.session)
+  assert_true(c1.session is transport.get_session())
+
+def test_session_pool_size():
+  """
+  Tests that sessions mount adapters with the configured pool size.
+  """
+  session = transport.make_session(pool_connections=2, pool_maxsize=7)
+  adapter = session.get_adapter('https://example.com')
+  assert_equal(adapter._pool_connections, 2)
+  assert_equal(adapter._pool_maxsize, 7)
+
+def test_request_uses_session():
+  """
+  Tests that the client issues its HTTP requests through the shared session.
+  """
+  c = Client(mock=False)
+  with patch_requests(c, make_response(body={'id': 1})) as request:
+    assert_equal(c._request('user/1', Request.GET), {'id': 1})
+    assert_equal(request.call_args[0][0], 'GET')
+    assert_equal(request.call_args[1]['json'], None)
+
+    request.return_value = make_response(body={'ok': True})
+    c._request('post/new', Request.POST, json={'post_text': 'hi'})
+    assert_equal(request.call_args[0][0], 'POST')
+    assert_equal(request.call_args[1]['json'], {'post_text': 'hi'})
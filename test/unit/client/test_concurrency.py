@@ -0,0 +1,63 @@
+#
+# Tests client/concurrency.py
+#
+
+import threading
+import test.unit.client.client_test_prep
+
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh import app
+from culturemesh.client import Client
+from culturemesh.client.scope import memo_stats
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_gather_preserves_order():
+  """
+  Tests that results come back in the order the calls were given.
+  """
+  c = Client(mock=True)
+  network, posts, city = c.gather(
+    (c.get_network, 1), (c.get_network_posts, 2, 10), (c.get_city, 2)
+  )
+  assert_equal(network['id'], 1)
+  assert_equal(len(posts), 3)
+  assert_equal(city['name'], "City B")
+
+def test_gather_runs_concurrently():
+  """
+  Tests that calls overlap: each one waits for all the others to start.
+  """
+  c = Client(mock=True)
+  barrier = threading.Barrier(3, timeout=5)
+  def call(x):
+    barrier.wait()
+    return x
+  assert_equal(c.gather((call, 1), (call, 2), (call, 3)), [1, 2, 3])
+
+def test_gather_errors():
+  """
+  Tests per-call error capture.
+  """
+  c = Client(mock=True)
+  def fail():
+    raise ValueError("upstream down")
+
+  results = c.gather((c.get_event, 2), (fail,), return_exceptions=True)
+  assert_equal(results[0]['id'], 2)
+  assert_true(isinstance(results[1], ValueError))
+
+  assert_raises(ValueError, c.gather, (c.get_event, 2), (fail,))
+
+def test_gather_shares_request_memo():
+  """
+  Tests that calls run on the pool see the caller's request scope.
+  """
+  c = make_client()
+  with patch_requests(c, make_response(body={'id': 1})) as request:
+    with app.test_request_context('/'):
+      c.get_network(1)
+      c.gather((c.get_network, 1), (c.get_network, 1))
+      assert_equal(request.call_count, 1)
+      assert_equal(memo_stats()['hits'], 2)
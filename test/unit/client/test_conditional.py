@@ -0,0 +1,63 @@
+#
+# Tests client/conditional.py
+#
+
+import test.unit.client.client_test_prep
+
+from nose.tools import assert_true, assert_equal
+from culturemesh.client.conditional import ValidatorStore
+from culturemesh.client.conditional import VALIDATOR_STORE
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_not_modified_served_from_store():
+  """
+  Tests that a repeat GET is sent conditionally and a 304 reuses the body.
+  """
+  VALIDATOR_STORE.clear()
+  c = make_client()
+  with patch_requests(c, side_effect=[
+      make_response(body={'id': 7}, headers={'ETag': '"v1"'}),
+      make_response(status_code=304),
+  ]) as request:
+    first = c.get_user(7)
+    first['id'] = 'changed by caller'
+    assert_equal(c.get_user(7), {'id': 7})
+    assert_equal(request.call_args_list[0][1]['headers'], {})
+    assert_equal(
+      request.call_args_list[1][1]['headers'], {'If-None-Match': '"v1"'}
+    )
+  stats = VALIDATOR_STORE.stats()
+  assert_equal(stats['conditional_requests'], 1)
+  assert_equal(stats['not_modified_rate'], 1.0)
+
+def test_modified_response_replaces_entry():
+  """
+  Tests that a full response to a conditional GET is stored in its place.
+  """
+  VALIDATOR_STORE.clear()
+  c = make_client()
+  with patch_requests(c, side_effect=[
+      make_response(body={'v': 1}, headers={'Last-Modified': 'Mon'}),
+      make_response(body={'v': 2}, headers={'Last-Modified': 'Tue'}),
+  ]) as request:
+    c.get_network(1)
+    assert_equal(c.get_network(1), {'v': 2})
+  assert_equal(
+    VALIDATOR_STORE.conditional_headers('network/1'),
+    {'If-Modified-Since': 'Tue'}
+  )
+
+def test_store_bounded_by_bytes():
+  """
+  Tests that the least recently used bodies are evicted to stay in budget.
+  """
+  store = ValidatorStore(20)
+  for key in ('a', 'b', 'c'):
+    store.store(key, make_response(body='x' * 6, headers={'ETag': key}), key)
+  assert_equal(store.conditional_headers('a'), {})
+  assert_true(store.conditional_headers('c'))
+  assert_true(store.stats()['bytes'] <= 20)
+  store.store('big', make_response(body='x' * 40, headers={'ETag': 'e'}), 1)
+  assert_equal(store.conditional_headers('big'), {})
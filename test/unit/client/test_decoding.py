@@ -0,0 +1,37 @@
+#
+# Tests client/decoding.py
+#
+
+import test.unit.client.client_test_prep
+
+from unittest import mock
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh.client import Client
+from culturemesh.client.decoding import DECODERS, get_decoder, decode_body
+
+def test_decoders_agree():
+  """
+  Tests that every installed decoder reads bytes and str alike.
+  """
+  data = '[{"id": 1, "name": "Caf\\u00e9", "tags": [1.5, null, true]}]'
+  expected = [{'id': 1, 'name': 'Café', 'tags': [1.5, None, True]}]
+  for name, loads in DECODERS:
+    assert_equal(loads(data.encode('utf-8')), expected)
+    assert_equal(loads(data), expected)
+    assert_raises(ValueError, loads, b'not json')
+  assert_equal(get_decoder('json')[0], 'json')
+  assert_raises(ValueError, get_decoder, 'no-such-decoder')
+
+def test_non_json_body():
+  """
+  Tests that bodies that aren't JSON are returned as text.
+  """
+  response = mock.Mock(content=b'pong', text='pong')
+  assert_equal(decode_body(response), 'pong')
+
+def test_compression_negotiated():
+  """
+  Tests that API requests ask for compressed bodies.
+  """
+  c = Client(mock=False)
+  assert_true('gzip' in c.session.headers['Accept-Encoding'])
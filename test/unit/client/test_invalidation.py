@@ -0,0 +1,56 @@
+#
+# Tests client/invalidation.py
+#
+
+import test.unit.client.client_test_prep
+
+from unittest import mock
+from nose.tools import assert_true, assert_false, assert_equal
+from culturemesh.client.cache import COUNT_CACHE
+from culturemesh.client.cache import get_cached_endpoint
+from culturemesh.client.invalidation import matcher
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_matcher():
+  """
+  Tests that paths match requests to them, with or without query
+  parameters and credentials, and '*' matches any one segment.
+  """
+  match = matcher(['/network/3/posts', 'user/*/events'])
+  assert_true(match('network/3/posts?count=10#abcdef'))
+  assert_true(match('user/7/events?count=5&role=host'))
+  assert_false(match('network/30/posts'))
+  assert_false(match('network/3/posts/1'))
+  assert_false(match('user/7/events/2'))
+
+def test_stale_body_not_stored_after_invalidation():
+  """
+  Tests that a body fetched before an invalidation is not cached.
+  """
+  endpoint = get_cached_endpoint('post_reply_count')
+  generation = endpoint.generation()
+  endpoint.cache.invalidate(matcher(['post/1/reply_count']))
+  endpoint.set('post/1/reply_count', {'reply_count': 1}, generation)
+  assert_equal(endpoint.get('post/1/reply_count'), (False, None))
+
+def test_mutation_invalidates_counts():
+  """
+  Tests that creating a post drops the cached post count of its network,
+  but not that of other networks.
+  """
+  COUNT_CACHE.clear()
+  c = make_client()
+  user = mock.Mock(id=5, api_token='token')
+  with patch_requests(c, make_response(body={'post_count': 1})) as request:
+    c.get_network_post_count(1)
+    c.get_network_post_count(2)
+    assert_equal(request.call_count, 2)
+
+    c.create_post(user, {'id_user': 5, 'id_network': 1, 'post_text': 'hi'})
+    assert_equal(request.call_count, 3)
+
+    c.get_network_post_count(1)
+    c.get_network_post_count(2)
+    assert_equal(request.call_count, 4)
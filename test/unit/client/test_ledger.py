@@ -0,0 +1,70 @@
+#
+# Tests client/ledger.py
+#
+
+import config
+import test.unit.client.client_test_prep
+
+from unittest import mock
+from nose.tools import assert_true, assert_false, assert_equal
+from culturemesh import app
+from culturemesh.client import ledger
+from culturemesh.client.cache import COUNT_CACHE
+from culturemesh.client.scope import current_scope
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_calls_recorded_per_request():
+  """
+  Tests that each call of a request is recorded with how it was answered.
+  """
+  COUNT_CACHE.clear()
+  c = make_client()
+  with patch_requests(c, make_response(body={'id': 1})) as request:
+    with app.test_request_context('/'):
+      c.get_user(1)
+      c.get_user(1)
+      c.gather(*[(c.get_post_reply_count, i) for i in range(3)])
+      summary = current_scope().ledger.summary()
+
+  assert_equal(summary['calls'], 5)
+  assert_equal(summary['sources'], {ledger.UPSTREAM: 4, ledger.MEMO: 1})
+  assert_equal(summary['duplicates'], 1)
+  assert_equal(summary['refetched'], 0)
+  assert_false(ledger.needs_report(summary))
+  assert_equal(summary['endpoints']['post/<id>/reply_count'], 3)
+
+def test_repeated_endpoints_reported():
+  """
+  Tests N+1 detection and the one-line description.
+  """
+  calls = ledger.CallLedger()
+  for i in range(12):
+    calls.record('user/<id>', 'GET', 'user/%d' % i, ledger.UPSTREAM, 0.01)
+  summary = calls.summary()
+  assert_equal(summary['repeated'], [('user/<id>', 12)])
+  assert_true(ledger.needs_report(summary))
+  assert_equal(
+    ledger.describe(summary),
+    'calls=12 upstream=12 duplicates=0 refetched=0 secs=0.120 '
+    'repeated=user/<id>x12'
+  )
+
+  calls = ledger.CallLedger()
+  calls.record('user/<id>', 'GET', 'user/1', ledger.UPSTREAM, 0.01)
+  calls.record('user/<id>', 'GET', 'user/1', ledger.MEMO, 0)
+  assert_false(ledger.needs_report(calls.summary()))
+  calls.record('user/<id>', 'GET', 'user/1', ledger.UPSTREAM, 0.01)
+  assert_equal(calls.summary()['refetched'], 1)
+  assert_true(ledger.needs_report(calls.summary()))
+
+def test_debug_header():
+  """
+  Tests that the summary is sent back when the debug header is enabled.
+  """
+  with mock.patch.object(config, 'API_LEDGER_DEBUG_HEADER', True):
+    response = app.test_client().get('/about/')
+  assert_true(
+    response.headers['X-CultureMesh-API-Calls'].startswith('calls=0 ')
+  )
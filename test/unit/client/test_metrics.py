@@ -0,0 +1,100 @@
+#
+# Tests client/metrics.py
+#
+
+import config
+import requests
+import test.unit.client.client_test_prep
+
+from unittest import mock
+from nose.tools import assert_true, assert_equal, assert_in
+from culturemesh import app
+from culturemesh.client import metrics
+from culturemesh.client.breaker import get_breaker, reset_breakers
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_histogram_render():
+  """
+  Tests that histogram buckets are rendered cumulatively.
+  """
+  histogram = metrics.Histogram('h', 'Help.', ('endpoint',), (0.1, 1.0))
+  histogram.observe(('a',), 0.05)
+  histogram.observe(('a',), 0.5)
+  histogram.observe(('a',), 5)
+  samples = [(name, labels, value) for name, labels, value in histogram.samples()]
+  assert_equal(samples[:3], [
+    ('h_bucket', '{endpoint="a",le="0.1"}', 1),
+    ('h_bucket', '{endpoint="a",le="1.0"}', 2),
+    ('h_bucket', '{endpoint="a",le="+Inf"}', 3),
+  ])
+  assert_equal(samples[4], ('h_count', '{endpoint="a"}', 3))
+
+def test_client_calls_recorded():
+  """
+  Tests that attempts are recorded under their endpoint template.
+  """
+  reset_breakers()
+  c = make_client(retries=5)
+  labels = ('network/<id>/posts', 'GET')
+  requests_before = metrics.LATENCY.count(labels)
+  retries_before = metrics.RETRIES.value(labels)
+  timeouts_before = metrics.TIMEOUTS.value(labels)
+  bytes_before = metrics.RESPONSE_BYTES.value(labels)
+  with patch_requests(c, side_effect=[
+      requests.exceptions.ReadTimeout(), make_response(503),
+      make_response(body=[{'id': 3}])
+  ]) as request:
+    c.get_network_posts(12, 10)
+  assert_equal(metrics.LATENCY.count(labels) - requests_before, 2)
+  assert_equal(metrics.RETRIES.value(labels) - retries_before, 2)
+  assert_equal(metrics.TIMEOUTS.value(labels) - timeouts_before, 1)
+  assert_equal(
+    metrics.RESPONSE_BYTES.value(labels) - bytes_before,
+    len(b'[{"id": 3}]') + len(b'null')
+  )
+  assert_true(metrics.REQUESTS.value(labels + ('200',)) >= 1)
+
+def test_breakers_rendered():
+  """
+  Tests that each breaker's state and trip count are rendered.
+  """
+  reset_breakers()
+  try:
+    breaker = get_breaker('event/<id>')
+    for _ in range(breaker.failure_threshold):
+      breaker.after_call(False, False)
+    body = metrics.render()
+  finally:
+    reset_breakers()
+  assert_in('# TYPE culturemesh_api_breaker_state gauge', body)
+  assert_in(
+    'culturemesh_api_breaker_state{endpoint="event/<id>",state="open"} 1',
+    body
+  )
+  assert_in(
+    'culturemesh_api_breaker_state{endpoint="event/<id>",state="closed"} 0',
+    body
+  )
+  assert_in('culturemesh_api_breaker_trips_total{endpoint="event/<id>"} 1',
+            body)
+
+def test_metrics_endpoint():
+  """
+  Tests that /metrics/ serves the Prometheus text format, only when
+  enabled and only to allowed addresses.
+  """
+  # The app renders its 404 page for these.
+  response = app.test_client().get('/metrics/')
+  assert_true('culturemesh_api' not in response.get_data(as_text=True))
+  with mock.patch.object(config, 'API_METRICS_ENDPOINT', True):
+    response = app.test_client().get(
+      '/metrics/', environ_base={'REMOTE_ADDR': '10.1.2.3'}
+    )
+    assert_true('culturemesh_api' not in response.get_data(as_text=True))
+    response = app.test_client().get('/metrics/')
+  assert_equal(response.status_code, 200)
+  assert_true(response.content_type.startswith('text/plain'))
+  body = response.get_data(as_text=True)
+  assert_in('# TYPE culturemesh_api_request_duration_seconds histogram', body)
@@ -0,0 +1,165 @@
+#
+# Tests client/mock_store.py
+#
+
+import builtins
+import json
+import os
+import random
+import tempfile
+import test.unit.client.client_test_prep
+
+from unittest import mock
+from nose.tools import assert_equal, assert_is_none
+from culturemesh.client import Client
+from culturemesh.client.client import MOCK_STORE, MOCK_DATA_LOCS
+from culturemesh.client.client import POST_DATA_LOC, TABLES_LOC
+from culturemesh.client.mock_store import MockStore, SQLiteMockStore
+from culturemesh.client.mock_store import build_database, parse_schema
+
+def make_store(records):
+  path = os.path.join(tempfile.mkdtemp(), 'posts.json')
+  with open(path, 'w') as f:
+    json.dump(records, f)
+  return MockStore({'posts': path})
+
+def test_lookups():
+  """
+  Tests primary key and secondary index lookups, and that callers get
+  copies of the stored records.
+  """
+  store = make_store([
+    {'id': 1, 'id_network': 2, 'lang': 'en'},
+    {'id': 2, 'id_network': 3, 'lang': 'fr'},
+    {'id': 3, 'id_network': 2, 'lang': 'fr'},
+  ])
+  assert_equal(store.get('posts', 2)['id_network'], 3)
+  assert_is_none(store.get('posts', 4))
+  assert_equal([p['id'] for p in store.where('posts', 'id_network', 2)], [1, 3])
+  assert_equal([p['id'] for p in store.where('posts', 'lang', 'fr')], [2, 3])
+  assert_equal(store.where('posts', 'id_user', 1), [])
+
+  store.get('posts', 1)['lang'] = 'changed'
+  assert_equal(store.get('posts', 1)['lang'], 'en')
+
+def test_datasets_loaded_once():
+  """
+  Tests that mock endpoints read each data file once, and answer as a
+  scan of the file would.
+  """
+  MOCK_STORE.clear()
+  c = Client(mock=True)
+  with open(POST_DATA_LOC) as f:
+    posts = json.load(f)
+  with mock.patch.object(builtins, 'open', wraps=open) as opened:
+    for network_id in (1, 2):
+      expected = sorted(
+        (p for p in posts if p['id_network'] == network_id),
+        key=lambda p: p['id'], reverse=True
+      )[:5]
+      assert_equal(c.get_network_posts(network_id, 5), expected)
+    assert_equal(c.get_post(posts[0]['id']), posts[0])
+    assert_equal(opened.call_count, 1)
+
+def test_page():
+  """
+  Tests that pages, including ties and ones after inserts, match a
+  sort of the whole dataset.
+  """
+  rng = random.Random(0)
+  records = [
+    {'id': i, 'id_network': rng.randint(1, 3), 'date': rng.randint(1, 20)}
+    for i in range(1, 200)
+  ]
+  store = make_store(records)
+
+  def expected(network, order, count, max_value):
+    matching = sorted(
+      (r for r in records if network is None or r['id_network'] == network),
+      key=lambda r: r[order], reverse=True
+    )
+    if max_value is not None:
+      matching = [r for r in matching if r[order] <= max_value]
+    return matching[:count]
+
+  for insert in (False, True):
+    if insert:
+      record = {'id': 500, 'id_network': 2, 'date': 7}
+      store.insert('posts', record)
+      records.append(record)
+    for network in (None, 1, 2, 3, 4):
+      for order in ('id', 'date'):
+        for max_value in (None, 0, 7, 150, 500):
+          field = None if network is None else 'id_network'
+          assert_equal(
+            store.page('posts', field, network, order, 10, max_value),
+            expected(network, order, 10, max_value)
+          )
+
+def test_reload_on_change():
+  """
+  Tests that a dataset is read again once its file changes, and that a
+  half-written file leaves the loaded data in place.
+  """
+  store = make_store([{'id': 1, 'id_network': 2}])
+  assert_equal(len(store.where('posts', 'id_network', 2)), 1)
+
+  path = store.paths['posts']
+  with open(path, 'w') as f:
+    json.dump([{'id': 1, 'id_network': 2}, {'id': 2, 'id_network': 2}], f)
+  os.utime(path, ns=(0, 10 ** 18))
+  assert_equal(len(store.where('posts', 'id_network', 2)), 2)
+  assert_equal(store.reloads, 1)
+
+  with open(path, 'w') as f:
+    f.write('[{"id": 3')
+  assert_equal(store.get('posts', 2)['id'], 2)
+  assert_equal(store.reloads, 1)
+
+def test_sqlite_store():
+  """
+  Tests that the SQLite store, built from the mock files and data/tables.txt,
+  pages as the JSON store does, and that it can be scaled up.
+  """
+  json_store = MockStore(MOCK_DATA_LOCS)
+  schema = parse_schema(TABLES_LOC)
+  assert_equal(schema['network_registration'],
+               ['id_user', 'id_network', 'join_date'])
+  path = os.path.join(tempfile.mkdtemp(), 'mock.sqlite3')
+  build_database(path, MOCK_DATA_LOCS, schema)
+  store = SQLiteMockStore(path, schema)
+
+  for args in (('posts', 'id_network', 1, 'id', 5, None),
+               ('posts', 'id_network', 1, 'id', 5, 30),
+               ('users', None, None, 'id', 3, None),
+               ('event_registration', 'id_event', 1, 'date_registered', 10,
+                '2017-12-12 05:00:00')):
+    assert_equal(store.page(*args), json_store.page(*args))
+  assert_equal(store.get('posts', 1), json_store.get('posts', 1))
+  assert_equal(store.where('events', 'id_host', 1),
+               json_store.where('events', 'id_host', 1))
+
+  build_database(path, MOCK_DATA_LOCS, schema, scale=3)
+  store = SQLiteMockStore(path, schema)
+  assert_equal(len(store.all('posts')), 3 * len(json_store.all('posts')))
+  assert_equal(len(store.all('users')), len(json_store.all('users')))
+  assert_equal(len(store.all('networks')), len(json_store.all('networks')))
+
+def test_sqlite_rebuild_on_change():
+  """
+  Tests that the SQLite store is rebuilt, at the same scale, once one
+  of its JSON files changes.
+  """
+  schema = parse_schema(TABLES_LOC)
+  store = make_store([{'id': 1, 'id_network': 2}])
+  path = os.path.join(tempfile.mkdtemp(), 'mock.sqlite3')
+  build_database(path, store.paths, schema, scale=2)
+  sqlite_store = SQLiteMockStore(path, schema, store.paths)
+  assert_equal(len(sqlite_store.where('posts', 'id_network', 2)), 2)
+
+  with open(store.paths['posts'], 'w') as f:
+    json.dump([{'id': 1, 'id_network': 2}, {'id': 2, 'id_network': 2}], f)
+  os.utime(store.paths['posts'], ns=(0, 10 ** 19))
+  assert_equal(len(sqlite_store.where('posts', 'id_network', 2)), 4)
+  assert_equal(len(sqlite_store.all('posts')), 4)
+  assert_equal(sqlite_store.rebuilds, 1)
@@ -0,0 +1,104 @@
+#
+# Tests client/pagination.py
+#
+
+import test.unit.client.client_test_prep
+
+from unittest import mock
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh.client import Client
+from culturemesh.client.exceptions import CursorMissingError
+from culturemesh.client.pagination import PageIterator, id_cursor
+
+def make_fetch(items, cursor_field, calls):
+  """
+  Returns a fetch function paging over ITEMS, newest first, with an
+  inclusive cursor on CURSOR_FIELD. Records (count, cursor) in CALLS.
+  """
+  def fetch(count, cursor):
+    calls.append((count, cursor))
+    return [
+      item for item in items
+      if cursor is None or item[cursor_field] <= cursor
+    ][:count]
+  return fetch
+
+def test_id_cursor_pages():
+  """
+  Tests that max_id cursors are walked across pages, up to the limit.
+  """
+  items = [{'id': i} for i in range(250, 0, -1)]
+  calls = []
+  pages = PageIterator(make_fetch(items, 'id', calls), id_cursor, page_size=100)
+  assert_equal(pages.to_list(), items)
+  assert_equal(calls, [(100, None), (100, 150), (100, 50)])
+
+  calls = []
+  pages = PageIterator(make_fetch(items, 'id', calls), id_cursor, limit=120,
+                       cursor=200, page_size=100)
+  assert_equal([i['id'] for i in pages], list(range(200, 80, -1)))
+  assert_equal(calls, [(100, 200), (20, 100)])
+
+def test_date_cursor_skips_repeats():
+  """
+  Tests that items sharing the inclusive boundary date are not repeated.
+  """
+  dates = ['2018-01-0%d' % d for d in (9, 8, 7, 6)]
+  items = [
+    {'id_guest': i, 'date': dates[i // 2]} for i in range(8)
+  ]
+  calls = []
+  pages = PageIterator(
+    make_fetch(items, 'date', calls), lambda item: item['date'],
+    key=lambda item: item['id_guest'], page_size=3
+  )
+  assert_equal([i['id_guest'] for i in pages], list(range(8)))
+
+def test_user_networks_pages():
+  """
+  Tests that a user's networks are read across pages by join date, and
+  that networks without one raise rather than end the iteration.
+  """
+  networks = [
+    {'id': i, 'join_date': '2018-01-%02d 00:00:00' % (i // 2 + 1)}
+    for i in range(9, 0, -1)
+  ]
+  fetch = make_fetch(networks, 'join_date', [])
+  def request(url, method, query_params=None):
+    return fetch(query_params['count'], query_params.get('max_register_date'))
+
+  c = Client(mock=True)
+  c.max_page_size = 3
+  with mock.patch.object(c, '_request', side_effect=request):
+    assert_equal([n['id'] for n in c.get_user_networks(1, 20)],
+                 list(range(9, 0, -1)))
+    for network in networks:
+      del network['join_date']
+    assert_equal(len(c.get_user_networks(1, 3)), 3)
+    assert_raises(CursorMissingError, c.get_user_networks, 1, 20)
+
+def test_iteration_is_lazy():
+  """
+  Tests that pages are only fetched (one ahead) as items are consumed.
+  """
+  items = [{'id': i} for i in range(1000, 0, -1)]
+  calls = []
+  pages = PageIterator(make_fetch(items, 'id', calls), id_cursor, page_size=10)
+  assert_equal(next(pages), {'id': 1000})
+  assert_true(len(calls) <= 2)
+  pages.close()
+
+def test_large_counts_chunked():
+  """
+  Tests that endpoints asked for more than a page read page by page.
+  """
+  c = Client(mock=True)
+  c.max_page_size = 2
+  posts = c.get_network_posts(2, 50)
+  assert_equal([p['id'] for p in posts], [4, 2, 1])
+
+  c.max_page_size = 2
+  regs = c.get_event_registration_list(2, 50)
+  assert_equal([r['id_guest'] for r in regs],
+               [r['id_guest'] for r in c.iter_event_registrations(2, 50)])
+  assert_equal(len(regs), 2)
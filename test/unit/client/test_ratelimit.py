@@ -0,0 +1,59 @@
+#
+# Tests client/ratelimit.py
+#
+
+import os
+import tempfile
+import test.unit.client.client_test_prep
+
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh.client import Client
+from culturemesh.client.exceptions import RateLimitTimeout
+from culturemesh.client.ratelimit import TokenBucket
+from culturemesh.client.ratelimit import FileTokenBucket
+from culturemesh.client.ratelimit import get_limiter
+
+def test_bucket_allows_burst_then_queues():
+  """
+  Tests that a full bucket serves a burst without waiting and
+  queues the requests after it.
+  """
+  bucket = TokenBucket(rate=100, capacity=2)
+  assert_equal(bucket.acquire(), 0)
+  assert_equal(bucket.acquire(), 0)
+  assert_true(bucket.acquire() > 0)
+
+  stats = bucket.stats()
+  assert_equal(stats['requests'], 3)
+  assert_equal(stats['waited'], 1)
+  assert_true(stats['total_wait_secs'] > 0)
+
+def test_bucket_max_wait():
+  """
+  Tests that callers give up instead of queueing past max_wait, and
+  that giving up does not consume a token.
+  """
+  bucket = TokenBucket(rate=1, capacity=1, max_wait=0.01)
+  bucket.acquire()
+  assert_raises(RateLimitTimeout, bucket.acquire)
+  assert_raises(RateLimitTimeout, bucket.acquire)
+  assert_equal(bucket.stats()['requests'], 1)
+
+def test_file_bucket_is_shared():
+  """
+  Tests that two file-backed buckets on the same path share tokens.
+  """
+  path = os.path.join(tempfile.mkdtemp(), 'bucket')
+  bucket1 = FileTokenBucket(path, rate=1, capacity=2, max_wait=0.01)
+  bucket2 = FileTokenBucket(path, rate=1, capacity=2, max_wait=0.01)
+  bucket1.acquire()
+  bucket2.acquire()
+  assert_raises(RateLimitTimeout, bucket1.acquire)
+  assert_raises(RateLimitTimeout, bucket2.acquire)
+
+def test_clients_share_limiter():
+  """
+  Tests that clients with the same budget share one bucket.
+  """
+  assert_true(Client(mock=False).limiter is get_limiter(10))
+  assert_true(Client(mock=False, queries_per_second=None).limiter is None)
@@ -0,0 +1,78 @@
+#
+# Tests client/retry.py
+#
+
+import time
+import requests
+import werkzeug
+import test.unit.client.client_test_prep
+
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh.client import Request
+from culturemesh.client.retry import RetryPolicy
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_get_retried_on_server_error():
+  """
+  Tests that GETs ride out 5xx and 429 responses.
+  """
+  c = make_client(retries=5)
+  with patch_requests(c, side_effect=[
+      make_response(503), make_response(429), make_response(body={'id': 1})
+  ]) as request:
+    assert_equal(c._request('user/1', Request.GET), {'id': 1})
+    assert_equal(request.call_count, 3)
+
+def test_get_retried_on_connection_error():
+  """
+  Tests that GETs ride out connection errors.
+  """
+  c = make_client(retries=5)
+  with patch_requests(c, side_effect=[
+      requests.exceptions.ConnectionError(), make_response(body=[])
+  ]) as request:
+    assert_equal(c._request('network/1/posts', Request.GET), [])
+    assert_equal(request.call_count, 2)
+
+def test_mutations_not_retried():
+  """
+  Tests that POSTs are only retried when the caller opts in.
+  """
+  c = make_client(retries=5)
+  with patch_requests(
+      c, side_effect=[requests.exceptions.ConnectionError()]) as request:
+    assert_raises(
+      requests.exceptions.ConnectionError,
+      c._request, 'post/new', Request.POST, json={}
+    )
+    assert_equal(request.call_count, 1)
+
+    request.reset_mock()
+    request.side_effect = [make_response(502), make_response(body={})]
+    assert_equal(c._request('post/new', Request.POST, json={}, retry=True), {})
+    assert_equal(request.call_count, 2)
+
+def test_retries_give_up():
+  """
+  Tests that retries stop after max_attempts and surface the last error.
+  """
+  c = make_client(retries=5)
+  c.retry_policy.max_attempts = 3
+  with patch_requests(c, make_response(500)) as request:
+    assert_raises(
+      werkzeug.exceptions.InternalServerError,
+      c._request, 'user/1', Request.GET
+    )
+    assert_equal(request.call_count, 3)
+
+def test_backoff_bounded_by_retry_timeout():
+  """
+  Tests that no retry is scheduled past retry_timeout.
+  """
+  policy = RetryPolicy(1, base_delay=0.1, max_delay=0.1)
+  started = time.monotonic()
+  assert_true(policy.next_delay(1, started) <= 0.1)
+  assert_equal(policy.next_delay(1, started, retry_after=5), None)
+  assert_equal(policy.next_delay(1, started - 2), None)
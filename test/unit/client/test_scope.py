@@ -0,0 +1,110 @@
+#
+# Tests client/scope.py
+#
+
+import time
+import werkzeug
+import test.unit.client.client_test_prep
+
+from unittest import mock
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh import app
+from culturemesh.client.exceptions import DeadlineExceeded
+from culturemesh.client.retry import RetryPolicy
+from culturemesh.client.scope import current_scope
+from culturemesh.client.scope import memo_stats
+from culturemesh.client.urls import canonical_key
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def test_canonical_key():
+  """
+  Tests that equivalent spellings of a request share a key.
+  """
+  assert_equal(
+    canonical_key('/network/1/posts/', {'max_id': 5, 'count': 10}),
+    canonical_key('network//1/posts', {'count': '10', 'max_id': '5'})
+  )
+  assert_true(
+    canonical_key('user/1', basic_auth=('a', '')) !=
+    canonical_key('user/1', basic_auth=('b', ''))
+  )
+
+def test_gets_memoized_within_request():
+  """
+  Tests that identical GETs in one request reach upstream once, and
+  that callers get their own copy of the body.
+  """
+  c = make_client()
+  response = make_response(body={'id': 1, 'username': 'u'})
+  with patch_requests(c, response) as request:
+    with app.test_request_context('/'):
+      user = c.get_user(1)
+      user['username'] = 'changed'
+      assert_equal(c.get_user('1')['username'], 'u')
+      assert_equal(request.call_count, 1)
+      assert_equal(memo_stats(), {'hits': 1, 'misses': 1})
+
+    with app.test_request_context('/'):
+      c.get_user(1)
+      assert_equal(request.call_count, 2)
+
+def test_mutation_clears_memo():
+  """
+  Tests that reads after a mutation in the same request go upstream.
+  """
+  c = make_client()
+  current_user = mock.Mock(api_token='token')
+  with patch_requests(c, make_response(body=[])) as request:
+    with app.test_request_context('/'):
+      c.get_user_networks(1, 100)
+      c.join_network(current_user, 2)
+      c.get_user_networks(1, 100)
+      assert_equal(request.call_count, 3)
+
+def test_no_memo_outside_request():
+  """
+  Tests that calls outside of a Flask request are never memoized.
+  """
+  c = make_client()
+  with patch_requests(c, make_response(body={'id': 1})) as request:
+    c.get_network(1)
+    c.get_network(1)
+    assert_equal(request.call_count, 2)
+
+def test_timeouts_passed_upstream():
+  """
+  Tests that every call carries connect and read timeouts, shortened to
+  fit the request's deadline.
+  """
+  c = make_client(connect_timeout=2, read_timeout=7)
+  with patch_requests(c, make_response(body={'id': 1})) as request:
+    c.get_network(1)
+    assert_equal(request.call_args[1]['timeout'], (2, 7))
+    with app.test_request_context('/'):
+      current_scope().deadline = time.monotonic() + 5
+      c.get_network(2)
+      connect, read = request.call_args[1]['timeout']
+      assert_equal(connect, 2)
+      assert_true(4 < read <= 5)
+
+def test_deadline_fails_fast():
+  """
+  Tests that calls made after the deadline never reach upstream, and
+  that retries stop at the deadline.
+  """
+  c = make_client()
+  c.retry_policy = RetryPolicy(60, base_delay=1, max_delay=1)
+  with patch_requests(c, make_response(503)) as request:
+    with app.test_request_context('/'):
+      current_scope().deadline = time.monotonic() + 0.05
+      with mock.patch('random.uniform', return_value=1):
+        assert_raises(
+          werkzeug.exceptions.ServiceUnavailable, c.get_network, 1
+        )
+      assert_equal(request.call_count, 1)
+
+      current_scope().deadline = time.monotonic() - 1
+      assert_raises(DeadlineExceeded, c.get_network, 2)
+      assert_equal(request.call_count, 1)
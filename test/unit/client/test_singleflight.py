@@ -0,0 +1,108 @@
+#
+# Tests client/singleflight.py
+#
+
+import threading
+import time
+import test.unit.client.client_test_prep
+
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh.client.singleflight import SingleFlight, IN_FLIGHT
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def wait_for(condition):
+  deadline = time.monotonic() + 5
+  while not condition():
+    assert_true(time.monotonic() < deadline)
+    time.sleep(0.001)
+
+def test_followers_share_result():
+  """
+  Tests that callers arriving while a call is in flight share its result.
+  """
+  flights = SingleFlight()
+  release = threading.Event()
+  calls = []
+  def fetch():
+    calls.append(1)
+    release.wait(5)
+    return {'id': 1}
+
+  results = []
+  def call():
+    results.append(flights.do('network/1', None, fetch))
+  threads = [threading.Thread(target=call) for _ in range(5)]
+  threads[0].start()
+  wait_for(lambda: calls)
+  for thread in threads[1:]:
+    thread.start()
+  wait_for(lambda: flights.stats()['followers'] == 4)
+  release.set()
+  for thread in threads:
+    thread.join()
+
+  assert_equal(len(calls), 1)
+  assert_equal(sorted(shared for shared, _ in results), [False] + [True] * 4)
+  bodies = [body for _, body in results]
+  assert_true(all(body == {'id': 1} for body in bodies))
+  assert_equal(len(set(id(body) for body in bodies)), 5)
+  assert_equal(flights.stats()['in_flight'], 0)
+
+def test_followers_share_errors():
+  """
+  Tests that followers see the leader's exception, and that the next
+  call after it goes upstream again.
+  """
+  flights = SingleFlight()
+  release = threading.Event()
+  def fail():
+    release.wait(5)
+    raise ValueError("upstream down")
+
+  leader = threading.Thread(
+    target=assert_raises, args=(ValueError, flights.do, 'k', None, fail)
+  )
+  leader.start()
+  wait_for(lambda: flights.stats()['in_flight'] == 1)
+  follower_errors = []
+  def follow():
+    try:
+      flights.do('k', None, fail)
+    except ValueError as e:
+      follower_errors.append(e)
+  follower = threading.Thread(target=follow)
+  follower.start()
+  wait_for(lambda: flights.stats()['followers'] == 1)
+  release.set()
+  leader.join()
+  follower.join()
+  assert_equal(len(follower_errors), 1)
+  assert_equal(flights.do('k', None, lambda: 2), (False, 2))
+
+def test_client_coalesces_gets():
+  """
+  Tests that identical client GETs in flight at once reach upstream once.
+  """
+  c = make_client()
+  release = threading.Event()
+  def respond(*args, **kwargs):
+    release.wait(5)
+    return make_response(body={'id': 7})
+
+  with patch_requests(c, side_effect=respond) as request:
+    followers = IN_FLIGHT.stats()['followers']
+    results = []
+    threads = [
+      threading.Thread(target=lambda: results.append(c.get_network(7)))
+      for _ in range(4)
+    ]
+    for thread in threads:
+      thread.start()
+    wait_for(lambda: IN_FLIGHT.stats()['followers'] - followers == 3)
+    release.set()
+    for thread in threads:
+      thread.join()
+    assert_equal(request.call_count, 1)
+    assert_equal(results, [{'id': 7}] * 4)
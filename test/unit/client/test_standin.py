@@ -0,0 +1,100 @@
+#
+# Tests client/standin.py
+#
+
+import requests
+import test.unit.client.client_test_prep
+
+from unittest import mock
+from nose.tools import assert_equal, assert_raises, assert_true
+from werkzeug.exceptions import ServiceUnavailable, Unauthorized
+from culturemesh.client import Client
+from culturemesh.client.cache import COUNT_CACHE
+from culturemesh.client.standin import Faults, StandInAPI, start_server
+from test.unit.client.client_test_prep import make_client
+
+def make_standin_client(port):
+  c = make_client(retry_timeout=0)
+  c._api_base_url_ = 'http://127.0.0.1:%d' % port
+  return c
+
+def test_real_client_path():
+  """
+  Tests that a real client gets what the mock client does, in the API's
+  schema, from the stand-in, and can log in, post and count through it.
+  """
+  COUNT_CACHE.clear()
+  server = start_server(StandInAPI())
+  try:
+    c = make_standin_client(server.port)
+    mock_c = Client(mock=True)
+    api = lambda records: [server.app.api_record(r) for r in records]
+    assert_equal(c.get_network_posts(1, 5),
+                 api(mock_c.get_network_posts(1, 5)))
+    assert_equal(c.get_event_registration_list(1, 10, '2017-12-12T05:00:00Z'),
+                 api(mock_c.get_event_registration_list(
+                   1, 10, '2017-12-12 05:00:00'
+                 )))
+    assert_equal(c.get_city(1), mock_c.get_city(1))
+    user = c.get_user(1)
+    assert_equal(user['first_name'], 'Jonathan')
+    assert_equal(user['register_date'], '2017-02-21T11:53:30Z')
+    assert_true('password' not in user)
+    assert_equal(c.get_network(1)['city_cur'], 'City B')
+
+    assert_raises(Unauthorized, c.get_token, 'boonekathryn', 'wrong')
+    token = c.get_token('boonekathryn', 'p1')
+    user = mock.Mock(api_token=token['token'])
+    posts = c.get_network_post_count(1)['post_count']
+    c.create_post(user, {'id_network': 1, 'post_text': 'hello'})
+    assert_equal(c.get_network_post_count(1)['post_count'], posts + 1)
+    assert_equal(c.get_network_posts(1, 1)[0]['post_text'], 'hello')
+    assert_equal(c.get_network_posts(1, 1)[0]['id_user'], token['id'])
+  finally:
+    server.shutdown()
+    COUNT_CACHE.clear()
+
+def test_faults():
+  """
+  Tests that injected latency and errors reach the client.
+  """
+  server = start_server(StandInAPI(route_faults={
+    'get_post': Faults(error_rate=1),
+    'get_event': Faults(latency=0.2),
+  }))
+  try:
+    c = make_standin_client(server.port)
+    assert_raises(ServiceUnavailable, c.get_post, 1)
+    assert_equal(c.get_event(1)['id'], 1)
+    c.read_timeout = 0.05
+    assert_raises(requests.exceptions.Timeout, c.get_event, 2)
+    assert_true(server.app.hits['get_post'] >= 1)
+  finally:
+    server.shutdown()
+
+def test_app_renders():
+  """
+  Tests that the app can log in and render pages against the stand-in.
+  """
+  from culturemesh import app
+  COUNT_CACHE.clear()
+  server = start_server(StandInAPI())
+  base_url = 'http://127.0.0.1:%d' % server.port
+  try:
+    with mock.patch.object(Client, '_api_base_url_', base_url), \
+        mock.patch.dict(app.config, WTF_CSRF_ENABLED=False):
+      web = app.test_client()
+      response = web.post('/login/', data={
+        'email_or_username': 'boonekathryn', 'password': 'p1'
+      })
+      assert_equal(response.status_code, 302)
+      assert_true(response.headers['Location'].endswith('/home/'))
+      response = web.get('/home/')
+      assert_equal(response.status_code, 200)
+      assert_true(b'Jonathan' in response.data)
+      response = web.get('/network/?id=1')
+      assert_equal(response.status_code, 200)
+      assert_true(b'City B' in response.data)
+  finally:
+    server.shutdown()
+    COUNT_CACHE.clear()
@@ -0,0 +1,81 @@
+#
+# Tests client/streaming.py
+#
+
+import json
+import werkzeug
+import test.unit.client.client_test_prep
+
+from nose.tools import assert_true, assert_equal, assert_raises
+from culturemesh.client import Client
+from culturemesh.client import Request
+from culturemesh.client.streaming import iter_json_array
+from test.unit.client.client_test_prep import make_client
+from test.unit.client.client_test_prep import make_response
+from test.unit.client.client_test_prep import patch_requests
+
+def split(data, size):
+  return [data[i:i + size] for i in range(0, len(data), size)]
+
+def test_iter_json_array():
+  """
+  Tests that elements decode the same however the body is chunked.
+  """
+  items = [
+    {'name': 'Café ✓', 'tags': [1, 2, {'x': None}]}, 123456, -1.5e3,
+    'a, ] string', True, None, [], {}
+  ]
+  data = json.dumps(items, ensure_ascii=False).encode('utf-8')
+  for size in (1, 2, 3, 7, len(data)):
+    assert_equal(list(iter_json_array(split(data, size))), items)
+  assert_equal(list(iter_json_array([b' [ ] '])), [])
+
+def test_iter_json_array_malformed():
+  """
+  Tests that bodies that aren't JSON arrays are rejected.
+  """
+  for data in (b'{"id": 1}', b'[1,', b'[1 2]', b'[1,]', b''):
+    assert_raises(ValueError, list, iter_json_array([data]))
+
+def test_client_stream_stops_early():
+  """
+  Tests that a streamed call yields elements lazily and closes the
+  response when the caller stops.
+  """
+  c = make_client()
+  chunks = split(json.dumps([{'id_guest': i} for i in range(1000)]).encode(), 64)
+  read = []
+  def iter_content(size):
+    for chunk in chunks:
+      read.append(chunk)
+      yield chunk
+
+  response = make_response()
+  response.iter_content = iter_content
+  with patch_requests(c, response) as request:
+
+    regs = c.get_event_registration_list(1, 100, stream=True)
+    assert_true(request.call_args[1]['stream'])
+    for reg in regs:
+      if reg['id_guest'] == 3:
+        break
+    regs.close()
+    assert_true(len(read) < 3)
+    response.close.assert_called_once_with()
+
+    request.return_value = make_response(404)
+    assert_raises(
+      werkzeug.exceptions.NotFound, c.get_event_registration_list, 1, 10,
+      stream=True
+    )
+
+def test_mock_stream():
+  """
+  Tests that mock data can be streamed too.
+  """
+  c = Client(mock=True)
+  posts = c._request(
+    'network/1/posts', Request.GET, {'count': 10}, stream=True
+  )
+  assert_equal([p['id'] for p in posts],
+               [p['id'] for p in c.get_network_posts(1, 10)])